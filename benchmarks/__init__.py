@@ -0,0 +1 @@
+"""Performance benchmarks for NexaFlow CRM: synthetic data generator and endpoint suite."""
@@ -0,0 +1,114 @@
+"""
+API response compression benchmark for NexaFlow CRM.
+
+Seeds a throwaway database with full list pages, then fetches representative
+endpoints with and without ``Accept-Encoding`` and reports payload size and
+server-side latency for each.
+
+Usage:
+    uv run python benchmarks/bench_compression.py [--rows 100] [--repeat 50]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+_tmp = tempfile.mkdtemp(prefix="nexaflow-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import httpx  # noqa: E402
+
+from nexaflow_crm.database import Base, SessionLocal, engine  # noqa: E402
+from nexaflow_crm.main import app  # noqa: E402
+from nexaflow_crm.models import Contact, ExchangeRateCache, Invoice, Project  # noqa: E402
+from nexaflow_crm.routers.currencies import SUPPORTED_CURRENCIES  # noqa: E402
+
+ENDPOINTS = [
+    "/api/contacts?page_size=100",
+    "/api/invoices?page_size=100",
+    "/api/projects?page_size=100",
+    "/api/currencies/rates?base=USD",
+]
+
+
+def seed(user_id: int, rows: int) -> None:
+    db = SessionLocal()
+    try:
+        db.add_all(
+            Contact(
+                user_id=user_id, name=f"Contact {i}", email=f"contact{i}@example.com", phone="+62 812 0000 0000",
+                company=f"Company {i % 17}", tags="client,priority", notes="Met at the regional meetup; follow up quarterly.",
+            )
+            for i in range(rows)
+        )
+        projects = [Project(user_id=user_id, title=f"Project {i}", description="Website redesign and CMS migration", value=5000 + i) for i in range(rows)]
+        db.add_all(projects)
+        db.flush()
+        db.add_all(
+            Invoice(project_id=projects[i % len(projects)].id, amount=250 + i, due_date="2026-12-31", title=f"Milestone {i}", notes="Net 30")
+            for i in range(rows)
+        )
+        rates = {code: 1.0 + n / 10 for n, code in enumerate(SUPPORTED_CURRENCIES) if code != "USD"}
+        db.add(ExchangeRateCache(base_currency="USD", rates_json=json.dumps(rates), fetched_at=datetime.now(timezone.utc)))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def measure(client: httpx.AsyncClient, path: str, headers: dict, repeat: int) -> tuple[int, float]:
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        resp = await client.get(path, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        size = resp.num_bytes_downloaded
+    return size, statistics.median(timings)
+
+
+async def run(rows: int, repeat: int) -> list[dict]:
+    Base.metadata.create_all(bind=engine)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        resp = await client.post("/api/auth/register", json={"email": "bench@example.com", "name": "Bench", "password": "bench-password"})
+        auth = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        me = (await client.get("/api/auth/me", headers=auth)).json()
+        seed(me["id"], rows)
+
+        results = []
+        for path in ENDPOINTS:
+            plain_size, plain_ms = await measure(client, path, {**auth, "Accept-Encoding": "identity"}, repeat)
+            gzip_size, gzip_ms = await measure(client, path, {**auth, "Accept-Encoding": "gzip"}, repeat)
+            results.append({
+                "endpoint": path,
+                "identity_bytes": plain_size,
+                "gzip_bytes": gzip_size,
+                "ratio": round(gzip_size / plain_size, 3) if plain_size else 0.0,
+                "identity_p50_ms": round(plain_ms, 2),
+                "gzip_p50_ms": round(gzip_ms, 2),
+            })
+    return results
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+    for row in asyncio.run(run(args.rows, args.repeat)):
+        print(
+            f"{row['endpoint']:<34} {row['identity_bytes']:>8} B -> {row['gzip_bytes']:>7} B "
+            f"({row['ratio']:.1%})  p50 {row['identity_p50_ms']:.2f} ms -> {row['gzip_p50_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Contact CSV import benchmark for NexaFlow CRM.
+
+Writes a ``--rows`` row CSV (every tenth row repeats an earlier email, every
+fiftieth has an invalid one) and runs one import job over it, reporting rows
+per second and the INSERT statements issued per chunk. Each chunk must insert
+its contacts with a single statement, and every row must come out imported,
+duplicate or invalid exactly once.
+
+Usage:
+    uv run python benchmarks/bench_import.py [--rows 50000] [--chunk-size 1000]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="nexaflow-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from sqlalchemy import event, func, insert, select  # noqa: E402
+
+from nexaflow_crm import contact_import  # noqa: E402
+from nexaflow_crm.database import Base, SessionLocal, engine  # noqa: E402
+from nexaflow_crm.models import Contact, User  # noqa: E402
+
+
+def _write_csv(rows: int) -> tuple[str, int, int]:
+    path = os.path.join(_tmp, "contacts.csv")
+    duplicates = invalid = 0
+    with open(path, "w", encoding="utf-8") as out:
+        out.write("Name,Email,Company,Tags\n")
+        for n in range(rows):
+            if n % 50 == 49:
+                email, invalid = f"broken-{n}@", invalid + 1
+            elif n % 10 == 9:
+                email, duplicates = f"Contact-{n - 9}@Example.com", duplicates + 1
+            else:
+                email = f"contact-{n}@example.com"
+            out.write(f"Contact {n},{email},Company {n % 100},\"lead,tier-{n % 5}\"\n")
+    return path, duplicates, invalid
+
+
+def run(rows: int, chunk_size: int) -> dict:
+    Base.metadata.create_all(bind=engine)
+    contact_import.CONTACT_IMPORT_CHUNK_SIZE = chunk_size
+    path, duplicates, invalid = _write_csv(rows)
+    with SessionLocal() as db:
+        db.execute(insert(User), [{"id": 1, "email": "bench@example.com", "name": "Bench", "hashed_password": "x"}])
+        db.commit()
+        job_id = contact_import.create_job(db, 1, "contacts.csv", os.path.getsize(path)).id
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    started = time.perf_counter()
+    contact_import.run_import(job_id, path)
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        job = db.get(contact_import.ContactImport, job_id)
+        stored = db.scalar(select(func.count()).select_from(Contact))
+    chunks = math.ceil(rows / chunk_size)
+    contact_inserts = sum(sql.startswith("INSERT INTO contacts ") for sql in statements)
+    expected = rows - duplicates - invalid
+    return {
+        "rows": rows,
+        "status": job.status,
+        "imported": job.imported,
+        "duplicates": job.duplicates,
+        "invalid": job.invalid,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(rows / elapsed),
+        "chunks": chunks,
+        "inserts_per_chunk": round(contact_inserts / chunks, 2),
+        "statements_per_chunk": round(len(statements) / chunks, 1),
+        "ok": (
+            job.status == "completed"
+            and job.imported == stored == expected
+            and job.duplicates == duplicates
+            and job.invalid == invalid
+            and contact_inserts == chunks
+        ),
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+    result = run(args.rows, args.chunk_size)
+    for key, value in result.items():
+        print(f"{key:>22}: {value}")
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Login throughput benchmark for NexaFlow CRM.
+
+Fires bursts of concurrent logins through the in-process ASGI app while a
+background reader polls a cheap authenticated endpoint, then reports login
+throughput and how much the reader's latency degrades during the burst.
+
+Usage:
+    uv run python benchmarks/bench_login.py [--concurrency 32] [--logins 200]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="nexaflow-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+import httpx  # noqa: E402
+
+from nexaflow_crm.auth import get_bcrypt_rounds  # noqa: E402
+from nexaflow_crm.database import Base, engine  # noqa: E402
+from nexaflow_crm.main import app, limiter  # noqa: E402
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def _reader(client: httpx.AsyncClient, headers: dict, stop: asyncio.Event, samples: list[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/api/currencies/supported", headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.005)
+
+
+async def run(concurrency: int, logins: int) -> dict:
+    Base.metadata.create_all(bind=engine)
+    limiter.enabled = False
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        resp = await client.post("/api/auth/register", json={"email": EMAIL, "name": "Bench", "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+        idle: list[float] = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(_reader(client, headers, stop, idle))
+        await asyncio.sleep(0.5)
+        stop.set()
+        await task
+
+        busy: list[float] = []
+        login_ms: list[float] = []
+        failures = 0
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one_login():
+            nonlocal failures
+            async with sem:
+                started = time.perf_counter()
+                r = await client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                login_ms.append((time.perf_counter() - started) * 1000)
+                if r.status_code != 200:
+                    failures += 1
+
+        stop = asyncio.Event()
+        task = asyncio.create_task(_reader(client, headers, stop, busy))
+        started = time.perf_counter()
+        await asyncio.gather(*(one_login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await task
+
+    return {
+        "bcrypt_rounds": get_bcrypt_rounds(),
+        "concurrency": concurrency,
+        "logins": logins,
+        "failures": failures,
+        "logins_per_sec": round(logins / elapsed, 1),
+        "login_p50_ms": round(_pct(login_ms, 50), 1),
+        "login_p95_ms": round(_pct(login_ms, 95), 1),
+        "reader_idle_p50_ms": round(statistics.median(idle), 2) if idle else 0.0,
+        "reader_busy_p50_ms": round(_pct(busy, 50), 2),
+        "reader_busy_p95_ms": round(_pct(busy, 95), 2),
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args(argv)
+    result = asyncio.run(run(args.concurrency, args.logins))
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Notification scheduler benchmark for NexaFlow CRM.
+
+Seeds ``--milestones`` open milestones and ``--invoices`` unpaid invoices with
+a reminder due today, among ``--background`` invoices that are not due, then
+loads the scheduler's window (reporting reminders loaded per second and SQL
+statements), moves ``--changes`` milestones through an ORM session and times
+the incremental reload, and finally fires the day's reminders into a counting
+channel. Every due reminder must be sent exactly once, the moved milestones
+never; re-reading the window afterwards (as the periodic rescan does) must
+load nothing already fired, and a second scheduler over the same day must
+send nothing.
+
+Usage:
+    uv run python benchmarks/bench_notifications.py [--milestones 100000] [--invoices 200000] [--background 300000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+_tmp = tempfile.mkdtemp(prefix="nexaflow-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+os.environ.setdefault("NOTIFICATION_RESCAN_SECONDS", "0")  # rescans are triggered explicitly below
+
+from sqlalchemy import event, func, insert, select  # noqa: E402
+
+from nexaflow_crm import notifications  # noqa: E402
+from nexaflow_crm.database import Base, SessionLocal, engine  # noqa: E402
+from nexaflow_crm.models import Invoice, Milestone, Notification, Project, User  # noqa: E402
+
+TODAY = date(2026, 6, 15)
+PROJECTS = 1000
+
+
+class CountingChannel:
+    name = "bench"
+
+    def __init__(self):
+        self.sent = 0
+
+    def send(self, message) -> None:
+        self.sent += 1
+
+
+def _at(day: date, hour: int, minute: int = 0) -> float:
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc).timestamp()
+
+
+def _seed(milestones: int, invoices: int, background: int) -> None:
+    # Invoices due 1, 8 and 15 days ago all have a reminder today; ones due in the future have none.
+    overdue = [(TODAY - timedelta(days=days)).isoformat() for days in (1, 8, 15)]
+    later = [(TODAY + timedelta(days=days)).isoformat() for days in range(30, 395)]
+    with SessionLocal() as db:
+        db.execute(insert(User), [{"id": 1, "email": "bench@example.com", "name": "Bench", "hashed_password": "x"}])
+        db.execute(insert(Project), [{"id": n, "user_id": 1, "title": f"Project {n}"} for n in range(1, PROJECTS + 1)])
+        db.execute(insert(Milestone), [
+            {"project_id": n % PROJECTS + 1, "title": f"Milestone {n}", "due_date": (TODAY + timedelta(days=1)).isoformat()}
+            for n in range(milestones)
+        ])
+        db.execute(insert(Invoice), [
+            {"project_id": n % PROJECTS + 1, "amount": 100.0, "status": "unpaid", "due_date": overdue[n % 3]}
+            for n in range(invoices)
+        ])
+        db.execute(insert(Invoice), [
+            {"project_id": n % PROJECTS + 1, "amount": 100.0, "status": "paid" if n % 2 else "unpaid", "due_date": later[n % len(later)]}
+            for n in range(background)
+        ])
+        db.commit()
+
+
+def run(milestones: int, invoices: int, background: int, changes: int) -> dict:
+    Base.metadata.create_all(bind=engine)
+    _seed(milestones, invoices, background)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    channel = CountingChannel()
+    start = _at(TODAY, 0)
+    scheduler = notifications.NotificationEngine(channel, now=start)
+    notifications._engine = scheduler
+    event.listen(SessionLocal, "after_flush", notifications._collect_flushed)
+    event.listen(SessionLocal, "after_commit", notifications._apply_committed)
+
+    started = time.perf_counter()
+    loaded = scheduler.tick(start)
+    load_seconds = time.perf_counter() - started
+    load_statements = len(statements)
+
+    with SessionLocal() as db:
+        moved = db.scalars(select(Milestone).order_by(Milestone.id).limit(changes)).all()
+        for milestone in moved:
+            milestone.due_date = (TODAY + timedelta(days=30)).isoformat()
+        moved_ids = [milestone.id for milestone in moved]
+        db.commit()
+    started = time.perf_counter()
+    scheduler.tick(start + 60)
+    reload_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fired = scheduler.tick(_at(TODAY, notifications.NOTIFY_HOUR_UTC, 1))
+    fire_seconds = time.perf_counter() - started
+    scheduler.items_changed({(kind, None) for kind in notifications.KINDS})
+    started = time.perf_counter()
+    rescanned = scheduler.tick(_at(TODAY, notifications.NOTIFY_HOUR_UTC, 2))
+    rescan_seconds = time.perf_counter() - started
+    event.remove(SessionLocal, "after_commit", notifications._apply_committed)
+    event.remove(SessionLocal, "after_flush", notifications._collect_flushed)
+    notifications._engine = None
+
+    again = notifications.NotificationEngine(CountingChannel(), now=start).tick(_at(TODAY, notifications.NOTIFY_HOUR_UTC, 1))
+    with SessionLocal() as db:
+        recorded, moved_sent = db.execute(
+            select(func.count(), func.count().filter(Notification.item_id.in_(moved_ids) & (Notification.kind == "milestone_due")))
+        ).one()
+    expected = milestones - changes + invoices
+    return {
+        "scheduled": loaded.loaded,
+        "not_due_rows": background,
+        "load_seconds": round(load_seconds, 2),
+        "loaded_per_sec": round(loaded.loaded / load_seconds),
+        "load_statements": load_statements,
+        "changed_items": changes,
+        "reload_ms": round(reload_seconds * 1000, 1),
+        "sent": fired.sent,
+        "fire_seconds": round(fire_seconds, 2),
+        "sent_per_sec": round(fired.sent / fire_seconds),
+        "rescan_loaded": rescanned.loaded,
+        "rescan_ms": round(rescan_seconds * 1000, 1),
+        "rerun_sent": again.sent,
+        "ok": (
+            loaded.loaded == milestones + invoices
+            and fired.sent == channel.sent == recorded == expected
+            and moved_sent == 0
+            and rescanned.loaded == rescanned.sent == 0
+            and again.sent == 0
+        ),
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--milestones", type=int, default=100000)
+    parser.add_argument("--invoices", type=int, default=200000)
+    parser.add_argument("--background", type=int, default=300000)
+    parser.add_argument("--changes", type=int, default=1000)
+    args = parser.parse_args(argv)
+    result = run(args.milestones, args.invoices, args.background, args.changes)
+    for key, value in result.items():
+        print(f"{key:>22}: {value}")
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Cursor pagination benchmark for NexaFlow CRM.
+
+Seeds ``--contacts`` contacts whose ``created_at`` values come in runs of
+``--ties`` identical timestamps — whole seconds (stored with a ``.000000``
+fraction), fractional seconds and server-default text without one — then
+walks the whole list through ``keyset_page`` and reports pages per second.
+The walk must return every contact exactly once, in list order, however the
+page boundaries fall across the tied runs.
+
+Usage:
+    uv run python benchmarks/bench_pagination.py [--contacts 100000] [--ties 7] [--page-size 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_tmp = tempfile.mkdtemp(prefix="nexaflow-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from fastapi import Response  # noqa: E402
+from sqlalchemy import insert, text  # noqa: E402
+
+from nexaflow_crm.database import Base, SessionLocal, engine  # noqa: E402
+from nexaflow_crm.models import Contact, User  # noqa: E402
+from nexaflow_crm.pagination import NEXT_CURSOR_HEADER, keyset_page  # noqa: E402
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def _seed(contacts: int, ties: int) -> None:
+    with SessionLocal() as db:
+        db.execute(insert(User), [{"id": 1, "email": "bench@example.com", "name": "Bench", "hashed_password": "x"}])
+        db.execute(insert(Contact), [
+            {"user_id": 1, "name": f"Contact {n}", "created_at": START + timedelta(seconds=n // ties, microseconds=(n // ties) % 2 * 250000)}
+            for n in range(contacts)
+        ])
+        # Every third run as written by the server default: no fractional part.
+        db.execute(text(
+            "UPDATE contacts SET created_at = substr(created_at, 1, 19) WHERE (id - 1) / :ties % 3 = 2"
+        ), {"ties": ties})
+        db.commit()
+
+
+def run(contacts: int, ties: int, page_size: int) -> dict:
+    Base.metadata.create_all(bind=engine)
+    _seed(contacts, ties)
+    with SessionLocal() as db:
+        expected = [row.id for row in db.execute(text("SELECT id FROM contacts ORDER BY created_at DESC, id DESC"))]
+
+        seen, pages, cursor = [], 0, None
+        started = time.perf_counter()
+        while True:
+            response = Response()
+            q = db.query(Contact.id, Contact.created_at).filter(Contact.user_id == 1)
+            rows = keyset_page(q, Contact.created_at, Contact.id, cursor=cursor, page=1, page_size=page_size, response=response)
+            seen.extend(row.id for row in rows)
+            pages += 1
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+        elapsed = time.perf_counter() - started
+    return {
+        "contacts": contacts,
+        "tied_runs_of": ties,
+        "pages": pages,
+        "seconds": round(elapsed, 2),
+        "pages_per_sec": round(pages / elapsed),
+        "rows_seen": len(seen),
+        "ok": seen == expected,
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--contacts", type=int, default=100000)
+    parser.add_argument("--ties", type=int, default=7)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args(argv)
+    result = run(args.contacts, args.ties, args.page_size)
+    for key, value in result.items():
+        print(f"{key:>22}: {value}")
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
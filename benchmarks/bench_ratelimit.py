@@ -0,0 +1,62 @@
+"""
+Rate limiter benchmark for NexaFlow CRM.
+
+Measures the cost of one token-bucket take against the shared SQLite store,
+and checks that several processes hammering the same bucket never grant more
+than its capacity between them (the per-worker counters this replaces let
+each worker grant the full limit).
+
+Usage:
+    uv run python benchmarks/bench_ratelimit.py [--takes 20000] [--processes 4]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from nexaflow_crm.ratelimit import Limit, SqliteBucketStore
+
+_STORE = os.path.join(tempfile.mkdtemp(prefix="nexaflow-bench-"), "ratelimit.db")
+
+
+def _hammer(args: tuple[str, int, int]) -> int:
+    key, capacity, attempts = args
+    store = SqliteBucketStore(_STORE)
+    limit = Limit(capacity, 3600)
+    return sum(store.take(key, limit)[0] for _ in range(attempts))
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--takes", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--capacity", type=int, default=1_000)
+    args = parser.parse_args(argv)
+
+    store = SqliteBucketStore(_STORE)
+    limit = Limit.parse("600/minute")
+    samples = []
+    for i in range(args.takes):
+        started = time.perf_counter()
+        store.take(f"read:10.0.{i % args.clients // 256}.{i % 256}", limit)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    print(f"take: median {statistics.median(samples):.1f} us   p99 {samples[int(len(samples) * 0.99)]:.1f} us   "
+          f"({args.clients} clients, store {_STORE})")
+
+    attempts = args.capacity  # each process alone would exhaust the bucket
+    with multiprocessing.Pool(args.processes) as pool:
+        started = time.perf_counter()
+        granted = sum(pool.map(_hammer, [("shared", args.capacity, attempts)] * args.processes))
+        elapsed = time.perf_counter() - started
+    total = attempts * args.processes
+    print(f"{args.processes} processes x {attempts} takes on one bucket of {args.capacity}: granted {granted} "
+          f"({total / elapsed:,.0f} takes/s)  {'OK' if granted == args.capacity else 'OVER-GRANTED'}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Recurring invoice generation benchmark for NexaFlow CRM.
+
+Creates ``--templates`` monthly templates (three line items each) whose start
+date lies ``--periods`` months back, as after scheduler downtime, then times
+one ``run_due`` catch-up and reports invoices per second and SQL statements
+per batch. A second run over the same day must generate nothing, and every
+period must have exactly one invoice with a unique number.
+
+Usage:
+    uv run python benchmarks/bench_recurring.py [--templates 2000] [--periods 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+_tmp = tempfile.mkdtemp(prefix="nexaflow-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from sqlalchemy import event, func, insert, select  # noqa: E402
+
+from nexaflow_crm import recurring  # noqa: E402
+from nexaflow_crm.database import Base, SessionLocal, engine  # noqa: E402
+from nexaflow_crm.models import Invoice, Project, RecurringInvoice, RecurringInvoiceItem, User  # noqa: E402
+
+TODAY = date(2026, 6, 15)
+
+
+def _seed(templates: int, periods: int) -> None:
+    start = recurring.add_months(date(TODAY.year, TODAY.month, 1), -(periods - 1)).isoformat()
+    with SessionLocal() as db:
+        db.execute(insert(User), [{"id": 1, "email": "bench@example.com", "name": "Bench", "hashed_password": "x"}])
+        db.execute(insert(Project), [{"id": n, "user_id": 1, "title": f"Project {n}"} for n in range(1, templates + 1)])
+        db.execute(insert(RecurringInvoice), [
+            {"id": n, "user_id": 1, "project_id": n, "title": "Retainer", "start_date": start, "next_run_date": start}
+            for n in range(1, templates + 1)
+        ])
+        db.execute(insert(RecurringInvoiceItem), [
+            {"recurring_id": n, "description": f"Item {i}", "quantity": i, "unit_price": 100.0}
+            for n in range(1, templates + 1)
+            for i in range(1, 4)
+        ])
+        db.commit()
+
+
+def run(templates: int, periods: int) -> dict:
+    Base.metadata.create_all(bind=engine)
+    _seed(templates, periods)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    started = time.perf_counter()
+    first = recurring.run_due(TODAY)
+    elapsed = time.perf_counter() - started
+    issued = len(statements)
+    second = recurring.run_due(TODAY)
+
+    with SessionLocal() as db:
+        invoices, numbers, keys = db.execute(
+            select(
+                func.count(),
+                func.count(func.distinct(Invoice.invoice_number)),
+                func.count(func.distinct(Invoice.recurring_id.concat(":").concat(Invoice.period))),
+            )
+        ).one()
+    # Each batch starts with the due query; the last one comes back empty.
+    batches = sum(sql.startswith("SELECT recurring_invoices.") for sql in statements[:issued]) - 1
+    return {
+        "templates": templates,
+        "periods_each": periods,
+        "invoices": first.generated,
+        "seconds": round(elapsed, 2),
+        "invoices_per_sec": round(first.generated / elapsed),
+        "batches": batches,
+        "statements_per_batch": round(issued / batches, 1),
+        "rerun_generated": second.generated,
+        "ok": first.generated == invoices == numbers == keys == templates * periods and second.generated == 0,
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--templates", type=int, default=2000)
+    parser.add_argument("--periods", type=int, default=3)
+    args = parser.parse_args(argv)
+    result = run(args.templates, args.periods)
+    for key, value in result.items():
+        print(f"{key:>22}: {value}")
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
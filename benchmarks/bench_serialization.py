@@ -0,0 +1,109 @@
+"""
+List serialization benchmark for NexaFlow CRM.
+
+Compares, for a 100-row page of each list endpoint, the ORM path (hydrate
+model instances, validate through the ``from_attributes`` schema, encode with
+the stdlib JSON encoder, as FastAPI does with ``response_model``) against the
+fast path the routes now use (column-only select + ``serialization.dumps``).
+
+Usage:
+    uv run python benchmarks/bench_serialization.py [--rows 100] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="nexaflow-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from nexaflow_crm import serialization  # noqa: E402
+from nexaflow_crm.database import Base, SessionLocal, engine  # noqa: E402
+from nexaflow_crm.models import CommunicationLog, Contact, Invoice, Project, User  # noqa: E402
+from nexaflow_crm.schemas import CommunicationLogOut, ContactOut, InvoiceOut, ProjectOut  # noqa: E402
+
+CASES = [
+    ("contacts", Contact, ContactOut),
+    ("projects", Project, ProjectOut),
+    ("invoices", Invoice, InvoiceOut),
+    ("communication_log", CommunicationLog, CommunicationLogOut),
+]
+
+
+def seed(rows: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email="bench@example.com", name="Bench", hashed_password="x")
+        db.add(user)
+        db.flush()
+        db.add_all(
+            Contact(user_id=user.id, name=f"Contact {i}", email=f"c{i}@example.com", company=f"Co {i % 9}", tags="client", notes="")
+            for i in range(rows)
+        )
+        projects = [Project(user_id=user.id, title=f"Project {i}", description="Redesign", value=1000 + i) for i in range(rows)]
+        db.add_all(projects)
+        db.flush()
+        db.add_all(Invoice(project_id=p.id, amount=100 + n, due_date="2026-12-31", title=f"Inv {n}") for n, p in enumerate(projects))
+        db.add_all(
+            CommunicationLog(user_id=user.id, project_id=p.id, type="note", summary=f"Call notes {n}") for n, p in enumerate(projects)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def orm_path(model, schema, rows: int) -> bytes:
+    db = SessionLocal()
+    try:
+        objs = db.query(model).order_by(model.created_at.desc(), model.id.desc()).limit(rows).all()
+        adapter = TypeAdapter(list[schema])
+        data = adapter.dump_python(adapter.validate_python(objs, from_attributes=True), mode="json")
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    finally:
+        db.close()
+
+
+def fast_path(model, schema, rows: int) -> bytes:
+    db = SessionLocal()
+    try:
+        q = db.query(*serialization.schema_columns(schema, model))
+        result = q.order_by(model.created_at.desc(), model.id.desc()).limit(rows).all()
+        return serialization.rows_response(result).body
+    finally:
+        db.close()
+
+
+def timed(fn, *args, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+    seed(args.rows)
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    print(f"encoder: {encoder}, rows per page: {args.rows}")
+    for name, model, schema in CASES:
+        assert json.loads(orm_path(model, schema, args.rows)) == json.loads(fast_path(model, schema, args.rows))
+        orm_ms = timed(orm_path, model, schema, args.rows, repeat=args.repeat)
+        fast_ms = timed(fast_path, model, schema, args.rows, repeat=args.repeat)
+        print(f"{name:<18} orm+pydantic {orm_ms:7.2f} ms   fast path {fast_ms:7.2f} ms   {orm_ms / fast_ms:4.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Cold start benchmark for NexaFlow CRM.
+
+Measures, in fresh interpreter processes, the time to ``import
+nexaflow_crm.main`` and the time from launching a production worker
+(``main.start()`` with ``WORKERS=1``) to its first HTTP response, against a
+database whose schema is already current — the worker-restart case. The
+first launch on an empty database (full schema setup) is reported separately.
+Exits non-zero when a median exceeds its budget, so it can gate CI.
+
+Usage:
+    uv run python benchmarks/bench_startup.py [--runs 5] [--import-budget-ms 1500] [--first-response-budget-ms 3000]
+"""
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+IMPORT_PROBE = (
+    "import time; started = time.perf_counter(); import nexaflow_crm.main; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+def _env(db_path: str, **extra) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [SRC, env.get("PYTHONPATH")])),
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "SECRET_KEY": "bench-secret-key",
+        "RATE_LIMIT_ENABLED": "false",
+        **extra,
+    })
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_ms(db_path: str) -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], env=_env(db_path), capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def first_response_ms(db_path: str, timeout: float = 60.0) -> float:
+    port = _free_port()
+    env = _env(db_path, ENV="production", WORKERS="1", HOST="127.0.0.1", PORT=str(port))
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-c", "from nexaflow_crm.main import start; start()"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/currencies/supported", timeout=5) as resp:
+                    resp.read()
+            except urllib.error.HTTPError:
+                pass  # any status counts: the worker is serving
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise RuntimeError(f"server exited with {server.returncode} before responding")
+                time.sleep(0.005)
+                continue
+            return (time.perf_counter() - started) * 1000
+        raise RuntimeError(f"no response within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--first-response-budget-ms", type=float, default=3000)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="nexaflow-bench-")
+    db_path = os.path.join(workdir, "startup.db")
+    try:
+        fresh_ms = first_response_ms(db_path)  # creates the schema and stamps its version
+        imports = [import_ms(db_path) for _ in range(args.runs)]
+        responses = [first_response_ms(db_path) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = [
+        ("import nexaflow_crm.main", imports, args.import_budget_ms),
+        ("first response (schema current)", responses, args.first_response_budget_ms),
+    ]
+    print(f"{'first response (empty database)':<34} {fresh_ms:8.1f} ms")
+    failed = False
+    for name, samples, budget in results:
+        median = statistics.median(samples)
+        verdict = "ok" if median <= budget else "OVER BUDGET"
+        failed |= median > budget
+        print(f"{name:<34} {median:8.1f} ms median  (min {min(samples):.1f}, max {max(samples):.1f})  "
+              f"budget {budget:.0f} ms  {verdict}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Throughput by worker count for the production launcher.
+
+Starts ``main.start()`` in production mode (``ENV=production``) with each
+``--workers`` value against a copy of a generated database, drives it with a
+closed loop of ``--concurrency`` clients over a read-heavy request mix plus
+PDF downloads, and reports requests/s and latency percentiles per worker
+count.
+
+Usage:
+    uv run python -m benchmarks.bench_workers --workers 1,2,4 --concurrency 32 --seconds 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.loadtest import _free_port, _percentile, wait_ready
+
+# (weight, path) — {invoice_id} and {project_id} are filled from the first page of each list.
+REQUEST_MIX = [
+    (30, "/api/contacts?page_size=50"),
+    (20, "/api/invoices?page_size=50"),
+    (15, "/api/projects/{project_id}/summary"),
+    (15, "/api/contacts?search=an&page_size=20"),
+    (10, "/api/dashboard"),
+    (5, "/api/invoices/{invoice_id}/preview"),
+    (5, "/api/invoices/{invoice_id}/pdf"),
+]
+
+
+def start_server(db_path: str, workers: int, port: int, extra_env: dict) -> subprocess.Popen:
+    env = dict(os.environ)
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")])),
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "SECRET_KEY": "bench-secret-key",
+        "ENV": "production",
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "WORKERS": str(workers),
+        "RATE_LIMIT_ENABLED": "false",
+        **extra_env,
+    })
+    return subprocess.Popen([sys.executable, "-c", "from nexaflow_crm.main import start; start()"], env=env)
+
+
+async def drive(url: str, manifest: dict, concurrency: int, seconds: float, warmup: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        user = manifest["users"][0]
+        login = await client.post("/api/auth/login", json={"email": user["email"], "password": user["password"]})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        ids = {
+            "project_id": (await client.get("/api/projects?page_size=1", headers=headers)).json()[0]["id"],
+            "invoice_id": (await client.get("/api/invoices?page_size=1", headers=headers)).json()[0]["id"],
+        }
+        paths = [path.format(**ids) for _, path in REQUEST_MIX]
+        weights = [weight for weight, _ in REQUEST_MIX]
+        latencies: list[float] = []
+        errors = 0
+        recording = False
+        stop = asyncio.Event()
+
+        async def worker(seed: int):
+            nonlocal errors
+            rnd = random.Random(seed)
+            while not stop.is_set():
+                path = rnd.choices(paths, weights)[0]
+                started = time.perf_counter()
+                try:
+                    ok = (await client.get(path, headers=headers)).status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if recording:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    errors += not ok
+
+        tasks = [asyncio.create_task(worker(i)) for i in range(concurrency)]
+        await asyncio.sleep(warmup)
+        recording = True
+        started = time.perf_counter()
+        await asyncio.sleep(seconds)
+        recording = False
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    return {
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "p99_ms": round(_percentile(latencies, 99), 1),
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+    }
+
+
+def main(argv: list[str] | None = None):
+    from benchmarks.datagen import manifest_path
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--warmup-seconds", type=float, default=3.0)
+    parser.add_argument("--db", help="Generated database (created with --preset if missing)")
+    parser.add_argument("--preset", default="small")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra server environment")
+    parser.add_argument("--out", help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="nexaflow-bench-")
+    source = args.db or os.path.join(workdir, f"{args.preset}.db")
+    if not os.path.exists(source):
+        from benchmarks import datagen
+
+        datagen.main(["--preset", args.preset, "--db", source])
+    with open(manifest_path(source)) as fh:
+        manifest = json.load(fh)
+    extra_env = dict(item.partition("=")[::2] for item in args.env)
+
+    print(f"CPUs: {os.cpu_count()}  concurrency: {args.concurrency}  {args.seconds:g}s per run")
+    results = {}
+    try:
+        for workers in (int(n) for n in args.workers.split(",")):
+            db_path = os.path.join(workdir, f"run-{workers}.db")
+            shutil.copyfile(source, db_path)
+            port = _free_port()
+            server = start_server(db_path, workers, port, extra_env)
+            try:
+                asyncio.run(wait_ready(f"http://127.0.0.1:{port}"))
+                results[workers] = asyncio.run(
+                    drive(f"http://127.0.0.1:{port}", manifest, args.concurrency, args.seconds, args.warmup_seconds)
+                )
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=args.seconds + 30)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+                    server.wait()
+            r = results[workers]
+            print(f"workers {workers:>2}: {r['rps']:8.1f} req/s  p50 {r['p50_ms']:7.1f}  p95 {r['p95_ms']:7.1f}  "
+                  f"p99 {r['p99_ms']:7.1f} ms  errors {r['error_rate']:.2%}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump({"cpus": os.cpu_count(), "concurrency": args.concurrency, "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+Deterministic synthetic data generator for NexaFlow CRM benchmarks.
+
+The same (preset, seed, anchor) always produces the same database, so
+numbers from different commits are comparable. Rows are written with
+batched executemany on one connection; the contact FTS index is built once
+at the end instead of firing a trigger per row.
+
+Usage:
+    uv run python -m benchmarks.datagen --preset small --db bench-small.db
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import date, datetime, timedelta
+
+BATCH_SIZE = 10_000
+DEFAULT_SEED = 1
+DEFAULT_ANCHOR = date(2026, 6, 30)
+PASSWORD = "bench-password"
+
+TAG_POOL = [
+    "client", "lead", "vip", "design", "dev", "agency", "retainer", "referral", "enterprise", "startup",
+    "ecommerce", "saas", "nonprofit", "local", "overseas", "priority", "dormant", "partner", "vendor", "press",
+]
+FIRST_NAMES = ["Ayu", "Budi", "Citra", "Dewi", "Eko", "Fajar", "Gita", "Hadi", "Indah", "Joko", "Kartika", "Lukas",
+               "Maya", "Nina", "Oscar", "Putri", "Rina", "Sari", "Tono", "Umar", "Vera", "Wahyu", "Yuni", "Zaki"]
+LAST_NAMES = ["Santoso", "Wijaya", "Halim", "Pratama", "Kusuma", "Nugroho", "Smith", "Tanaka", "Müller", "Garcia",
+              "Lee", "Dubois", "Rossi", "Novak", "Silva", "Hansen"]
+COMPANY_WORDS = ["Nusantara", "Digital", "Kreatif", "Solusi", "Media", "Labs", "Studio", "Global", "Teknologi", "Works"]
+PROJECT_KINDS = ["Website redesign", "Mobile app", "Brand identity", "SEO retainer", "CMS migration", "Landing page",
+                 "E-commerce build", "Dashboard", "API integration", "Maintenance"]
+LOG_TYPES = ["note", "call", "email", "invoice_sent", "payment_received"]
+CURRENCIES = [("USD", 85), ("EUR", 5), ("GBP", 3), ("IDR", 4), ("SGD", 3)]
+PROJECT_STATUSES = [("active", 50), ("completed", 30), ("on_hold", 10), ("cancelled", 10)]
+INVOICE_STATUSES = [("paid", 55), ("unpaid", 38), ("cancelled", 4), ("overdue", 3)]
+ROLES = ["pm", "team_member", "team_member", "stakeholder", "billing_contact"]
+# Pinned far in the future so the currency cache never expires mid-benchmark (no network calls).
+RATES_FETCHED_AT = "2100-01-01 00:00:00"
+USD_RATES = {"EUR": 0.92, "GBP": 0.79, "IDR": 16250.0, "SGD": 1.35, "JPY": 157.0, "AUD": 1.51}
+
+
+@dataclass(frozen=True)
+class Preset:
+    users: int
+    contacts: int       # per user
+    projects: int       # per user
+    invoices: int       # per user
+    logs: int           # per user
+    milestones_per_project: int = 4
+    team_per_project: int = 3
+    line_items_per_invoice: int = 2
+
+
+PRESETS = {
+    "tiny": Preset(users=1, contacts=200, projects=50, invoices=500, logs=2_000),
+    "small": Preset(users=1, contacts=5_000, projects=1_000, invoices=20_000, logs=100_000),
+    "medium": Preset(users=1, contacts=20_000, projects=4_000, invoices=80_000, logs=400_000),
+    "production": Preset(users=1, contacts=50_000, projects=10_000, invoices=200_000, logs=1_000_000),
+}
+
+
+def _weighted(rnd: random.Random, choices: list[tuple[str, int]]) -> str:
+    return rnd.choices([c for c, _ in choices], weights=[w for _, w in choices])[0]
+
+
+def _ts(moment: datetime) -> str:
+    # Same text format SQLite's CURRENT_TIMESTAMP default produces.
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _spread(start: datetime, end: datetime, count: int, rnd: random.Random) -> list[datetime]:
+    """``count`` ascending timestamps between start and end, so created_at grows with id."""
+    span = (end - start).total_seconds()
+    return [start + timedelta(seconds=s) for s in sorted(rnd.uniform(0, span) for _ in range(count))]
+
+
+def _insert(conn, sql: str, rows) -> int:
+    batch, total = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.exec_driver_sql(sql, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.exec_driver_sql(sql, batch)
+        total += len(batch)
+    return total
+
+
+def generate(engine, preset: Preset, seed: int = DEFAULT_SEED, anchor: date = DEFAULT_ANCHOR, log=print) -> dict:
+    """Populate an empty database. Returns a manifest with the generated users and counts."""
+    import bcrypt
+
+    from nexaflow_crm import fulltext
+    from nexaflow_crm.database import Base
+    from nexaflow_crm.tag_service import parse_tags
+
+    rnd = random.Random(seed)
+    end = datetime.combine(anchor, datetime.min.time()) + timedelta(hours=18)
+    start = end - timedelta(days=3 * 365)
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(4)).decode()
+
+    Base.metadata.create_all(bind=engine)
+    counts: dict[str, int] = {}
+    users = []
+    started = time.perf_counter()
+
+    def add(table: str, n: int):
+        counts[table] = counts.get(table, 0) + n
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        conn.exec_driver_sql(
+            "INSERT INTO exchange_rate_cache (base_currency, rates_json, fetched_at) VALUES (?, ?, ?)",
+            ("USD", json.dumps(USD_RATES), RATES_FETCHED_AT),
+        )
+        for code, rate in USD_RATES.items():
+            inverse = {"USD": 1 / rate, **{other: r / rate for other, r in USD_RATES.items() if other != code}}
+            conn.exec_driver_sql(
+                "INSERT INTO exchange_rate_cache (base_currency, rates_json, fetched_at) VALUES (?, ?, ?)",
+                (code, json.dumps(inverse), RATES_FETCHED_AT),
+            )
+
+        contact_id = project_id = invoice_id = tag_id = 0
+        for u in range(1, preset.users + 1):
+            email = f"user{u}@bench.local"
+            conn.exec_driver_sql(
+                "INSERT INTO users (id, email, name, hashed_password, preferred_currency, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (u, email, f"Bench User {u}", password_hash, "USD", _ts(start)),
+            )
+            users.append({"id": u, "email": email, "password": PASSWORD})
+            add("users", 1)
+
+            # Tags
+            tag_ids = {}
+            for name in TAG_POOL:
+                tag_id += 1
+                tag_ids[name] = tag_id
+            add("tags", _insert(conn, "INSERT INTO tags (id, user_id, name) VALUES (?, ?, ?)",
+                                ((tid, u, name) for name, tid in tag_ids.items())))
+
+            # Contacts
+            first_contact = contact_id + 1
+            contact_rows, contact_tag_rows = [], []
+            for moment in _spread(start, end, preset.contacts, rnd):
+                contact_id += 1
+                first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+                company = f"{rnd.choice(COMPANY_WORDS)} {rnd.choice(COMPANY_WORDS)}"
+                tags = ",".join(rnd.sample(TAG_POOL, rnd.choice([0, 1, 1, 2, 2, 3])))
+                notes = rnd.choice(["", "", "Prefers WhatsApp.", "Net 30 terms.", f"Referred by {rnd.choice(FIRST_NAMES)}."])
+                contact_rows.append((
+                    contact_id, u, f"{first} {last}", f"{first.lower()}.{last.lower()}{contact_id}@example.com",
+                    f"+62 8{rnd.randint(10, 99)} {rnd.randint(1000, 9999)} {rnd.randint(1000, 9999)}",
+                    company, tags, notes, _ts(moment),
+                ))
+                contact_tag_rows.extend((tag_ids[name], contact_id) for name in parse_tags(tags))
+            add("contacts", _insert(
+                conn,
+                "INSERT INTO contacts (id, user_id, name, email, phone, company, tags, notes, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                contact_rows,
+            ))
+            add("contact_tags", _insert(conn, "INSERT INTO contact_tags (tag_id, contact_id) VALUES (?, ?)", contact_tag_rows))
+            last_contact = contact_id
+
+            # Projects, team, milestones
+            projects = []
+            project_rows, team_rows, milestone_rows = [], [], []
+            for moment in _spread(start, end - timedelta(days=30), preset.projects, rnd):
+                project_id += 1
+                currency = _weighted(rnd, CURRENCIES)
+                value = round(rnd.uniform(500, 50_000), 2)
+                budget = round(value * rnd.uniform(0.5, 0.9), 2)
+                cost = round(budget * rnd.uniform(0.2, 1.3), 2)
+                client = rnd.randint(first_contact, last_contact)
+                begin = moment.date()
+                finish = begin + timedelta(days=rnd.randint(14, 240))
+                project_rows.append((
+                    project_id, u, client, f"{rnd.choice(PROJECT_KINDS)} #{project_id}", "Scope, timeline and deliverables.",
+                    _weighted(rnd, PROJECT_STATUSES), value, budget, cost, currency, begin.isoformat(), finish.isoformat(), _ts(moment),
+                ))
+                projects.append((project_id, client, currency, moment))
+                members = rnd.sample(range(first_contact, last_contact + 1), min(preset.team_per_project, last_contact - first_contact + 1))
+                for n, member in enumerate(members):
+                    team_rows.append((project_id, member, ROLES[0] if n == 0 else rnd.choice(ROLES[1:]), _ts(moment)))
+                for n in range(preset.milestones_per_project):
+                    due = begin + timedelta(days=(finish - begin).days * (n + 1) // preset.milestones_per_project)
+                    done = _ts(datetime.combine(due, datetime.min.time())) if due < anchor and rnd.random() < 0.8 else None
+                    milestone_rows.append((project_id, f"Milestone {n + 1}", "", due.isoformat(), done, _ts(moment)))
+            add("projects", _insert(
+                conn,
+                "INSERT INTO projects (id, user_id, contact_id, title, description, status, value, budget, actual_cost, "
+                "currency, start_date, end_date, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                project_rows,
+            ))
+            add("project_contacts", _insert(
+                conn, "INSERT INTO project_contacts (project_id, contact_id, role, created_at) VALUES (?, ?, ?, ?)", team_rows,
+            ))
+            add("milestones", _insert(
+                conn,
+                "INSERT INTO milestones (project_id, title, description, due_date, completed_at, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                milestone_rows,
+            ))
+
+            # Invoices and line items
+            invoice_rows, line_rows = [], []
+            for moment in _spread(start, end, preset.invoices, rnd):
+                invoice_id += 1
+                pid, _client, currency, _ = projects[rnd.randrange(len(projects))]
+                items = [(rnd.randint(1, 40), round(rnd.uniform(25, 400), 2)) for _ in range(preset.line_items_per_invoice)]
+                amount = round(sum(q * p for q, p in items), 2)
+                due = (moment + timedelta(days=30)).date().isoformat()
+                invoice_rows.append((
+                    invoice_id, pid, amount, _weighted(rnd, INVOICE_STATUSES), due, currency, f"INV-{invoice_id:06d}",
+                    f"Invoice for project {pid}", "", "", _ts(moment),
+                ))
+                line_rows.extend((invoice_id, f"Work item {n + 1}", q, p, round(q * p, 2)) for n, (q, p) in enumerate(items))
+            add("invoices", _insert(
+                conn,
+                "INSERT INTO invoices (id, project_id, amount, status, due_date, currency, invoice_number, title, notes, "
+                "sent_to_email, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                invoice_rows,
+            ))
+            add("invoice_line_items", _insert(
+                conn,
+                "INSERT INTO invoice_line_items (invoice_id, description, quantity, unit_price, total) VALUES (?, ?, ?, ?, ?)",
+                line_rows,
+            ))
+            first_invoice = invoice_id - preset.invoices + 1
+
+            # Communication log
+            def log_rows():
+                for moment in _spread(start, end, preset.logs, rnd):
+                    pid, client, _currency, _ = projects[rnd.randrange(len(projects))]
+                    kind = rnd.choice(LOG_TYPES)
+                    inv = rnd.randint(first_invoice, invoice_id) if kind in ("invoice_sent", "payment_received") else None
+                    yield (u, client, pid, inv, kind, f"{kind.replace('_', ' ').capitalize()} regarding project {pid}", _ts(moment))
+
+            add("communication_logs", _insert(
+                conn,
+                "INSERT INTO communication_logs (user_id, contact_id, project_id, invoice_id, type, summary, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                log_rows(),
+            ))
+            log(f"  user {u}: {counts}")
+
+        if engine.dialect.name == "sqlite":
+            fulltext.setup_contact_search(conn)
+        conn.exec_driver_sql("ANALYZE")
+
+    if engine.dialect.name == "sqlite":
+        # Fold the WAL into the main file so the database can be copied as a single file.
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    engine.dispose()
+
+    return {
+        "seed": seed,
+        "anchor": anchor.isoformat(),
+        "preset": asdict(preset),
+        "users": users,
+        "counts": counts,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+
+def manifest_path(db_path: str) -> str:
+    return db_path + ".manifest.json"
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Generate a deterministic NexaFlow CRM benchmark database.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="tiny")
+    parser.add_argument("--db", required=True, help="SQLite file to create (must not exist)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--anchor", type=date.fromisoformat, default=DEFAULT_ANCHOR, help="'today' for generated dates")
+    parser.add_argument("--users", type=int, help="Override the preset's user count (volumes are per user)")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.db):
+        parser.error(f"{args.db} already exists")
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from nexaflow_crm.database import engine
+
+    print(f"Generating preset '{args.preset}' into {args.db}")
+    preset = PRESETS[args.preset]
+    if args.users:
+        preset = replace(preset, users=args.users)
+    manifest = generate(engine, preset, args.seed, args.anchor)
+    manifest["preset_name"] = args.preset
+    with open(manifest_path(args.db), "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    print(f"Done in {manifest['seconds']}s: {manifest['counts']}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,509 @@
+"""
+Load-test harness for NexaFlow CRM.
+
+Starts the app under uvicorn against a copy of a generated database (see
+``benchmarks.datagen``) with a local SMTP sink standing in for the mail
+provider, then drives it with virtual users running a realistic session mix:
+
+    login, dashboard, contact search-as-you-type, invoice wizard
+    (project -> invoice -> line items -> preview -> send), PDF download,
+    tracking-pixel hits from recipients' mail clients
+
+Concurrency ramps through ``--steps``; each step reports throughput, latency
+percentiles and error rate overall and per request type, and the summary
+points at the knee of the curve (where throughput stops scaling while p95
+keeps climbing).
+
+Usage:
+    uv run python -m benchmarks.loadtest --steps 1,2,4,8,16,32 --step-seconds 20
+    uv run python -m benchmarks.loadtest --url http://127.0.0.1:6001 --db bench.db  # already running server
+"""
+import argparse
+import asyncio
+import datetime as dt
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+
+import httpx
+
+DEFAULT_STEPS = "1,2,4,8,16,32"
+SEARCH_KEYSTROKE_MS = 120
+
+# Weights of what a logged-in user does next.
+SESSION_MIX = [
+    ("dashboard", 20),
+    ("contact_search", 30),
+    ("invoice_wizard", 8),
+    ("pdf_download", 10),
+    ("browse_invoices", 12),
+    ("pixel_hit", 20),
+]
+
+
+# --- SMTP stand-in ---
+
+class SmtpSink:
+    """Minimal SMTP server (EHLO, STARTTLS, AUTH, MAIL/RCPT/DATA) that accepts and drops mail.
+
+    ``send_invoice`` always negotiates STARTTLS, so the sink serves a throwaway self-signed
+    certificate. ``latency_ms`` is added to DATA to mimic a real provider.
+    """
+
+    def __init__(self, latency_ms: float = 50.0):
+        self.latency = latency_ms / 1000
+        self.port = _free_port()
+        self.messages = 0
+        self._workdir = tempfile.mkdtemp(prefix="nexaflow-smtp-")
+        self._tls = self._tls_context()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._ready = threading.Event()
+
+    def _tls_context(self) -> ssl.SSLContext:
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.x509.oid import NameOID
+
+        key = ec.generate_private_key(ec.SECP256R1())
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+        now = dt.datetime.now(dt.timezone.utc)
+        cert = (
+            x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number()).not_valid_before(now).not_valid_after(now + dt.timedelta(days=1))
+            .sign(key, hashes.SHA256())
+        )
+        cert_path, key_path = os.path.join(self._workdir, "cert.pem"), os.path.join(self._workdir, "key.pem")
+        with open(cert_path, "wb") as fh:
+            fh.write(cert.public_bytes(serialization.Encoding.PEM))
+        with open(key_path, "wb") as fh:
+            fh.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert_path, key_path)
+        return context
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def reply(line: str):
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        await reply("220 localhost NexaFlow SMTP sink")
+        try:
+            while line := await reader.readline():
+                command = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+                if command in ("EHLO", "HELO"):
+                    await reply("250-localhost\r\n250-STARTTLS\r\n250 AUTH PLAIN LOGIN")
+                elif command == "STARTTLS":
+                    await reply("220 Ready to start TLS")
+                    await writer.start_tls(self._tls)
+                elif command == "AUTH":
+                    await reply("235 Authentication successful")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b""):
+                        pass
+                    await asyncio.sleep(self.latency)
+                    self.messages += 1
+                    await reply("250 Queued")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:  # MAIL, RCPT, RSET, NOOP
+                    await reply("250 OK")
+        except (ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        server = self._loop.run_until_complete(asyncio.start_server(self._session, "127.0.0.1", self.port))
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            server.close()
+
+    def start(self):
+        threading.Thread(target=self._serve, name="smtp-sink", daemon=True).start()
+        self._ready.wait(5)
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        shutil.rmtree(self._workdir, ignore_errors=True)
+
+
+# --- Recording ---
+
+@dataclass
+class Recorder:
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+    error_samples: list[str] = field(default_factory=list)
+    recording: bool = True
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            resp, problem = None, f"{name}: {type(exc).__name__}"
+        else:
+            problem = f"{name}: HTTP {resp.status_code}" if resp.status_code >= 400 else None
+        if self.recording:
+            self.latencies.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+            if problem:
+                self.errors[name] = self.errors.get(name, 0) + 1
+                if len(self.error_samples) < 20:
+                    self.error_samples.append(problem)
+        return resp if problem is None else None
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _summarize(latencies: list[float], errors: int, seconds: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / seconds, 2),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+    }
+
+
+# --- Virtual users ---
+
+@dataclass
+class Account:
+    email: str
+    password: str
+    search_terms: list[str]
+    tracking_tokens: list[str]
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, account: Account, recorder: Recorder, rnd: random.Random,
+                 think_ms: float, session_length: int):
+        self.client = client
+        self.account = account
+        self.recorder = recorder
+        self.rnd = rnd
+        self.think = think_ms / 1000
+        self.session_length = session_length
+        self.headers: dict = {}
+
+    async def think_time(self, scale: float = 1.0):
+        if self.think:
+            await asyncio.sleep(self.rnd.expovariate(1 / (self.think * scale)))
+
+    async def get(self, name: str, url: str, **kwargs):
+        return await self.recorder.call(self.client, name, "GET", url, headers=self.headers, **kwargs)
+
+    async def post(self, name: str, url: str, **kwargs):
+        return await self.recorder.call(self.client, name, "POST", url, headers=self.headers, **kwargs)
+
+    async def login(self) -> bool:
+        resp = await self.recorder.call(
+            self.client, "login", "POST", "/api/auth/login",
+            json={"email": self.account.email, "password": self.account.password},
+        )
+        if resp is None:
+            return False
+        self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        return True
+
+    async def dashboard(self):
+        await self.get("dashboard", "/api/dashboard")
+
+    async def contact_search(self):
+        term = self.rnd.choice(self.account.search_terms)
+        for length in range(1, len(term) + 1):
+            await self.get("contact_search", "/api/contacts", params={"search": term[:length], "page_size": 20})
+            await asyncio.sleep(self.rnd.uniform(0.5, 1.5) * SEARCH_KEYSTROKE_MS / 1000)
+        resp = await self.get("contact_search", "/api/contacts", params={"search": term, "page_size": 20})
+        if resp is not None and resp.json():
+            await self.get("contact_open", f"/api/contacts/{resp.json()[0]['id']}")
+
+    async def invoice_wizard(self):
+        projects = await self.get("wizard_projects", "/api/projects", params={"status": "active", "page_size": 20})
+        if projects is None or not projects.json():
+            return
+        project = self.rnd.choice(projects.json())
+        await self.think_time()
+        invoice = await self.post("wizard_create", "/api/invoices", json={
+            "project_id": project["id"], "amount": self.rnd.choice([500, 1200, 2500]), "currency": project.get("currency") or "USD",
+            "title": "Monthly retainer", "due_date": "2026-12-31",
+        })
+        if invoice is None:
+            return
+        invoice_id = invoice.json()["id"]
+        for n in range(self.rnd.randint(1, 4)):
+            await self.think_time(0.5)
+            await self.post("wizard_line_item", f"/api/invoices/{invoice_id}/line-items", json={
+                "description": f"Work item {n + 1}", "quantity": self.rnd.randint(1, 20), "unit_price": self.rnd.choice([50, 75, 120]),
+            })
+        await self.get("wizard_preview", f"/api/invoices/{invoice_id}/preview")
+        await self.think_time()
+        await self.post("wizard_send", f"/api/invoices/{invoice_id}/send",
+                        params={"to_email": "client@example.com", "mode": "email_and_pdf"})
+
+    async def pdf_download(self):
+        invoices = await self.get("invoice_list", "/api/invoices", params={"page_size": 20})
+        if invoices is not None and invoices.json():
+            await self.think_time(0.5)
+            await self.get("pdf_download", f"/api/invoices/{self.rnd.choice(invoices.json())['id']}/pdf")
+
+    async def browse_invoices(self):
+        resp = await self.get("invoice_list", "/api/invoices", params={"page_size": 50, "status": self.rnd.choice(["unpaid", "paid"])})
+        cursor = resp.headers.get("x-next-cursor") if resp is not None else None
+        if cursor:
+            await self.think_time(0.5)
+            await self.get("invoice_list", "/api/invoices", params={"page_size": 50, "cursor": cursor})
+
+    async def pixel_hit(self):
+        # A recipient's mail client, not the logged-in user: no auth header.
+        token = self.rnd.choice(self.account.tracking_tokens)
+        await self.recorder.call(self.client, "pixel_hit", "GET", f"/api/track/open/{token}")
+
+    async def run(self, stop: asyncio.Event):
+        names = [name for name, _ in SESSION_MIX]
+        weights = [weight for _, weight in SESSION_MIX]
+        while not stop.is_set():
+            if not await self.login():
+                await asyncio.sleep(1)
+                continue
+            for _ in range(self.session_length):
+                if stop.is_set():
+                    return
+                await getattr(self, self.rnd.choices(names, weights)[0])()
+                await self.think_time()
+
+
+# --- Orchestration ---
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def load_accounts(db_path: str, manifest: dict, rnd: random.Random) -> list[Account]:
+    """Search terms from each user's real contact names, and tracking tokens planted on their invoices."""
+    accounts = []
+    with sqlite3.connect(db_path) as conn:
+        for user in manifest["users"]:
+            names = [row[0] for row in conn.execute(
+                "SELECT name FROM contacts WHERE user_id = ? ORDER BY random() LIMIT 50", (user["id"],)
+            )]
+            terms = sorted({name.split()[0][:6].lower() for name in names if name}) or ["a"]
+            invoice_ids = [row[0] for row in conn.execute(
+                "SELECT i.id FROM invoices i JOIN projects p ON p.id = i.project_id WHERE p.user_id = ? "
+                "ORDER BY random() LIMIT 200", (user["id"],)
+            )]
+            tokens = [f"load-{user['id']}-{invoice_id}" for invoice_id in invoice_ids]
+            conn.executemany("UPDATE invoices SET tracking_token = ?, opened_at = NULL WHERE id = ?",
+                             list(zip(tokens, invoice_ids)))
+            accounts.append(Account(user["email"], user["password"], terms, tokens or ["missing"]))
+    rnd.shuffle(accounts)
+    return accounts
+
+
+def start_server(db_path: str, smtp: SmtpSink, workers: int, port: int, env_overrides: list[str]) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "SECRET_KEY": "loadtest-secret-key",
+        "ENV": "production",
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(smtp.port),
+        "SMTP_USER": "loadtest",
+        "SMTP_PASSWORD": "loadtest",
+        "BASE_URL": f"http://127.0.0.1:{port}",
+        # Every virtual user shares 127.0.0.1; measure the app, not the per-client limits.
+        "RATE_LIMIT_ENABLED": "false",
+    })
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    for item in env_overrides:
+        key, _, value = item.partition("=")
+        env[key] = value
+    cmd = [sys.executable, "-m", "uvicorn", "nexaflow_crm.main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(cmd, env=env)
+
+
+async def wait_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/api/currencies/supported")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.25)
+    raise RuntimeError(f"server at {url} did not come up within {timeout:.0f}s")
+
+
+async def run_step(url: str, accounts: list[Account], concurrency: int, seconds: float, warmup: float,
+                   think_ms: float, session_length: int, seed: int) -> dict:
+    recorder = Recorder(recording=False)
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        users = [
+            VirtualUser(client, accounts[i % len(accounts)], recorder, random.Random(seed * 1000 + i), think_ms, session_length)
+            for i in range(concurrency)
+        ]
+        tasks = [asyncio.create_task(user.run(stop)) for user in users]
+        await asyncio.sleep(warmup)
+        recorder.recording = True
+        started = time.perf_counter()
+        await asyncio.sleep(seconds)
+        recorder.recording = False
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    everything = [ms for values in recorder.latencies.values() for ms in values]
+    step = {"concurrency": concurrency, **_summarize(everything, sum(recorder.errors.values()), elapsed)}
+    step["by_request"] = {
+        name: _summarize(values, recorder.errors.get(name, 0), elapsed)
+        for name, values in sorted(recorder.latencies.items())
+    }
+    step["error_samples"] = recorder.error_samples
+    return step
+
+
+def find_knee(steps: list[dict], min_gain: float = 0.1) -> dict | None:
+    """First step whose throughput grew less than ``min_gain`` while p95 rose — the previous step is the knee."""
+    for previous, current in zip(steps, steps[1:]):
+        gain = (current["rps"] - previous["rps"]) / previous["rps"] if previous["rps"] else 0.0
+        if gain < min_gain and current["p95_ms"] > previous["p95_ms"]:
+            return previous
+    return None
+
+
+def print_step(step: dict):
+    print(f"\nconcurrency {step['concurrency']:>3}: {step['rps']:8.1f} req/s  p50 {step['p50_ms']:8.1f}  "
+          f"p95 {step['p95_ms']:8.1f}  p99 {step['p99_ms']:8.1f} ms  errors {step['error_rate']:.2%}")
+    for name, row in step["by_request"].items():
+        print(f"    {name:<18} {row['requests']:>6} req  {row['rps']:7.1f}/s  p50 {row['p50_ms']:8.1f}  "
+              f"p95 {row['p95_ms']:8.1f}  p99 {row['p99_ms']:8.1f} ms  errors {row['error_rate']:.2%}")
+    for sample in step["error_samples"][:5]:
+        print(f"    ! {sample}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    from benchmarks.datagen import DEFAULT_SEED, manifest_path
+
+    parser = argparse.ArgumentParser(description="Ramp realistic CRM sessions against a local NexaFlow CRM server.")
+    parser.add_argument("--db", help="Generated database (created from --preset/--users if missing)")
+    parser.add_argument("--preset", default="tiny")
+    parser.add_argument("--users", type=int, default=20, help="Accounts to generate when creating the database")
+    parser.add_argument("--url", help="Target an already running server instead of starting one (its database must be --db)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started server")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra server environment")
+    parser.add_argument("--steps", default=DEFAULT_STEPS, help="Comma-separated concurrency levels")
+    parser.add_argument("--step-seconds", type=float, default=20.0)
+    parser.add_argument("--warmup-seconds", type=float, default=3.0)
+    parser.add_argument("--think-ms", type=float, default=300.0, help="Mean pause between user actions (0 for closed loop)")
+    parser.add_argument("--session-length", type=int, default=20, help="Actions per login")
+    parser.add_argument("--smtp-latency-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--out", help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="nexaflow-load-")
+    source = args.db or os.path.join(workdir, f"{args.preset}.db")
+    if not os.path.exists(source):
+        from benchmarks import datagen
+
+        datagen.main(["--preset", args.preset, "--db", source, "--seed", str(args.seed), "--users", str(args.users)])
+    with open(manifest_path(source)) as fh:
+        manifest = json.load(fh)
+
+    smtp = None
+    server = None
+    if args.url:
+        url, db_path = args.url.rstrip("/"), source
+    else:
+        db_path = os.path.join(workdir, "run.db")
+        shutil.copyfile(source, db_path)
+        smtp = SmtpSink(args.smtp_latency_ms)
+        smtp.start()
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = start_server(db_path, smtp, args.workers, port, args.env)
+
+    rnd = random.Random(args.seed)
+    accounts = load_accounts(db_path, manifest, rnd)
+    steps = []
+    try:
+        asyncio.run(wait_ready(url))
+        print(f"Target {url}  accounts {len(accounts)}  counts {manifest['counts']}")
+        for concurrency in (int(level) for level in args.steps.split(",")):
+            step = asyncio.run(run_step(url, accounts, concurrency, args.step_seconds, args.warmup_seconds,
+                                        args.think_ms, args.session_length, args.seed))
+            steps.append(step)
+            print_step(step)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+        if smtp is not None:
+            print(f"\nSMTP sink accepted {smtp.messages} messages")
+            smtp.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'users':>6} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>8}")
+    for step in steps:
+        print(f"{step['concurrency']:>6} {step['rps']:>9.1f} {step['p50_ms']:>9.1f} {step['p95_ms']:>9.1f} "
+              f"{step['p99_ms']:>9.1f} {step['error_rate']:>8.2%}")
+    knee = find_knee(steps)
+    if knee:
+        print(f"\nKnee at ~{knee['concurrency']} concurrent users ({knee['rps']:.1f} req/s, p95 {knee['p95_ms']:.1f} ms): "
+              "more users add latency, not throughput.")
+    else:
+        print("\nNo knee within the tested range; extend --steps.")
+
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump({
+                "meta": {"url": url, "workers": args.workers, "think_ms": args.think_ms, "step_seconds": args.step_seconds,
+                         "preset": manifest.get("preset_name"), "counts": manifest["counts"],
+                         "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")},
+                "steps": steps,
+                "knee": knee["concurrency"] if knee else None,
+            }, fh, indent=2)
+        print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+"""
+Endpoint benchmark suite for NexaFlow CRM.
+
+Runs every router endpoint through an in-process ASGI client against a
+generated database (see ``benchmarks.datagen``) and reports p50/p95/p99
+latency and SQL statements per request. Results are written as JSON so a
+run can be compared against a baseline from another commit.
+
+Usage:
+    uv run python -m benchmarks.suite --preset small --out bench_output.json
+    uv run python -m benchmarks.suite --preset small --compare baseline.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+DEFAULT_REPEAT = 30
+WARMUP = 2
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str  # formatted with the context ids plus whatever ``prepare`` returns
+    params: dict | None = None
+    json: dict | None = None
+    content: bytes | None = None  # raw body, sent with ``content_type``
+    content_type: str | None = None
+    prepare: Callable[["Context"], Awaitable[dict]] | None = None  # untimed, runs before every request
+    repeat: int | None = None
+
+
+@dataclass
+class Context:
+    client: object
+    headers: dict
+    ids: dict = field(default_factory=dict)
+    counter: int = 0
+
+    def unique(self) -> int:
+        self.counter += 1
+        return self.counter
+
+    async def request(self, method: str, path: str, headers: dict | None = None, **kwargs):
+        return await self.client.request(method, path, headers={**self.headers, **(headers or {})}, **kwargs)
+
+    async def create(self, path: str, payload: dict) -> dict:
+        resp = await self.request("POST", path.format(**self.ids), json=payload)
+        resp.raise_for_status()
+        return resp.json()
+
+
+async def _new_contact(ctx: Context) -> dict:
+    return {"target_id": (await ctx.create("/api/contacts", {"name": f"Bench temp {ctx.unique()}"}))["id"]}
+
+
+async def _new_project(ctx: Context) -> dict:
+    return {"target_id": (await ctx.create("/api/projects", {"title": f"Bench temp {ctx.unique()}"}))["id"]}
+
+
+async def _new_invoice(ctx: Context) -> dict:
+    return {"target_id": (await ctx.create("/api/invoices", {"project_id": ctx.ids["project_id"], "amount": 100}))["id"]}
+
+
+async def _new_milestone(ctx: Context) -> dict:
+    return {"target_id": (await ctx.create("/api/projects/{project_id}/milestones", {"title": f"Temp {ctx.unique()}"}))["id"]}
+
+
+async def _new_line_item(ctx: Context) -> dict:
+    item = await ctx.create("/api/invoices/{invoice_id}/line-items", {"description": "Temp", "quantity": 1, "unit_price": 10})
+    return {"target_id": item["id"]}
+
+
+async def _new_assignment(ctx: Context) -> dict:
+    contact = await ctx.create("/api/contacts", {"name": f"Bench member {ctx.unique()}"})
+    await ctx.create("/api/projects/{project_id}/contacts", {"contact_id": contact["id"]})
+    return {"target_id": contact["id"]}
+
+
+async def _new_recurring(ctx: Context) -> dict:
+    template = await ctx.create("/api/recurring-invoices", {
+        "project_id": ctx.ids["project_id"], "title": "Bench retainer", "start_date": "2030-01-01", "amount": 500,
+    })
+    return {"target_id": template["id"]}
+
+
+async def _fresh_email(ctx: Context) -> dict:
+    return {"email": f"bench-register-{ctx.unique()}-{time.time_ns()}@example.com"}
+
+
+async def _register(ctx: Context) -> dict:
+    return {"json": {"email": (await _fresh_email(ctx))["email"], "name": "Bench", "password": "bench-password"}}
+
+
+# 200 contacts; the suite repeats the upload, so after the first run the rows are skipped as duplicates.
+IMPORT_CSV = ("name,email,company,tags\n" + "".join(
+    f"Imported {n},bench-import-{n}@example.com,Bench Co,lead\n" for n in range(200)
+)).encode()
+
+
+def _batch(op: str, data: dict, count: int = 50, target: str | None = None) -> dict:
+    operation = {"op": op, "data": data}
+    if target:
+        operation["id"] = target
+    return {"operations": [operation] * count}
+
+
+def scenarios() -> list[Scenario]:
+    return [
+        # Auth
+        Scenario("auth.register", "POST", "/api/auth/register", prepare=_register, repeat=10),
+        Scenario("auth.login", "POST", "/api/auth/login", json={"email": "{email}", "password": "bench-password"}),
+        Scenario("auth.me", "GET", "/api/auth/me"),
+        Scenario("auth.update_me", "PUT", "/api/auth/me", json={"preferred_currency": "USD"}),
+        # Dashboard
+        Scenario("dashboard", "GET", "/api/dashboard", repeat=5),
+        # Contacts
+        Scenario("contacts.list", "GET", "/api/contacts", params={"page_size": 100}),
+        Scenario("contacts.list_deep_page", "GET", "/api/contacts", params={"page_size": 100, "page": "{deep_page}"}),
+        Scenario("contacts.list_deep_cursor", "GET", "/api/contacts", params={"page_size": 100, "cursor": "{deep_contact_cursor}"}),
+        Scenario("contacts.search", "GET", "/api/contacts", params={"search": "ay", "page_size": 20}),
+        Scenario("contacts.search_multiword", "GET", "/api/contacts", params={"search": "dewi san", "page_size": 20}),
+        Scenario("contacts.tags_any", "GET", "/api/contacts", params={"tags": "vip,lead", "page_size": 100}),
+        Scenario("contacts.tags_all", "GET", "/api/contacts", params={"tags": "vip,lead", "tag_match": "all", "page_size": 100}),
+        Scenario("contacts.tag_counts", "GET", "/api/contacts/tags"),
+        Scenario("contacts.get", "GET", "/api/contacts/{contact_id}"),
+        Scenario("contacts.create", "POST", "/api/contacts", json={"name": "Bench create", "tags": "lead,vip"}),
+        Scenario("contacts.update", "PUT", "/api/contacts/{contact_id}", json={"notes": "Bench update"}),
+        Scenario("contacts.delete", "DELETE", "/api/contacts/{target_id}", prepare=_new_contact),
+        Scenario("contacts.history", "GET", "/api/contacts/{contact_id}/history", params={"page_size": 100}),
+        Scenario("contacts.history_export", "GET", "/api/contacts/{contact_id}/history/export", repeat=10),
+        Scenario("contacts.projects", "GET", "/api/contacts/{contact_id}/projects"),
+        Scenario("contacts.export_csv", "GET", "/api/contacts/export", params={"format": "csv"}, repeat=10),
+        Scenario("contacts.export_ndjson", "GET", "/api/contacts/export", params={"format": "ndjson"}, repeat=10),
+        Scenario("contacts.batch_create_50", "POST", "/api/contacts/batch", json=_batch("create", {"name": "Bench batch", "tags": "lead"}),
+                 repeat=10),
+        Scenario("contacts.import_200", "POST", "/api/contacts/import", params={"filename": "bench.csv", "background": "false"},
+                 content=IMPORT_CSV, content_type="text/csv", repeat=10),
+        Scenario("contacts.import_list", "GET", "/api/contacts/import"),
+        # Projects
+        Scenario("projects.list", "GET", "/api/projects", params={"page_size": 100}),
+        Scenario("projects.list_status", "GET", "/api/projects", params={"status": "active", "page_size": 100}),
+        Scenario("projects.get", "GET", "/api/projects/{project_id}"),
+        Scenario("projects.summary", "GET", "/api/projects/{project_id}/summary"),
+        Scenario("projects.summaries_50", "GET", "/api/projects/summaries", params={"ids": "{board_ids}"}),
+        Scenario("projects.teams_50", "GET", "/api/projects/teams", params={"ids": "{board_ids}"}),
+        Scenario("projects.create", "POST", "/api/projects", json={"title": "Bench create", "value": 1000}),
+        Scenario("projects.update", "PUT", "/api/projects/{project_id}", json={"description": "Bench update"}),
+        Scenario("projects.delete", "DELETE", "/api/projects/{target_id}", prepare=_new_project),
+        Scenario("projects.history", "GET", "/api/projects/{project_id}/history", params={"page_size": 100}),
+        Scenario("projects.history_export", "GET", "/api/projects/{project_id}/history/export", repeat=10),
+        Scenario("projects.export_csv", "GET", "/api/projects/export", params={"format": "csv"}, repeat=10),
+        Scenario("projects.export_ndjson", "GET", "/api/projects/export", params={"format": "ndjson"}, repeat=10),
+        Scenario("projects.batch_update_50", "POST", "/api/projects/batch",
+                 json=_batch("update", {"description": "Bench batch"}, target="{project_id}"), repeat=10),
+        # Team
+        Scenario("team.list", "GET", "/api/projects/{project_id}/contacts"),
+        Scenario("team.assign", "POST", "/api/projects/{target_id}/contacts", json={"contact_id": "{contact_id}"}, prepare=_new_project),
+        Scenario("team.update", "PUT", "/api/projects/{project_id}/contacts/{target_id}", json={"role": "stakeholder"},
+                 prepare=_new_assignment),
+        Scenario("team.remove", "DELETE", "/api/projects/{project_id}/contacts/{target_id}", prepare=_new_assignment),
+        # Milestones
+        Scenario("milestones.list", "GET", "/api/projects/{project_id}/milestones"),
+        Scenario("milestones.create", "POST", "/api/projects/{project_id}/milestones", json={"title": "Bench", "due_date": "2026-12-31"}),
+        Scenario("milestones.update", "PUT", "/api/projects/{project_id}/milestones/{milestone_id}", json={"description": "Bench"}),
+        Scenario("milestones.complete", "PATCH", "/api/projects/{project_id}/milestones/{milestone_id}/complete"),
+        Scenario("milestones.delete", "DELETE", "/api/projects/{project_id}/milestones/{target_id}", prepare=_new_milestone),
+        # Invoices
+        Scenario("invoices.list", "GET", "/api/invoices", params={"page_size": 100}),
+        Scenario("invoices.list_status", "GET", "/api/invoices", params={"status": "unpaid", "page_size": 100}),
+        Scenario("invoices.list_deep_page", "GET", "/api/invoices", params={"page_size": 100, "page": "{deep_page}"}),
+        Scenario("invoices.get", "GET", "/api/invoices/{invoice_id}"),
+        Scenario("invoices.create", "POST", "/api/invoices", json={"project_id": "{project_id}", "amount": 250}),
+        Scenario("invoices.update", "PUT", "/api/invoices/{invoice_id}", json={"notes": "Bench update"}),
+        Scenario("invoices.delete", "DELETE", "/api/invoices/{target_id}", prepare=_new_invoice),
+        Scenario("invoices.preview", "GET", "/api/invoices/{invoice_id}/preview"),
+        Scenario("invoices.pdf", "GET", "/api/invoices/{invoice_id}/pdf", repeat=5),
+        Scenario("invoices.send_pdf_only", "POST", "/api/invoices/{invoice_id}/send",
+                 params={"to_email": "client@example.com", "mode": "pdf_only"}, repeat=5),
+        Scenario("invoices.track_open", "GET", "/api/track/open/{tracking_token}"),
+        Scenario("line_items.list", "GET", "/api/invoices/{invoice_id}/line-items"),
+        Scenario("line_items.add", "POST", "/api/invoices/{invoice_id}/line-items", json={"description": "Bench", "unit_price": 5}),
+        Scenario("line_items.delete", "DELETE", "/api/invoices/{invoice_id}/line-items/{target_id}", prepare=_new_line_item),
+        Scenario("invoices.export_csv", "GET", "/api/invoices/export", params={"format": "csv"}, repeat=10),
+        Scenario("invoices.export_ndjson", "GET", "/api/invoices/export", params={"format": "ndjson"}, repeat=10),
+        Scenario("invoices.batch_create_50", "POST", "/api/invoices/batch",
+                 json=_batch("create", {"project_id": "{project_id}", "amount": 100}), repeat=10),
+        # Recurring invoices
+        Scenario("recurring.list", "GET", "/api/recurring-invoices"),
+        Scenario("recurring.create", "POST", "/api/recurring-invoices",
+                 json={"project_id": "{project_id}", "title": "Bench", "start_date": "2030-01-01", "amount": 500}),
+        Scenario("recurring.get", "GET", "/api/recurring-invoices/{target_id}", prepare=_new_recurring),
+        Scenario("recurring.update", "PUT", "/api/recurring-invoices/{target_id}", json={"notes": "Bench update"},
+                 prepare=_new_recurring),
+        Scenario("recurring.delete", "DELETE", "/api/recurring-invoices/{target_id}", prepare=_new_recurring),
+        Scenario("recurring.run", "POST", "/api/recurring-invoices/run", repeat=10),
+        # Notifications
+        Scenario("notifications.list", "GET", "/api/notifications", params={"page_size": 50}),
+        # Currencies and log
+        Scenario("currencies.supported", "GET", "/api/currencies/supported"),
+        Scenario("currencies.rates", "GET", "/api/currencies/rates", params={"base": "USD"}),
+        Scenario("communication_log.create", "POST", "/api/communication-log",
+                 json={"project_id": "{project_id}", "contact_id": "{contact_id}", "type": "note", "summary": "Bench"}),
+    ]
+
+
+def _fill(value, variables: dict):
+    """Substitute ``{name}`` placeholders in nested params/json (dicts and lists), keeping ints as ints."""
+    if isinstance(value, dict):
+        return {k: _fill(v, variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, variables) for v in value]
+    if isinstance(value, str) and value.startswith("{") and value.endswith("}") and value[1:-1] in variables:
+        return variables[value[1:-1]]
+    if isinstance(value, str):
+        return value.format(**variables)
+    return value
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def pick_ids(engine, manifest: dict) -> dict:
+    """Representative (heaviest) rows for the first generated user."""
+    from sqlalchemy import text
+
+    from nexaflow_crm.pagination import encode_cursor
+
+    user_id = manifest["users"][0]["id"]
+    with engine.connect() as conn:
+        def scalar(sql, **params):
+            return conn.execute(text(sql), {"user_id": user_id, **params}).scalar()
+
+        project_id = scalar(
+            "SELECT p.id FROM projects p JOIN invoices i ON i.project_id = p.id WHERE p.user_id = :user_id "
+            "GROUP BY p.id ORDER BY count(*) DESC, p.id LIMIT 1"
+        )
+        contact_id = scalar(
+            "SELECT contact_id FROM communication_logs WHERE user_id = :user_id AND contact_id IS NOT NULL "
+            "GROUP BY contact_id ORDER BY count(*) DESC, contact_id LIMIT 1"
+        )
+        invoice_id = scalar("SELECT max(id) FROM invoices WHERE project_id = :project_id", project_id=project_id)
+        milestone_id = scalar("SELECT min(id) FROM milestones WHERE project_id = :project_id", project_id=project_id)
+        board = conn.execute(
+            text("SELECT id FROM projects WHERE user_id = :user_id ORDER BY created_at DESC, id DESC LIMIT 50"), {"user_id": user_id}
+        ).scalars().all()
+        contacts = scalar("SELECT count(*) FROM contacts WHERE user_id = :user_id")
+        deep_page = max(1, contacts // 100 // 2)
+        deep = conn.execute(
+            text("SELECT created_at, id FROM contacts WHERE user_id = :user_id ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET :skip"),
+            {"user_id": user_id, "skip": (deep_page - 1) * 100},
+        ).first()
+        conn.execute(text("UPDATE invoices SET tracking_token = 'bench-token' WHERE id = :id"), {"id": invoice_id})
+        conn.commit()
+
+    return {
+        "email": manifest["users"][0]["email"],
+        "project_id": project_id,
+        "contact_id": contact_id,
+        "invoice_id": invoice_id,
+        "milestone_id": milestone_id,
+        "board_ids": ",".join(str(i) for i in board),
+        "deep_page": deep_page,
+        "deep_contact_cursor": encode_cursor(deep[0], deep[1]) if deep else "",
+        "tracking_token": "bench-token",
+    }
+
+
+async def run_suite(engine, app, manifest: dict, repeat: int, only: list[str] | None = None, log=print) -> dict:
+    import httpx
+    from sqlalchemy import event
+
+    statements = [0]
+
+    def count_statement(*_args):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    ids = pick_ids(engine, manifest)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            login = await client.post("/api/auth/login", json={"email": ids["email"], "password": manifest["users"][0]["password"]})
+            login.raise_for_status()
+            ctx = Context(client=client, headers={"Authorization": f"Bearer {login.json()['access_token']}"}, ids=ids)
+
+            for scenario in scenarios():
+                if only and not any(scenario.name.startswith(prefix) for prefix in only):
+                    continue
+                runs = scenario.repeat or repeat
+                timings, queries, statuses = [], [], {}
+                for i in range(WARMUP + runs):
+                    variables = dict(ids)
+                    extra = await scenario.prepare(ctx) if scenario.prepare else {}
+                    body = extra.pop("json", None)
+                    variables.update(extra)
+                    kwargs = {"params": _fill(scenario.params, variables) if scenario.params else None}
+                    payload = body if body is not None else scenario.json
+                    if payload is not None:
+                        kwargs["json"] = _fill(payload, variables)
+                    elif scenario.content is not None:
+                        kwargs["content"] = scenario.content
+                        kwargs["headers"] = {"Content-Type": scenario.content_type}
+                    path = scenario.path.format(**variables)
+
+                    statements[0] = 0
+                    started = time.perf_counter()
+                    resp = await ctx.request(scenario.method, path, **kwargs)
+                    await resp.aread()
+                    elapsed = (time.perf_counter() - started) * 1000
+                    if i < WARMUP:
+                        continue
+                    timings.append(elapsed)
+                    queries.append(statements[0])
+                    statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+                results[scenario.name] = {
+                    "runs": runs,
+                    "p50_ms": round(_percentile(timings, 50), 3),
+                    "p95_ms": round(_percentile(timings, 95), 3),
+                    "p99_ms": round(_percentile(timings, 99), 3),
+                    "mean_ms": round(statistics.fmean(timings), 3),
+                    "queries": round(statistics.fmean(queries), 2),
+                    "statuses": {str(code): n for code, n in sorted(statuses.items())},
+                }
+                r = results[scenario.name]
+                flag = "" if all(200 <= code < 400 for code in statuses) else f"  statuses={r['statuses']}"
+                log(f"{scenario.name:<30} p50 {r['p50_ms']:9.2f}  p95 {r['p95_ms']:9.2f}  p99 {r['p99_ms']:9.2f} ms  "
+                    f"q {r['queries']:6.1f}{flag}")
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float = 1.0) -> list[str]:
+    """Lines describing regressions: p95 up by more than ``threshold`` (and ``min_delta_ms``), or more queries."""
+    regressions = []
+    print(f"\n{'scenario':<30} {'p95 base':>10} {'p95 now':>10} {'change':>8} {'queries':>13}")
+    for name, now in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:<30} {'-':>10} {now['p95_ms']:>10.2f} {'new':>8}")
+            continue
+        change = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        marker = ""
+        if change > threshold and now["p95_ms"] - base["p95_ms"] > min_delta_ms:
+            marker = "  <-- slower"
+            regressions.append(f"{name}: p95 {base['p95_ms']:.2f} -> {now['p95_ms']:.2f} ms ({change:+.0%})")
+        if now["queries"] > base["queries"]:
+            marker += "  <-- more queries"
+            regressions.append(f"{name}: queries {base['queries']} -> {now['queries']}")
+        print(f"{name:<30} {base['p95_ms']:>10.2f} {now['p95_ms']:>10.2f} {change:>+8.0%} "
+              f"{base['queries']:>6} -> {now['queries']:<6}{marker}")
+    return regressions
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv: list[str] | None = None):
+    from benchmarks.datagen import DEFAULT_SEED, PRESETS, manifest_path
+
+    parser = argparse.ArgumentParser(description="Run the NexaFlow CRM endpoint benchmark suite.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="tiny")
+    parser.add_argument("--db", help="Generated database to reuse (created with --preset if missing)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--only", nargs="*", help="Scenario name prefixes to run, e.g. contacts. dashboard")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative p95 increase")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="nexaflow-bench-")
+    source = args.db or os.path.join(workdir, f"{args.preset}.db")
+    if not os.path.exists(source):
+        from benchmarks import datagen
+
+        datagen.main(["--preset", args.preset, "--db", source, "--seed", str(args.seed)])
+    with open(manifest_path(source)) as fh:
+        manifest = json.load(fh)
+    # Mutating scenarios write to the database; run on a copy so the source stays pristine.
+    db_path = os.path.join(workdir, "run.db")
+    shutil.copyfile(source, db_path)
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")  # bench_login.py covers hashing cost
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    from nexaflow_crm.database import engine
+    from nexaflow_crm.main import app, on_startup
+
+    logging.getLogger("xhtml2pdf").setLevel(logging.ERROR)
+    on_startup()
+    results = asyncio.run(run_suite(engine, app, manifest, args.repeat, args.only))
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "preset": manifest.get("preset_name", args.preset),
+            "counts": manifest["counts"],
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nWrote {args.out}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = compare(report, json.load(fh), args.threshold)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
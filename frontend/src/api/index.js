@@ -12,7 +12,7 @@ export function clearToken() {
   localStorage.removeItem(TOKEN_KEY)
 }
 
-export async function api(path, opts = {}) {
+async function request(path, opts = {}) {
   const headers = { 'Content-Type': 'application/json', ...(opts.headers || {}) }
   const token = getToken()
   if (token) headers['Authorization'] = `Bearer ${token}`
@@ -25,10 +25,23 @@ export async function api(path, opts = {}) {
     return null
   }
 
-  if (res.status === 204) return null
   if (!res.ok) {
     const err = await res.json().catch(() => ({ detail: 'Request failed' }))
     throw new Error(err.detail || 'Request failed')
   }
+  return res
+}
+
+export async function api(path, opts = {}) {
+  const res = await request(path, opts)
+  if (!res || res.status === 204) return null
   return res.json()
 }
+
+// One page of a keyset-paginated list; pass nextCursor back in to fetch the following page.
+export async function apiPage(path, cursor = null) {
+  const url = cursor ? `${path}${path.includes('?') ? '&' : '?'}cursor=${encodeURIComponent(cursor)}` : path
+  const res = await request(url)
+  if (!res) return { items: [], nextCursor: null }
+  return { items: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') }
+}
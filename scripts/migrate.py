@@ -7,9 +7,40 @@ import sqlite3
 import sys
 import os
 
+from nexaflow_crm.fulltext import CONTACTS_FTS_REBUILD, CONTACTS_FTS_TABLE, CONTACTS_FTS_TRIGGERS
+from nexaflow_crm.tag_service import parse_tags
+
 DB_PATH = os.getenv("DATABASE_PATH", "nexaflow.db")
 
 
+def backfill_contact_tags(conn, batch_size: int = 1000) -> int:
+    """Copy comma-separated Contact.tags into tags/contact_tags in id-ordered batches."""
+    cur = conn.cursor()
+    last_id = 0
+    total = 0
+    while True:
+        cur.execute(
+            "SELECT id, user_id, tags FROM contacts WHERE id > ? AND tags IS NOT NULL AND tags != '' ORDER BY id LIMIT ?",
+            (last_id, batch_size),
+        )
+        rows = cur.fetchall()
+        if not rows:
+            return total
+        pairs = []
+        for contact_id, user_id, raw in rows:
+            for name in parse_tags(raw):
+                pairs.append((user_id, name, contact_id))
+        cur.executemany("INSERT OR IGNORE INTO tags (user_id, name) VALUES (?, ?)", {(u, n) for u, n, _ in pairs})
+        cur.executemany(
+            "INSERT OR IGNORE INTO contact_tags (tag_id, contact_id) "
+            "SELECT id, ? FROM tags WHERE user_id = ? AND name = ?",
+            [(contact_id, user_id, name) for user_id, name, contact_id in pairs],
+        )
+        conn.commit()
+        last_id = rows[-1][0]
+        total += len(rows)
+
+
 def run_migration(db_path: str):
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
@@ -108,6 +139,170 @@ def run_migration(db_path: str):
     """)
     print("  milestones table ready")
 
+    print("\nPhase 5: Keyset pagination indexes")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_contacts_user_created ON contacts (user_id, created_at, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_projects_user_created ON projects (user_id, created_at, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_projects_user_status_created ON projects (user_id, status, created_at, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_invoices_created ON invoices (created_at, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_invoices_project ON invoices (project_id)")
+    print("  list indexes ready")
+
+    print("\nPhase 6: Contact full-text search")
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contacts_fts'")
+    if cur.fetchone():
+        print("  contacts_fts already exists, skipping")
+    else:
+        cur.execute(CONTACTS_FTS_TABLE)
+        cur.execute(CONTACTS_FTS_REBUILD)
+        print("  contacts_fts created and backfilled")
+    for trigger in CONTACTS_FTS_TRIGGERS:
+        cur.execute(trigger)
+    print("  contacts_fts triggers ready")
+
+    print("\nPhase 7: Normalized contact tags")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            name TEXT NOT NULL,
+            CONSTRAINT uq_tags_user_name UNIQUE (user_id, name)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS contact_tags (
+            tag_id INTEGER NOT NULL REFERENCES tags(id) ON DELETE CASCADE,
+            contact_id INTEGER NOT NULL REFERENCES contacts(id) ON DELETE CASCADE,
+            PRIMARY KEY (tag_id, contact_id)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_contact_tags_contact ON contact_tags (contact_id)")
+    print("  tags and contact_tags tables ready")
+    backfilled = backfill_contact_tags(conn)
+    print(f"  indexed tags for {backfilled} contacts")
+
+    print("\nPhase 8: Communication timeline indexes")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS ix_communication_logs_contact_timeline "
+        "ON communication_logs (contact_id, user_id, created_at)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS ix_communication_logs_project_timeline "
+        "ON communication_logs (project_id, user_id, created_at)"
+    )
+    print("  timeline indexes ready")
+
+    print("\nPhase 9: Team lookup indexes")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_project_contacts_project ON project_contacts (project_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_project_contacts_contact ON project_contacts (contact_id)")
+    print("  project_contacts indexes ready")
+
+    print("\nPhase 10: Project summary indexes")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_milestones_project ON milestones (project_id)")
+    print("  milestones index ready")
+
+    print("\nPhase 11: CSV contact import")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_contacts_user_email ON contacts (user_id, lower(trim(email)))")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS contact_imports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            filename TEXT DEFAULT '',
+            status TEXT DEFAULT 'queued',
+            size_bytes INTEGER DEFAULT 0,
+            bytes_processed INTEGER DEFAULT 0,
+            rows_processed INTEGER DEFAULT 0,
+            imported INTEGER DEFAULT 0,
+            duplicates INTEGER DEFAULT 0,
+            invalid INTEGER DEFAULT 0,
+            error TEXT DEFAULT '',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            finished_at DATETIME
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_contact_imports_user_created ON contact_imports (user_id, created_at)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS contact_import_errors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            import_id INTEGER NOT NULL REFERENCES contact_imports(id) ON DELETE CASCADE,
+            row INTEGER NOT NULL,
+            email TEXT DEFAULT '',
+            message TEXT NOT NULL
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_contact_import_errors_import ON contact_import_errors (import_id, row)")
+    print("  contact import tables and email index ready")
+
+    print("\nPhase 12: Recurring invoices")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS recurring_invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            project_id INTEGER NOT NULL REFERENCES projects(id),
+            title TEXT DEFAULT '',
+            amount REAL DEFAULT 0.0,
+            currency TEXT DEFAULT 'USD',
+            notes TEXT DEFAULT '',
+            frequency TEXT DEFAULT 'monthly',
+            start_date TEXT NOT NULL,
+            end_date TEXT,
+            next_run_date TEXT,
+            due_days INTEGER DEFAULT 30,
+            status TEXT DEFAULT 'active',
+            send_to_email TEXT DEFAULT '',
+            send_mode TEXT DEFAULT 'email_only',
+            last_generated_at DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_recurring_invoices_due ON recurring_invoices (status, next_run_date, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_recurring_invoices_project ON recurring_invoices (project_id)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS recurring_invoice_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recurring_id INTEGER NOT NULL REFERENCES recurring_invoices(id) ON DELETE CASCADE,
+            description TEXT NOT NULL,
+            quantity REAL DEFAULT 1.0,
+            unit_price REAL DEFAULT 0.0
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_recurring_invoice_items_recurring ON recurring_invoice_items (recurring_id)")
+    add_column("invoices", "recurring_id", "INTEGER REFERENCES recurring_invoices(id)")
+    add_column("invoices", "period", "TEXT")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_invoices_recurring_period ON invoices (recurring_id, period)")
+    # Invoice numbers now come from one global counter (they are unique across users)
+    cur.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)")
+    print("  recurring invoice tables, invoice period index and counters ready")
+
+    print("\nPhase 13: Overdue sweep index")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_invoices_status_due ON invoices (status, due_date)")
+    print("  invoices status/due index ready (run `python -m nexaflow_crm.overdue` once to mark existing invoices)")
+
+    print("\nPhase 14: Notification scheduler")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_milestones_open_due ON milestones (completed_at, due_date)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            kind TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            period TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            recipient TEXT DEFAULT '',
+            subject TEXT DEFAULT '',
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 1,
+            error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            sent_at DATETIME
+        )
+    """)
+    cur.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_notifications_item_period ON notifications (kind, item_id, period)"
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_notifications_user_created ON notifications (user_id, created_at, id)")
+    add_column("notifications", "attempts", "INTEGER", "1")
+    print("  notifications table and milestone due index ready")
+
     conn.commit()
     conn.close()
     print("\nMigration complete!")
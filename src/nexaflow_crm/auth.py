@@ -1,17 +1,29 @@
+import asyncio
+import functools
+import logging
+import math
 import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
 import bcrypt
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
+from nexaflow_crm.cache import TTLCache
 from nexaflow_crm.database import get_db
 from nexaflow_crm.models import User
 
 import secrets as _secrets
 
+logger = logging.getLogger(__name__)
+
 _default_secret = _secrets.token_hex(32)
 SECRET_KEY = os.getenv("SECRET_KEY", _default_secret)
 if SECRET_KEY == _default_secret:
@@ -20,34 +32,272 @@ if SECRET_KEY == _default_secret:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 1
 
+# Principal cache: resolved users keyed by (user_id, token iat), checked against the shared
+# profile version on every request. TTL 0 disables it.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "4096"))
+# Embed preferred currency in the token so most requests never touch the users table.
+EMBED_TOKEN_CLAIMS = os.getenv("AUTH_EMBED_CLAIMS", "false").lower() in ("1", "true", "yes")
+
+
+def _default_state_storage() -> str:
+    shm = Path("/dev/shm")
+    return str((shm if shm.is_dir() else Path(tempfile.gettempdir())) / "nexaflow-auth.db")
+
+
+# Profile versions shared by every worker on the host (see ProfileVersions)
+AUTH_STATE_STORAGE = os.getenv("AUTH_STATE_STORAGE", "") or _default_state_storage()
+
+# Password hashing runs on its own bounded pool so login bursts can't starve the request threadpool.
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS", "")
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "0"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+_DEFAULT_ROUNDS = 12
+_MIN_ROUNDS = 10
+_MAX_ROUNDS = 16
+
+_PRINCIPAL_FIELDS = ("id", "email", "name", "preferred_currency", "created_at")
+
+_principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+class ProfileVersions:
+    """Per-user profile version, shared by every worker on the host.
+
+    Kept in a small SQLite database on ``/dev/shm`` (like the rate limiter's
+    buckets) and bumped on every profile change. Cached principals and embedded
+    token claims are trusted only while their version matches, so a change made
+    through one worker is seen by all of them on their next request. A read is a
+    primary-key lookup costing microseconds; when the store is unavailable
+    ``get`` returns None and callers fall back to the database.
+    """
+
+    _SCHEMA = "CREATE TABLE IF NOT EXISTS profile_versions (user_id INTEGER PRIMARY KEY, version INTEGER NOT NULL)"
+
+    def __init__(self, path: str = AUTH_STATE_STORAGE, busy_timeout: float = 0.05):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(self._SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id: int) -> int | None:
+        try:
+            row = self._conn().execute("SELECT version FROM profile_versions WHERE user_id = ?", (user_id,)).fetchone()
+        except sqlite3.Error:
+            logger.warning("Profile version store unavailable; resolving users from the database", exc_info=True)
+            return None
+        return row[0] if row else 0
+
+    def bump(self, user_id: int) -> None:
+        try:
+            self._conn().execute(
+                "INSERT INTO profile_versions (user_id, version) VALUES (?, 1) "
+                "ON CONFLICT (user_id) DO UPDATE SET version = version + 1",
+                (user_id,),
+            )
+        except sqlite3.Error:
+            logger.exception("Could not record profile change for user %s", user_id)
+
+
+_profile_versions = ProfileVersions()
+
 security = HTTPBearer()
 
 
+_hash_executor: ThreadPoolExecutor | None = None
+_hash_executor_lock = threading.Lock()
+_hash_pending = 0  # jobs submitted to the executor and not yet finished
+_hash_pending_lock = threading.Lock()
+
+
+def calibrate_bcrypt_rounds(target_ms: float) -> int:
+    """Pick the highest cost whose hash time stays within ``target_ms`` on this host."""
+    started = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(_MIN_ROUNDS))
+    base_ms = max((time.perf_counter() - started) * 1000, 0.001)
+    # Each extra round doubles the work factor.
+    extra = math.floor(math.log2(target_ms / base_ms)) if target_ms > base_ms else 0
+    return max(_MIN_ROUNDS, min(_MAX_ROUNDS, _MIN_ROUNDS + extra))
+
+
+@functools.cache
+def get_bcrypt_rounds() -> int:
+    if BCRYPT_ROUNDS:
+        return max(4, min(31, int(BCRYPT_ROUNDS)))
+    if BCRYPT_TARGET_MS > 0:
+        return calibrate_bcrypt_rounds(BCRYPT_TARGET_MS)
+    return _DEFAULT_ROUNDS
+
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(get_bcrypt_rounds())).decode()
 
 
 def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode(), hashed.encode())
 
 
-def create_access_token(user_id: int) -> str:
-    expire = datetime.now(timezone.utc) + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
-    return jwt.encode({"sub": str(user_id), "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+def password_needs_rehash(hashed: str) -> bool:
+    """True when a stored hash uses a lower cost than the configured one."""
+    try:
+        return int(hashed.split("$")[2]) < get_bcrypt_rounds()
+    except (IndexError, ValueError):
+        return True
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+        return _hash_executor
+
+
+def _hash_job_done(_future=None) -> None:
+    global _hash_pending
+    with _hash_pending_lock:
+        _hash_pending -= 1
+
+
+async def _run_hash_job(fn, *args):
+    global _hash_pending
+    with _hash_pending_lock:
+        if _hash_pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(status_code=503, detail="Authentication busy, retry shortly")
+        _hash_pending += 1
+    try:
+        future = _get_hash_executor().submit(fn, *args)
+    except BaseException:
+        _hash_job_done()
+        raise
+    # Freed when the job itself finishes (or is dropped from the queue), not when the
+    # request does: a disconnected client must not free a slot bcrypt is still using.
+    future.add_done_callback(_hash_job_done)
+    return await asyncio.wrap_future(future)
+
+
+def password_hash_pending() -> int:
+    """bcrypt jobs currently running or queued on the executor."""
+    return _hash_pending
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hash_job(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _run_hash_job(verify_password, plain, hashed)
+
+
+def shutdown_password_executor() -> None:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=True)
+            _hash_executor = None
+
+
+@functools.cache
+def _jwt():
+    # python-jose is imported on first use, keeping it out of startup.
+    from jose import jwt
+
+    return jwt
+
+
+def _decode_token(token: str) -> dict | None:
+    """Claims of a validly signed, unexpired token, or None."""
+    jwt = _jwt()
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.JWTError:
+        return None
+
+
+def create_access_token(user_id: int, preferred_currency: str | None = None) -> str:
+    now = datetime.now(timezone.utc)
+    claims = {"sub": str(user_id), "iat": now, "exp": now + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)}
+    if EMBED_TOKEN_CLAIMS and (version := _profile_versions.get(user_id)) is not None:
+        claims["cur"] = preferred_currency or "USD"
+        claims["ver"] = version
+    return _jwt().encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Forget cached principals and embedded claims for a user after their profile changes, in every worker."""
+    _principal_cache.discard_where(lambda key: key[0] == user_id)
+    _profile_versions.bump(user_id)
+
+
+def _principal(**fields) -> User:
+    # Detached snapshot: plain attribute reads work, lazy loads and refreshes raise.
+    user = User(**fields)
+    make_transient_to_detached(user)
+    return user
+
+
+def token_user_id(token: str) -> int | None:
+    """User id from a valid bearer token, or None. No database access."""
+    payload = _decode_token(token)
+    if payload is None:
+        return None
+    try:
+        return int(payload["sub"])
+    except (KeyError, ValueError, TypeError):
+        return None
 
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
 ) -> User:
-    token = credentials.credentials
+    """Resolve the bearer token to a detached, read-only ``User``.
+
+    Use ``get_current_user_record`` when the route needs to modify the user.
+    """
+    payload = _decode_token(credentials.credentials)
+    if payload is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = int(payload["sub"])
-    except (JWTError, KeyError, ValueError):
+        issued_at = int(payload.get("iat", 0))
+    except (KeyError, ValueError, TypeError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    # None when the version store is unavailable: then nothing cached or embedded is trusted.
+    version = _profile_versions.get(user_id)
+    if EMBED_TOKEN_CLAIMS and "cur" in payload and version is not None and payload.get("ver") == version:
+        return _principal(id=user_id, preferred_currency=payload["cur"])
+
+    key = (user_id, issued_at)
+    cached = _principal_cache.get(key) if version is not None else None
+    if cached is not None and cached[0] == version:
+        return _principal(**cached[1])
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-    return user
+    fields = {name: getattr(user, name) for name in _PRINCIPAL_FIELDS}
+    if version is not None:
+        _principal_cache.set(key, (version, fields))
+    return _principal(**fields)
+
+
+def get_current_user_record(
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> User:
+    """Load the authenticated user's full, session-bound row."""
+    record = db.query(User).filter(User.id == user.id).first()
+    if not record:
+        raise HTTPException(status_code=401, detail="User not found")
+    return record
@@ -0,0 +1,182 @@
+"""Batch create/update/delete for contacts, projects and invoices.
+
+A batch carries up to ``MAX_BATCH_OPERATIONS`` operations. Each one is
+validated on its own. Ownership of every targeted id, and of every contact or
+project an operation points at, is then checked with one set-based query per
+kind. The operations that pass are applied, deletes with set-based statements,
+and flushed and committed in a single transaction. Creates go in as one
+multi-row ``INSERT … RETURNING``. If the flush breaks a database constraint,
+the operations are replayed in one savepoint each, so only the offending ones
+fail (409). Results come back in request order with an HTTP-style status per
+item. With ``atomic`` set, one failed operation rolls back the whole batch and
+the rest report 424.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from nexaflow_crm.params import MAX_BATCH_OPERATIONS
+from nexaflow_crm.schemas import BatchItemResult, BatchRequest, BatchResponse
+
+
+@dataclass(frozen=True)
+class Reference:
+    """A foreign id in operation data that must belong to the caller (e.g. a project's ``contact_id``)."""
+
+    field: str
+    model: type  # has ``id`` and ``user_id``
+    label: str
+
+
+@dataclass(frozen=True)
+class BatchTarget:
+    model: type
+    label: str
+    create_schema: type[BaseModel]
+    update_schema: type[BaseModel]
+    out_schema: type[BaseModel]
+    # (db, user_id, ids) -> the caller's rows among ids, by id; one query
+    load_owned: Callable[[Session, int, list[int]], dict[int, object]]
+    # (user_id, validated fields) -> column values for the new row
+    values: Callable[[int, dict], dict]
+    # (db, ids) -> delete the rows and their dependents with set-based statements
+    delete: Callable[[Session, list[int]], None]
+    references: tuple[Reference, ...] = ()
+    # (db, user_id, [(instance, fields written)]) after the flush, e.g. to index tags
+    after_flush: Callable[[Session, int, list[tuple[object, dict]]], None] | None = None
+
+
+def owned_ids(db: Session, model, user_id: int, ids: set[int]) -> set[int]:
+    if not ids:
+        return set()
+    return set(db.scalars(select(model.id).where(model.user_id == user_id, model.id.in_(ids))))
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc.errors())
+
+
+def _apply(db: Session, user_id: int, target: BatchTarget, owned: dict, accepted: list) -> tuple[list, list]:
+    """Write ``accepted`` operations and flush. Returns (written, deleted)."""
+    written: list[tuple[int, int, object, dict]] = []  # (index, status, instance, fields)
+    created = [(index, fields) for index, kind, _, fields in accepted if kind == "create"]
+    deleted = [(index, op_id) for index, kind, op_id, _ in accepted if kind == "delete"]
+    for index, kind, op_id, fields in accepted:
+        if kind == "update":
+            instance = owned[op_id]
+            for name, value in fields.items():
+                setattr(instance, name, value)
+            written.append((index, 200, instance, fields))
+    if deleted:
+        target.delete(db, [op_id for _, op_id in deleted])
+    if created:
+        # sort_by_parameter_order would fall back to one INSERT per row on SQLite; rowids
+        # are assigned in VALUES order, so sorting by id restores the request order.
+        stmt = insert(target.model).returning(target.model)
+        rows = db.scalars(stmt, [target.values(user_id, fields) for _, fields in created]).all()
+        instances = sorted(rows, key=lambda row: row.id)
+        written.extend((index, 201, instance, fields) for (index, fields), instance in zip(created, instances))
+    db.flush()
+    if target.after_flush is not None and written:
+        target.after_flush(db, user_id, [(instance, fields) for _, _, instance, fields in written])
+    return written, deleted
+
+
+def _abort_atomic(db: Session, accepted: list, fail, results: dict) -> BatchResponse:
+    db.rollback()
+    for index, *_ in accepted:
+        if index not in results:
+            fail(index, 424, "Not applied: another operation in this atomic batch failed")
+    return BatchResponse(committed=False, results=[results[i] for i in sorted(results)])
+
+
+def run_batch(db: Session, user_id: int, request: BatchRequest, target: BatchTarget) -> BatchResponse:
+    if len(request.operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+
+    results: dict[int, BatchItemResult] = {}
+
+    def fail(index: int, status: int, error: str) -> None:
+        results[index] = BatchItemResult(index=index, status=status, error=error)
+
+    # 1. Validate each operation on its own.
+    pending: list[tuple[int, str, int | None, dict]] = []
+    targeted: set[int] = set()
+    for index, op in enumerate(request.operations):
+        if op.op != "create":
+            if op.id is None:
+                fail(index, 400, f"id is required to {op.op}")
+                continue
+            if op.id in targeted:
+                fail(index, 400, f"{target.label} {op.id} appears more than once in this batch")
+                continue
+            targeted.add(op.id)
+        fields: dict = {}
+        if op.op != "delete":
+            schema = target.create_schema if op.op == "create" else target.update_schema
+            try:
+                parsed = schema(**op.data)
+            except ValidationError as exc:
+                fail(index, 422, _validation_message(exc))
+                continue
+            fields = parsed.model_dump() if op.op == "create" else parsed.model_dump(exclude_unset=True)
+        pending.append((index, op.op, op.id, fields))
+
+    # 2. Ownership: one query for the targeted rows, one per kind of referenced row.
+    owned = target.load_owned(db, user_id, [op_id for _, _, op_id, _ in pending if op_id is not None])
+    allowed = {
+        ref.field: owned_ids(db, ref.model, user_id, {f[ref.field] for _, _, _, f in pending if f.get(ref.field) is not None})
+        for ref in target.references
+    }
+
+    # 3. Apply what passed.
+    accepted: list[tuple[int, str, int | None, dict]] = []
+    for index, kind, op_id, fields in pending:
+        if op_id is not None and op_id not in owned:
+            fail(index, 404, f"{target.label} not found")
+            continue
+        missing = next(
+            (ref for ref in target.references if fields.get(ref.field) is not None and fields[ref.field] not in allowed[ref.field]),
+            None,
+        )
+        if missing is not None:
+            fail(index, 404, f"{missing.label} not found")
+            continue
+        accepted.append((index, kind, op_id, fields))
+
+    if request.atomic and results:
+        return _abort_atomic(db, accepted, fail, results)
+
+    try:
+        with db.begin_nested():
+            written, deleted = _apply(db, user_id, target, owned, accepted)
+    except IntegrityError:
+        # Something broke a constraint (e.g. a unique key): replay one operation per
+        # savepoint so only the offending ones fail.
+        written, deleted = [], []
+        for op in accepted:
+            try:
+                with db.begin_nested():
+                    op_written, op_deleted = _apply(db, user_id, target, owned, [op])
+            except IntegrityError as exc:
+                fail(op[0], 409, f"Conflicts with existing data: {exc.orig}")
+                continue
+            written += op_written
+            deleted += op_deleted
+        if request.atomic and results:
+            return _abort_atomic(db, accepted, fail, results)
+
+    # Serialize before commit: everything is loaded now, while commit would expire it.
+    for index, status, instance, _ in written:
+        data = target.out_schema.model_validate(instance).model_dump(mode="json")
+        results[index] = BatchItemResult(index=index, status=status, id=instance.id, data=data)
+    for index, op_id in deleted:
+        results[index] = BatchItemResult(index=index, status=204, id=op_id)
+    db.commit()
+    return BatchResponse(committed=True, results=[results[i] for i in sorted(results)])
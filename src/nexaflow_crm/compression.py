@@ -0,0 +1,147 @@
+"""Response compression for ``/api`` routes.
+
+Only allowlisted content types at or above a size threshold are compressed;
+binary payloads (PDFs, the tracking pixel) and anything already encoded pass
+through untouched. Streamed responses (NDJSON/CSV exports) are compressed
+incrementally with a sync flush per chunk so bytes still leave immediately.
+"""
+
+import gzip
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/html",
+    "text/plain",
+)
+EXCLUDED_PREFIXES = ("/api/track/",)
+
+
+def _accepts(header: str, encoding: str) -> bool:
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if token.strip().lower() == encoding:
+            return params.strip().replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        compresslevel: int = COMPRESSION_LEVEL,
+        content_types: tuple[str, ...] = COMPRESSIBLE_TYPES,
+        path_prefix: str = "/api/",
+        excluded_prefixes: tuple[str, ...] = EXCLUDED_PREFIXES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.content_types = content_types
+        self.path_prefix = path_prefix
+        self.excluded_prefixes = excluded_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        if not path.startswith(self.path_prefix) or path.startswith(self.excluded_prefixes):
+            await self.app(scope, receive, send)
+            return
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        gzip_ok = _accepts(accept, "gzip")
+        if brotli is not None and _accepts(accept, "br"):
+            encoding = "br"
+        elif gzip_ok:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self, encoding, gzip_ok, send).run(scope, receive)
+
+
+class _Responder:
+    def __init__(self, config: CompressionMiddleware, encoding: str, gzip_ok: bool, send: Send):
+        self.config = config
+        self.encoding = encoding
+        self.gzip_ok = gzip_ok
+        self.send = send
+        self.start: Message | None = None
+        self.mode: str | None = None  # "identity", "whole" or "stream"
+        self.stream = None
+
+    async def run(self, scope: Scope, receive: Receive) -> None:
+        await self.config.app(scope, receive, self.on_send)
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in self.config.content_types
+
+    async def on_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.mode is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            too_small = not more_body and len(body) < self.config.minimum_size
+            if not self._compressible(headers) or too_small or (more_body and not self.gzip_ok):
+                self.mode = "identity"
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                self.mode = "whole"
+                compressed = self._compress_whole(body)
+                headers["Content-Encoding"] = self.encoding
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+
+            # Streaming: always gzip, flushing each chunk.
+            self.mode = "stream"
+            self.stream = zlib.compressobj(self.config.compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            headers["Content-Encoding"] = "gzip"
+            del headers["Content-Length"]
+            await self.send(self.start)
+
+        if self.mode == "identity":
+            await self.send(message)
+            return
+        if self.mode == "stream":
+            chunk = self.stream.compress(message.get("body", b""))
+            more_body = message.get("more_body", False)
+            chunk += self.stream.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _compress_whole(self, body: bytes) -> bytes:
+        if self.encoding == "br":
+            return brotli.compress(body, quality=min(11, max(0, self.config.compresslevel)))
+        return gzip.compress(body, compresslevel=self.config.compresslevel, mtime=0)
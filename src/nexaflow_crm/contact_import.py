@@ -0,0 +1,220 @@
+"""Streaming CSV contact import.
+
+The upload is spooled to a temporary file as it arrives, then read back row
+by row and processed ``CONTACT_IMPORT_CHUNK_SIZE`` rows at a time: each chunk
+is validated, deduplicated on normalized email (trimmed, lower-cased) against
+the user's contacts and itself, inserted with one executemany, tag-indexed in
+bulk and committed together with the job's progress counters. Earlier chunks
+are already in the database when later ones are checked, so duplicates across
+the whole file are caught while memory stays bounded by the chunk size.
+
+Job state lives in ``contact_imports`` so any worker can report progress;
+rejected rows are kept in ``contact_import_errors`` (the first
+``CONTACT_IMPORT_MAX_ERRORS`` of them) for the per-row report.
+"""
+
+import contextlib
+import csv
+import functools
+import io
+import logging
+import os
+import re
+from datetime import datetime, timezone
+
+from email_validator import EmailNotValidError, validate_email
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from nexaflow_crm.database import SessionLocal
+from nexaflow_crm.models import Contact, ContactImport, ContactImportError
+from nexaflow_crm.schemas import ContactCreate
+from nexaflow_crm.tag_service import index_contact_tags
+
+logger = logging.getLogger(__name__)
+
+CONTACT_IMPORT_CHUNK_SIZE = int(os.getenv("CONTACT_IMPORT_CHUNK_SIZE", "1000"))
+CONTACT_IMPORT_MAX_MB = float(os.getenv("CONTACT_IMPORT_MAX_MB", "50"))
+CONTACT_IMPORT_MAX_ERRORS = int(os.getenv("CONTACT_IMPORT_MAX_ERRORS", "1000"))
+
+# Accepted header names per field, compared after lower-casing and turning spaces/dashes into underscores.
+COLUMN_ALIASES = {
+    "name": ("name", "full_name", "contact_name", "contact"),
+    "first_name": ("first_name", "given_name", "first"),
+    "last_name": ("last_name", "surname", "family_name", "last"),
+    "email": ("email", "e_mail", "email_address"),
+    "phone": ("phone", "phone_number", "mobile", "telephone"),
+    "company": ("company", "company_name", "organization", "organisation"),
+    "tags": ("tags", "labels"),
+    "notes": ("notes", "note", "comments"),
+}
+
+_HEADER_SEPARATORS = re.compile(r"[\s\-]+")
+# Unquoted ASCII local part (RFC 5322 dot-atom); anything else takes the full validator.
+_DOT_ATOM = re.compile(r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*\Z")
+# The same expression backs ix_contacts_user_email, so lookups stay indexed.
+_NORMALIZED_EMAIL = func.lower(func.trim(Contact.email))
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def map_columns(header: list[str]) -> dict[str, int]:
+    """Field -> column position for a CSV header; the first matching column wins."""
+    positions: dict[str, int] = {}
+    for index, cell in enumerate(header):
+        positions.setdefault(_HEADER_SEPARATORS.sub("_", cell.strip().lower()), index)
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        match = next((positions[alias] for alias in aliases if alias in positions), None)
+        if match is not None:
+            columns[field] = match
+    if "name" not in columns and "first_name" not in columns:
+        raise ValueError("CSV header needs a name (or first name) column")
+    return columns
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalized_domain(domain: str) -> str:
+    return validate_email(f"x@{domain}", check_deliverability=False).domain
+
+
+def normalize_address(email: str) -> str:
+    """Validate and normalize an email address; raises ``EmailNotValidError``.
+
+    Imports repeat a handful of domains thousands of times, and the domain
+    (IDNA) checks are most of the validator's cost, so they are cached.
+    """
+    local, _, domain = email.rpartition("@")
+    if local and len(local) <= 64 and len(email) <= 254 and _DOT_ATOM.match(local):
+        return f"{local}@{_normalized_domain(domain)}"
+    return validate_email(email, check_deliverability=False).normalized
+
+
+def _row_values(row: list[str], columns: dict[str, int]) -> dict[str, str]:
+    values = {field: row[index].strip() if index < len(row) else "" for field, index in columns.items()}
+    first, last = values.pop("first_name", ""), values.pop("last_name", "")
+    if not values.get("name"):
+        values["name"] = f"{first} {last}".strip()
+    return values
+
+
+def validate_row(values: dict[str, str]) -> tuple[dict | None, str]:
+    """Returns (contact fields, "") for a valid row, or (None, reason)."""
+    try:
+        data = ContactCreate(**values).model_dump()
+    except ValidationError as exc:
+        return None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc.errors())
+    if data["email"]:
+        try:
+            data["email"] = normalize_address(data["email"])
+        except EmailNotValidError as exc:
+            return None, f"email: {exc}"
+    return data, ""
+
+
+def create_job(db: Session, user_id: int, filename: str, size_bytes: int) -> ContactImport:
+    job = ContactImport(user_id=user_id, filename=filename[:255], size_bytes=size_bytes)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _import_chunk(db: Session, job: ContactImport, chunk: list[tuple[int, dict[str, str]]]) -> None:
+    rejected: list[tuple[int, str, str]] = []  # (line, email, message)
+    valid: list[tuple[int, dict]] = []
+    for line, values in chunk:
+        data, message = validate_row(values)
+        if data is None:
+            rejected.append((line, values.get("email", ""), message))
+        else:
+            valid.append((line, data))
+    invalid = len(rejected)
+
+    keys = {normalize_email(data["email"]) for _, data in valid if data["email"]}
+    seen = set()
+    if keys:
+        seen.update(db.scalars(
+            select(_NORMALIZED_EMAIL).where(Contact.user_id == job.user_id, _NORMALIZED_EMAIL.in_(keys))
+        ))
+    rows = []
+    for line, data in valid:
+        key = normalize_email(data["email"])
+        if key in seen:
+            rejected.append((line, data["email"], "Duplicate: a contact with this email already exists"))
+            continue
+        if key:
+            seen.add(key)
+        rows.append({"user_id": job.user_id, **data})
+
+    if rows:
+        # Only the (id, tags) pairs are needed, not their order; sort_by_parameter_order
+        # would turn this into one INSERT per row on SQLite.
+        inserted = db.execute(insert(Contact).returning(Contact.id, Contact.tags), rows).all()
+        index_contact_tags(db, job.user_id, inserted)
+
+    room = CONTACT_IMPORT_MAX_ERRORS - (job.invalid + job.duplicates)
+    if rejected and room > 0:
+        rejected.sort()
+        db.execute(
+            insert(ContactImportError),
+            [{"import_id": job.id, "row": line, "email": email, "message": message} for line, email, message in rejected[:room]],
+        )
+    job.rows_processed += len(chunk)
+    job.imported += len(rows)
+    job.invalid += invalid
+    job.duplicates += len(rejected) - invalid
+
+
+def _process(db: Session, job: ContactImport, path: str) -> None:
+    with open(path, "rb") as raw:
+        reader = csv.reader(io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline=""))
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("The file is empty")
+        columns = map_columns(header)
+        chunk: list[tuple[int, dict[str, str]]] = []
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            chunk.append((reader.line_num, _row_values(row, columns)))
+            if len(chunk) >= CONTACT_IMPORT_CHUNK_SIZE:
+                _import_chunk(db, job, chunk)
+                job.bytes_processed = raw.tell()
+                db.commit()
+                chunk = []
+        if chunk:
+            _import_chunk(db, job, chunk)
+        job.bytes_processed = job.size_bytes
+
+
+def run_import(job_id: int, path: str) -> None:
+    """Import the spooled file at ``path`` for ``job_id``, then delete it.
+
+    Blocking; runs as a background task on the threadpool (or inline for
+    synchronous imports) with its own session.
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(ContactImport, job_id)
+        job.status = "running"
+        db.commit()
+        try:
+            _process(db, job, path)
+            job.status = "completed"
+        except Exception as exc:
+            # Chunks committed so far stay imported; the job records where it stopped.
+            db.rollback()
+            if not isinstance(exc, ValueError):  # ValueError: unusable file, reported on the job
+                logger.exception("Contact import %s failed", job_id)
+            job.status = "failed"
+            job.error = str(exc) or exc.__class__.__name__
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+    finally:
+        db.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
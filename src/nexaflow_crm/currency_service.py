@@ -3,9 +3,9 @@
 import json
 from datetime import datetime, timedelta, timezone
 
-import httpx
 from sqlalchemy.orm import Session
 
+from nexaflow_crm.metrics import CURRENCY_RATE_LOOKUPS
 from nexaflow_crm.models import ExchangeRateCache
 
 CACHE_TTL_HOURS = 6
@@ -20,9 +20,12 @@ def get_rates(base: str, db: Session) -> dict:
     cached = db.query(ExchangeRateCache).filter(ExchangeRateCache.base_currency == base).first()
 
     if cached and cached.fetched_at and cached.fetched_at.replace(tzinfo=timezone.utc) > cutoff:
+        CURRENCY_RATE_LOOKUPS.inc("hit")
         return json.loads(cached.rates_json)
 
     try:
+        import httpx  # deferred: only needed on a cache miss
+
         resp = httpx.get(f"https://api.frankfurter.app/latest?from={base}", timeout=10)
         resp.raise_for_status()
         data = resp.json()
@@ -36,11 +39,14 @@ def get_rates(base: str, db: Session) -> dict:
             cached = ExchangeRateCache(base_currency=base, rates_json=rates_json, fetched_at=now)
             db.add(cached)
         db.commit()
+        CURRENCY_RATE_LOOKUPS.inc("refresh")
         return rates
 
     except Exception:
         if cached:
+            CURRENCY_RATE_LOOKUPS.inc("stale")
             return json.loads(cached.rates_json)
+        CURRENCY_RATE_LOOKUPS.inc("miss")
         return {}
 
 
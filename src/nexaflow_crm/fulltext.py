@@ -0,0 +1,110 @@
+"""SQLite FTS5 full-text index over contacts.
+
+``contacts_fts`` is an external-content FTS5 table mirroring
+name/email/company/tags/notes, kept in sync by triggers on ``contacts``.
+The DDL lives here so both app startup and ``scripts/migrate.py`` use it.
+"""
+
+import re
+
+from sqlalchemy import column, literal_column, table, text
+from sqlalchemy.exc import OperationalError
+
+CONTACTS_FTS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+        name, email, company, tags, notes,
+        content='contacts', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+"""
+
+CONTACTS_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+        INSERT INTO contacts_fts (rowid, name, email, company, tags, notes)
+        VALUES (new.id, new.name, new.email, new.company, new.tags, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+        INSERT INTO contacts_fts (contacts_fts, rowid, name, email, company, tags, notes)
+        VALUES ('delete', old.id, old.name, old.email, old.company, old.tags, old.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN
+        INSERT INTO contacts_fts (contacts_fts, rowid, name, email, company, tags, notes)
+        VALUES ('delete', old.id, old.name, old.email, old.company, old.tags, old.notes);
+        INSERT INTO contacts_fts (rowid, name, email, company, tags, notes)
+        VALUES (new.id, new.name, new.email, new.company, new.tags, new.notes);
+    END
+    """,
+]
+
+CONTACTS_FTS_REBUILD = "INSERT INTO contacts_fts (contacts_fts) VALUES ('rebuild')"
+
+# bm25 column weights: name, email, company, tags, notes
+_BM25_RANK = "bm25(contacts_fts, 10.0, 5.0, 3.0, 2.0, 1.0)"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+contacts_fts = table("contacts_fts", column("rowid"))
+
+fts_enabled = False
+
+
+def setup_contact_search(conn) -> bool:
+    """Create the FTS table and triggers if missing, backfilling on first creation.
+
+    ``conn`` is a SQLAlchemy connection inside a transaction. The DDL runs in a
+    savepoint with ``IF NOT EXISTS`` so workers starting together converge on
+    one index, and an empty index (just created) is backfilled. If it fails anyway (FTS5 missing from the SQLite build, or the
+    database busy), search is enabled only if the index exists regardless;
+    otherwise it falls back to LIKE and False is returned.
+    """
+    global fts_enabled
+    try:
+        with conn.begin_nested():
+            # DDL first: a read before it would stop this savepoint from waiting for the write lock.
+            conn.exec_driver_sql(CONTACTS_FTS_TABLE)
+            if conn.exec_driver_sql("SELECT 1 FROM contacts_fts_docsize LIMIT 1").first() is None:
+                conn.exec_driver_sql(CONTACTS_FTS_REBUILD)
+            for trigger in CONTACTS_FTS_TRIGGERS:
+                conn.exec_driver_sql(trigger)
+    except OperationalError:
+        return detect_contact_search(conn)
+    fts_enabled = True
+    return True
+
+
+def detect_contact_search(conn) -> bool:
+    """Enable FTS search if the index already exists, without touching the schema."""
+    global fts_enabled
+    fts_enabled = _contacts_fts_exists(conn)
+    return fts_enabled
+
+
+def _contacts_fts_exists(conn) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contacts_fts'")
+    ).first() is not None
+
+
+def build_match_query(search: str) -> str | None:
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    tokens = _TOKEN_RE.findall(search)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def filter_contacts(q, model, search: str):
+    """Restrict and rank a Contact query by ``search``. Returns None if it has no searchable words."""
+    match = build_match_query(search)
+    if match is None:
+        return None
+    return (
+        q.join(contacts_fts, contacts_fts.c.rowid == model.id)
+        .filter(literal_column("contacts_fts").op("MATCH")(match))
+        .order_by(literal_column(_BM25_RANK), model.id.desc())
+    )
@@ -0,0 +1,49 @@
+"""Invoice number allocation.
+
+``invoices.invoice_number`` is unique across all users, so numbers come from
+one ``counters`` row rather than a per-user count (which handed two users the
+same ``INV-0001``). A single ``UPDATE … RETURNING`` reserves a contiguous block,
+so numbering a whole batch of generated invoices is one statement. The
+counter is created on first use, starting above the highest ``INV-`` number
+already in the table.
+"""
+
+from sqlalchemy import Integer, cast, func, literal, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from nexaflow_crm.models import Counter, Invoice
+
+INVOICE_NUMBER_COUNTER = "invoice_number"
+INVOICE_NUMBER_PREFIX = "INV-"
+
+
+def format_invoice_number(n: int) -> str:
+    return f"{INVOICE_NUMBER_PREFIX}{n:04d}"
+
+
+def _bump(db: Session, count: int) -> int | None:
+    return db.execute(
+        update(Counter)
+        .where(Counter.name == INVOICE_NUMBER_COUNTER)
+        .values(value=Counter.value + count)
+        .returning(Counter.value)
+    ).scalar()
+
+
+def allocate_invoice_numbers(db: Session, count: int) -> list[str]:
+    """Reserve ``count`` consecutive invoice numbers in the current transaction."""
+    if count <= 0:
+        return []
+    last = _bump(db, count)
+    if last is None:
+        highest = select(
+            func.coalesce(func.max(cast(func.substr(Invoice.invoice_number, len(INVOICE_NUMBER_PREFIX) + 1), Integer)), 0)
+        ).where(Invoice.invoice_number.like(f"{INVOICE_NUMBER_PREFIX}%"))
+        db.execute(
+            insert(Counter)
+            .from_select(["name", "value"], select(literal(INVOICE_NUMBER_COUNTER), highest.scalar_subquery()))
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        last = _bump(db, count)
+    return [format_invoice_number(n) for n in range(last - count + 1, last + 1)]
@@ -1,20 +1,28 @@
 import os
 
-import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.util import get_remote_address
 
-from nexaflow_crm.database import Base, engine
+from nexaflow_crm import metrics, notifications, overdue, periodic, recurring, slow_queries
+from nexaflow_crm.auth import shutdown_password_executor
+from nexaflow_crm.compression import COMPRESSION_ENABLED, CompressionMiddleware
+from nexaflow_crm.database import engine
+from nexaflow_crm.pagination import NEXT_CURSOR_HEADER
+from nexaflow_crm.profiling import PROFILER_ENABLED, ProfilerMiddleware
+from nexaflow_crm.ratelimit import RateLimiter, RateLimitMiddleware
+from nexaflow_crm.schema import ensure_schema
+from nexaflow_crm.server import GRACEFUL_TIMEOUT, configure_threadpool, server_options
+from nexaflow_crm.spa import SpaIndex
 from nexaflow_crm.routers import (
-    auth_router, contacts, projects, invoices, dashboard,
+    auth_router, contacts, contact_import, projects, invoices, dashboard,
     project_contacts, currencies, invoice_workflow, communication_log, milestones,
+    recurring_invoices,
 )
+from nexaflow_crm.routers import metrics as metrics_router
+from nexaflow_crm.routers import notifications as notifications_router
 
 STATIC_DIR = Path(__file__).parent / "static"
 FRONTEND_DIST = Path(__file__).parent.parent.parent / "frontend" / "dist"
@@ -23,7 +31,8 @@ IS_PRODUCTION = os.getenv("ENV", "development") != "development"
 _default_origins = "https://crm.zuhdi.id,http://localhost:5173"
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", _default_origins).split(",")
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["60/minute"])
+# Token buckets shared by all workers on the host (see ratelimit.py for the per-route limits)
+limiter = RateLimiter()
 
 app = FastAPI(
     title="NexaFlow CRM",
@@ -31,8 +40,8 @@ app = FastAPI(
     docs_url=None if IS_PRODUCTION else "/docs",
     redoc_url=None if IS_PRODUCTION else "/redoc",
 )
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Inside CORS so 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware, limiter=limiter)
 
 app.add_middleware(
     CORSMiddleware,
@@ -40,8 +49,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
     allow_headers=["Authorization", "Content-Type"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 
 @app.middleware("http")
 async def add_security_headers(request: Request, call_next):
@@ -52,35 +65,87 @@ async def add_security_headers(request: Request, call_next):
     return response
 
 
+if PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
+if slow_queries.SLOW_QUERY_MS:
+    app.add_middleware(slow_queries.SlowQueryMiddleware)
+    slow_queries.instrument_engine(engine)
+
+# Outermost, so latency covers every other middleware (compression included)
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine)
+
+
+@app.on_event("startup")
+async def tune_threadpool():
+    configure_threadpool()
+
+
 @app.on_event("startup")
 def on_startup():
-    Base.metadata.create_all(bind=engine)
+    ensure_schema(engine)
+
+
+def _periodic_jobs() -> list[periodic.Job]:
+    jobs = [
+        (recurring.RECURRING_INTERVAL_SECONDS, recurring.run_due),
+        (overdue.OVERDUE_SWEEP_INTERVAL_SECONDS, overdue.sweep_overdue),
+    ]
+    notifier = notifications.start_engine()
+    if notifier is not None:
+        jobs.append((notifications.NOTIFICATION_TICK_SECONDS, notifier.tick))
+    return jobs
+
+
+# After on_startup, so the first runs find the schema in place
+@app.on_event("startup")
+async def start_periodic_jobs():
+    app.state.scheduler = periodic.Scheduler(_periodic_jobs)
+    app.state.scheduler.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    shutdown_password_executor()
+    scheduler = getattr(app.state, "scheduler", None)
+    if scheduler is not None:
+        await scheduler.stop(GRACEFUL_TIMEOUT)
 
 
 app.include_router(auth_router.router)
+# Before contacts so /api/contacts/import isn't captured by /api/contacts/{contact_id}
+app.include_router(contact_import.router)
 app.include_router(contacts.router)
+# Before projects so /api/projects/teams isn't captured by /api/projects/{project_id}
+app.include_router(project_contacts.router)
 app.include_router(projects.router)
 app.include_router(invoices.router)
+app.include_router(recurring_invoices.router)
 app.include_router(dashboard.router)
-app.include_router(project_contacts.router)
 app.include_router(currencies.router)
 app.include_router(invoice_workflow.router)
 app.include_router(communication_log.router)
 app.include_router(milestones.router)
+app.include_router(notifications_router.router)
+if metrics.METRICS_ENABLED or slow_queries.SLOW_QUERY_MS:
+    app.include_router(metrics_router.router)
 
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 # Serve Vue SPA from frontend/dist/ if it exists (production build)
 if FRONTEND_DIST.exists():
-    app.mount("/assets", StaticFiles(directory=FRONTEND_DIST / "assets"), name="vue-assets")
-
-    @app.get("/{full_path:path}")
-    def serve_vue(full_path: str):
-        # Serve specific files if they exist, otherwise index.html (SPA fallback)
-        file_path = FRONTEND_DIST / full_path
-        if full_path and file_path.exists() and file_path.is_file():
-            return FileResponse(file_path)
-        return FileResponse(FRONTEND_DIST / "index.html")
+    spa_index = SpaIndex(FRONTEND_DIST)
+
+    @app.on_event("startup")
+    def load_spa_index():
+        spa_index.load()
+
+    @app.get("/{full_path:path}", include_in_schema=False)
+    async def serve_vue(full_path: str, request: Request):
+        # Indexed files (precompressed, cached), otherwise index.html (SPA fallback)
+        return spa_index.response(full_path, request)
 else:
     @app.get("/")
     def index():
@@ -88,10 +153,14 @@ else:
 
 
 def start():
+    import uvicorn
+
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "6001"))
-    reload = os.getenv("ENV", "development") == "development"
-    uvicorn.run("nexaflow_crm.main:app", host=host, port=port, reload=reload)
+    if not IS_PRODUCTION:
+        uvicorn.run("nexaflow_crm.main:app", host=host, port=port, reload=True)
+        return
+    uvicorn.run("nexaflow_crm.main:app", host=host, port=port, **server_options())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,303 @@
+"""Prometheus-compatible metrics (text exposition format 0.0.4).
+
+A deliberately small in-process registry — counters, gauges and fixed-bucket
+histograms guarded by one lock each — so recording a sample costs a dict
+lookup and a bisect. Everything is per process; with several workers, scrape
+each one (or aggregate with ``sum by``) as usual.
+
+Enabled with ``METRICS_ENABLED``. ``/metrics`` then requires
+``Authorization: Bearer $METRICS_TOKEN`` when a token is configured, and is
+limited to loopback clients otherwise. The server trusts ``X-Forwarded-For``
+from ``FORWARDED_ALLOW_IPS``, so without a token any request carrying
+forwarding headers is refused: behind a reverse proxy on the same host the
+peer address is the proxy's, not the scraper's.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A counter, or one read at scrape time from ``collect`` ({labels: running total})."""
+
+    type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        collect: Callable[[], dict[tuple, float]] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+        self._collect = collect
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self) -> list[str]:
+        if self._collect is not None:
+            items = list(self._collect().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """A settable gauge, or one read at scrape time from ``collect`` ({labels: value})."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        collect: Callable[[], dict[tuple, float]] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, *labels) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def _samples(self) -> list[str]:
+        if self._collect is not None:
+            items = list(self._collect().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._values.items()]
+        lines = []
+        names = self.labelnames + ("le",)
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Application metrics ---
+
+HTTP_REQUESTS = Counter("nexaflow_http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("nexaflow_http_request_duration_seconds", "Time to produce the full response.", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("nexaflow_http_requests_in_flight", "Requests currently being handled.")
+HTTP_DB_SECONDS = Counter("nexaflow_http_db_seconds_total", "Time spent in SQL statements, per route.", ("method", "route"))
+DB_STATEMENT_SECONDS = Histogram("nexaflow_db_statement_duration_seconds", "SQL statement execution time.", buckets=DB_BUCKETS)
+PDF_RENDER_SECONDS = Histogram("nexaflow_pdf_render_duration_seconds", "Invoice HTML to PDF rendering time.")
+SMTP_SEND_SECONDS = Histogram("nexaflow_smtp_send_duration_seconds", "SMTP connect, login and send time.", ("outcome",))
+CURRENCY_RATE_LOOKUPS = Counter(
+    "nexaflow_currency_rate_lookups_total",
+    "Exchange-rate lookups by result: hit (fresh cache), refresh (fetched upstream), stale (upstream failed, cache served), miss.",
+    ("result",),
+)
+
+# Seconds spent in SQL for the current request; a mutable cell so threadpool workers
+# (which run in a copy of the request context) add to the same total.
+_request_db_time: ContextVar[list[float] | None] = ContextVar("request_db_time", default=None)
+
+
+def _threadpool_stats() -> dict[tuple, float]:
+    from anyio import to_thread
+
+    try:
+        limiter = to_thread.current_default_thread_limiter()
+    except RuntimeError:  # no running event loop
+        return {}
+    stats = limiter.statistics()
+    return {
+        ("limit",): limiter.total_tokens,
+        ("busy",): stats.borrowed_tokens,
+        ("waiting",): stats.tasks_waiting,
+    }
+
+
+def _password_hash_stats() -> dict[tuple, float]:
+    from nexaflow_crm import auth
+
+    return {(): auth.password_hash_pending()}
+
+
+def _principal_cache_stats() -> dict[tuple, float]:
+    from nexaflow_crm import auth
+
+    cache = auth._principal_cache
+    return {("hit",): cache.hits, ("miss",): cache.misses}
+
+
+Gauge("nexaflow_threadpool_threads", "Sync-route threadpool: limit, busy threads and queued tasks.", ("state",), collect=_threadpool_stats)
+Gauge("nexaflow_password_hash_pending", "bcrypt jobs running or queued on the hashing executor.", collect=_password_hash_stats)
+Counter("nexaflow_principal_cache_lookups_total", "Authenticated-principal cache lookups since start.", ("result",), collect=_principal_cache_stats)
+
+
+def instrument_engine(engine) -> None:
+    """Time every SQL statement on ``engine``."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        DB_STATEMENT_SECONDS.observe(elapsed)
+        cell = _request_db_time.get()
+        if cell is not None:
+            cell[0] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        started = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+class MetricsMiddleware:
+    """Records count, latency and SQL time per route template (never the raw path)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        db_time = [0.0]
+        token = _request_db_time.set(db_time)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _request_db_time.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route_path, str(status))
+            HTTP_LATENCY.observe(elapsed, method, route_path)
+            if db_time[0]:
+                HTTP_DB_SECONDS.inc(method, route_path, amount=db_time[0])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 
 from nexaflow_crm.database import Base
@@ -20,6 +20,7 @@ class User(Base):
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (Index("ix_contacts_user_created", "user_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -34,10 +35,36 @@ class Contact(Base):
     owner = relationship("User", back_populates="contacts")
     projects = relationship("Project", back_populates="contact")
     project_contacts = relationship("ProjectContact", back_populates="contact")
+    contact_tags = relationship("ContactTag", cascade="all, delete-orphan")
+
+
+# Import deduplication looks contacts up by normalized email.
+Index("ix_contacts_user_email", Contact.user_id, func.lower(func.trim(Contact.email)))
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+    __table_args__ = (UniqueConstraint("user_id", "name", name="uq_tags_user_name"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String, nullable=False)  # normalized: trimmed, lowercase
+
+
+class ContactTag(Base):
+    __tablename__ = "contact_tags"
+    __table_args__ = (Index("ix_contact_tags_contact", "contact_id"),)
+
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), primary_key=True)
 
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_user_created", "user_id", "created_at", "id"),
+        Index("ix_projects_user_status_created", "user_id", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -58,10 +85,15 @@ class Project(Base):
     invoices = relationship("Invoice", back_populates="project", cascade="all, delete-orphan")
     project_contacts = relationship("ProjectContact", back_populates="project", cascade="all, delete-orphan")
     milestones = relationship("Milestone", back_populates="project", cascade="all, delete-orphan")
+    recurring_invoices = relationship("RecurringInvoice", cascade="all, delete-orphan")
 
 
 class ProjectContact(Base):
     __tablename__ = "project_contacts"
+    __table_args__ = (
+        Index("ix_project_contacts_project", "project_id"),
+        Index("ix_project_contacts_contact", "contact_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -75,6 +107,13 @@ class ProjectContact(Base):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_created", "created_at", "id"),
+        Index("ix_invoices_project", "project_id"),
+        Index("ix_invoices_status_due", "status", "due_date"),  # overdue sweep
+        # One invoice per template and period, however often (or concurrently) the scheduler runs.
+        Index("uq_invoices_recurring_period", "recurring_id", "period", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -89,6 +128,8 @@ class Invoice(Base):
     sent_to_email = Column(String, default="")
     opened_at = Column(DateTime, nullable=True)
     tracking_token = Column(String, unique=True, nullable=True)
+    recurring_id = Column(Integer, ForeignKey("recurring_invoices.id"), nullable=True)
+    period = Column(String, nullable=True)  # YYYY-MM-DD start of the billed period, for recurring invoices
     created_at = Column(DateTime, default=func.now())
 
     project = relationship("Project", back_populates="invoices")
@@ -119,6 +160,10 @@ class ExchangeRateCache(Base):
 
 class CommunicationLog(Base):
     __tablename__ = "communication_logs"
+    __table_args__ = (
+        Index("ix_communication_logs_contact_timeline", "contact_id", "user_id", "created_at"),
+        Index("ix_communication_logs_project_timeline", "project_id", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -132,6 +177,10 @@ class CommunicationLog(Base):
 
 class Milestone(Base):
     __tablename__ = "milestones"
+    __table_args__ = (
+        Index("ix_milestones_project", "project_id"),
+        Index("ix_milestones_open_due", "completed_at", "due_date"),  # notification scheduler
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -142,3 +191,104 @@ class Milestone(Base):
     created_at = Column(DateTime, default=func.now())
 
     project = relationship("Project", back_populates="milestones")
+
+
+class ContactImport(Base):
+    __tablename__ = "contact_imports"
+    __table_args__ = (Index("ix_contact_imports_user_created", "user_id", "created_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    filename = Column(String, default="")
+    status = Column(String, default="queued")  # queued, running, completed, failed
+    size_bytes = Column(Integer, default=0)
+    bytes_processed = Column(Integer, default=0)
+    rows_processed = Column(Integer, default=0)
+    imported = Column(Integer, default=0)
+    duplicates = Column(Integer, default=0)
+    invalid = Column(Integer, default=0)
+    error = Column(String, default="")
+    created_at = Column(DateTime, default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+    row_errors = relationship("ContactImportError", cascade="all, delete-orphan")
+
+
+class ContactImportError(Base):
+    __tablename__ = "contact_import_errors"
+    __table_args__ = (Index("ix_contact_import_errors_import", "import_id", "row"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    import_id = Column(Integer, ForeignKey("contact_imports.id", ondelete="CASCADE"), nullable=False)
+    row = Column(Integer, nullable=False)  # line number in the uploaded file, header = 1
+    email = Column(String, default="")
+    message = Column(String, nullable=False)
+
+
+class RecurringInvoice(Base):
+    __tablename__ = "recurring_invoices"
+    __table_args__ = (
+        # The scheduler's due query: status = 'active' AND next_run_date <= today
+        Index("ix_recurring_invoices_due", "status", "next_run_date", "id"),
+        Index("ix_recurring_invoices_project", "project_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    title = Column(String, default="")
+    amount = Column(Float, default=0.0)  # used when there are no items
+    currency = Column(String, default="USD")
+    notes = Column(Text, default="")
+    frequency = Column(String, default="monthly")  # monthly, quarterly
+    start_date = Column(String, nullable=False)  # YYYY-MM-DD, first period
+    end_date = Column(String, nullable=True)  # no periods start after it
+    next_run_date = Column(String, nullable=True)  # next period to invoice; NULL once ended
+    due_days = Column(Integer, default=30)
+    status = Column(String, default="active")  # active, paused, ended
+    send_to_email = Column(String, default="")  # empty: generate only, don't send
+    send_mode = Column(String, default="email_only")  # email_only, email_and_pdf
+    last_generated_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+
+    items = relationship("RecurringInvoiceItem", cascade="all, delete-orphan", order_by="RecurringInvoiceItem.id")
+
+
+class RecurringInvoiceItem(Base):
+    __tablename__ = "recurring_invoice_items"
+    __table_args__ = (Index("ix_recurring_invoice_items_recurring", "recurring_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    recurring_id = Column(Integer, ForeignKey("recurring_invoices.id", ondelete="CASCADE"), nullable=False)
+    description = Column(String, nullable=False)
+    quantity = Column(Float, default=1.0)
+    unit_price = Column(Float, default=0.0)
+
+
+class Counter(Base):
+    __tablename__ = "counters"  # named counters bumped atomically, e.g. invoice numbers
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class Notification(Base):
+    __tablename__ = "notifications"  # reminders sent by the notification scheduler, one per item and period
+    __table_args__ = (
+        Index("uq_notifications_item_period", "kind", "item_id", "period", unique=True),
+        Index("ix_notifications_user_created", "user_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String, nullable=False)  # milestone_due, invoice_overdue
+    item_id = Column(Integer, nullable=False)  # milestone or invoice id
+    period = Column(String, nullable=False)  # milestone due date, or invoice reminder date
+    channel = Column(String, nullable=False)
+    recipient = Column(String, default="")
+    subject = Column(String, default="")
+    status = Column(String, default="pending")  # pending, sent, failed
+    attempts = Column(Integer, default=1)  # sends tried; a failed one is retried up to NOTIFICATION_MAX_ATTEMPTS
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    sent_at = Column(DateTime, nullable=True)
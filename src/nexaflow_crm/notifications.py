@@ -0,0 +1,517 @@
+"""Notification scheduler: milestone-due and overdue-invoice reminders.
+
+Reminders fire at ``NOTIFY_HOUR_UTC`` on their day: ``MILESTONE_REMINDER_DAYS``
+before an open milestone is due, and for an unpaid or overdue invoice
+``INVOICE_REMINDER_DAYS_AFTER`` days after its due date, then every
+``INVOICE_REMINDER_EVERY_DAYS`` days, ``INVOICE_REMINDER_COUNT`` times in all.
+A reminder's period (its dedup key with the item) is the milestone's due date
+or the invoice reminder's day, so moving a due date schedules a fresh one.
+
+Pending reminders live in a hashed timer wheel (timer_wheel.py) holding only
+the next ``NOTIFICATION_HORIZON_HOURS``. The window is filled with indexed
+lookups of just the due dates whose reminder day falls in it
+(``ix_milestones_open_due``, ``ix_invoices_status_due``), and each refill reads
+only the slice the window moved on by, so neither table is ever scanned
+whole. Milestones and invoices changed through an ORM session in the
+scheduler's process are queued by session hooks and re-read by id on the next
+tick; set-based inserts into those tables re-read the loaded window instead.
+The app runs the scheduler in one worker only (see periodic.py), so changes
+made in the others are picked up by re-reading the whole window every
+``NOTIFICATION_RESCAN_SECONDS``; reminders already fired are not loaded again.
+
+The wheel can be stale (deletes, changes made in other workers), so every due
+reminder is checked against its current row before it goes out. Survivors
+are claimed with one ``INSERT … ON CONFLICT`` into ``notifications``, unique
+on ``(kind, item_id, period)``, and only the claimed ones are sent: a cron run or another host overlapping the scheduler still
+sends each reminder at most once. A send that fails is recorded as ``failed``
+and retried ``NOTIFICATION_RETRY_SECONDS`` later: the claim takes over a failed
+row (counting ``attempts``) until ``NOTIFICATION_MAX_ATTEMPTS``. Reminders missed while nothing ran are sent on the next
+start when at most ``NOTIFICATION_GRACE_HOURS`` late.
+
+Reminders go to the project owner through ``NOTIFICATION_CHANNEL``: ``smtp``
+(the SMTP settings invoices are sent with) or ``file``, a local stand-in that
+appends JSON lines to ``NOTIFICATION_OUTBOX``. Any object with a ``name`` and
+``send(message)`` can be passed to ``NotificationEngine`` as a channel.
+
+Set ``NOTIFICATIONS_ENABLED`` to run the scheduler inside the app, ticking
+every ``NOTIFICATION_TICK_SECONDS`` (see periodic.py);
+``python -m nexaflow_crm.notifications`` sends what is due once, e.g. from cron.
+"""
+
+import argparse
+import json
+import logging
+import os
+import smtplib
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+from email.mime.text import MIMEText
+from functools import lru_cache
+
+from sqlalchemy import bindparam, event, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from nexaflow_crm.database import SessionLocal
+from nexaflow_crm.metrics import SMTP_SEND_SECONDS
+from nexaflow_crm.models import Invoice, Milestone, Notification, Project, User
+from nexaflow_crm.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS_ENABLED = os.getenv("NOTIFICATIONS_ENABLED", "false").lower() in ("1", "true", "yes")
+NOTIFICATION_CHANNEL = os.getenv("NOTIFICATION_CHANNEL", "file")  # file or smtp
+NOTIFICATION_OUTBOX = os.getenv("NOTIFICATION_OUTBOX", "notifications.jsonl")  # file channel only
+NOTIFICATION_TICK_SECONDS = int(os.getenv("NOTIFICATION_TICK_SECONDS", "30"))
+NOTIFICATION_HORIZON_HOURS = int(os.getenv("NOTIFICATION_HORIZON_HOURS", "24"))  # how far ahead the wheel is loaded
+NOTIFICATION_GRACE_HOURS = int(os.getenv("NOTIFICATION_GRACE_HOURS", "24"))  # still send reminders this late
+NOTIFICATION_RESCAN_SECONDS = int(os.getenv("NOTIFICATION_RESCAN_SECONDS", "300"))  # re-read the window (other workers' changes)
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "500"))  # due reminders per transaction
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "3"))  # sends tried before a reminder stays failed
+NOTIFICATION_RETRY_SECONDS = int(os.getenv("NOTIFICATION_RETRY_SECONDS", "1800"))  # wait before retrying a failed send
+NOTIFY_HOUR_UTC = int(os.getenv("NOTIFY_HOUR_UTC", "8"))
+MILESTONE_REMINDER_DAYS = int(os.getenv("MILESTONE_REMINDER_DAYS", "1"))  # days before the due date
+INVOICE_REMINDER_DAYS_AFTER = int(os.getenv("INVOICE_REMINDER_DAYS_AFTER", "1"))  # days after the due date
+INVOICE_REMINDER_EVERY_DAYS = int(os.getenv("INVOICE_REMINDER_EVERY_DAYS", "7"))
+INVOICE_REMINDER_COUNT = int(os.getenv("INVOICE_REMINDER_COUNT", "3"))
+
+MILESTONE_DUE = "milestone_due"
+INVOICE_OVERDUE = "invoice_overdue"
+KINDS = (MILESTONE_DUE, INVOICE_OVERDUE)
+OPEN_INVOICE_STATUSES = ("unpaid", "overdue")
+
+_MODELS = {MILESTONE_DUE: Milestone, INVOICE_OVERDUE: Invoice}
+_KIND_OF = {model: kind for kind, model in _MODELS.items()}
+_STATE = {MILESTONE_DUE: Milestone.completed_at, INVOICE_OVERDUE: Invoice.status}
+_CHANGES = "notification_changes"  # Session.info key for the hooks
+
+
+class NotificationError(Exception):
+    """A channel could not deliver a notification."""
+
+
+@dataclass
+class Message:
+    kind: str
+    item_id: int
+    period: str
+    user_id: int
+    to: str
+    subject: str
+    body: str
+
+
+@dataclass
+class TickStats:
+    loaded: int = 0  # reminders put on the wheel
+    due: int = 0
+    sent: int = 0
+    failed: int = 0
+    skipped: int = 0  # no longer due, or already sent
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+def _parse_day(value: str | None) -> date | None:
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _fire_time(day: date) -> float:
+    return datetime(day.year, day.month, day.day, NOTIFY_HOUR_UTC, tzinfo=timezone.utc).timestamp()
+
+
+def _reminder_days(start: float, end: float) -> list[date]:
+    """Days whose reminder time falls in ``[start, end)``."""
+    day = datetime.fromtimestamp(start, timezone.utc).date()
+    days = []
+    while (fire_at := _fire_time(day)) < end:
+        if fire_at >= start:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _invoice_reminder_offsets() -> list[timedelta]:
+    return [
+        timedelta(days=INVOICE_REMINDER_DAYS_AFTER + k * INVOICE_REMINDER_EVERY_DAYS)
+        for k in range(INVOICE_REMINDER_COUNT)
+    ]
+
+
+@lru_cache(maxsize=4096)  # rows share due dates; callers must not modify the result
+def reminders(kind: str, due_date: str | None) -> dict[str, float]:
+    """Period -> fire time of every reminder for an item due on ``due_date``."""
+    due = _parse_day(due_date)
+    if due is None:
+        return {}
+    if kind == MILESTONE_DUE:
+        return {due.isoformat(): _fire_time(due - timedelta(days=MILESTONE_REMINDER_DAYS))}
+    return {(due + offset).isoformat(): _fire_time(due + offset) for offset in _invoice_reminder_offsets()}
+
+
+def _open_items(kind: str):
+    """``(id, due_date)`` of the items that can still be reminded about."""
+    if kind == MILESTONE_DUE:
+        return select(Milestone.id, Milestone.due_date).where(Milestone.completed_at.is_(None))
+    return select(Invoice.id, Invoice.due_date).where(Invoice.status.in_(OPEN_INVOICE_STATUSES))
+
+
+def _due_in(kind: str, days: list[date]):
+    """Open items with a reminder on one of ``days``: a range on the due date, or the exact due dates."""
+    if kind == MILESTONE_DUE:
+        shift = timedelta(days=MILESTONE_REMINDER_DAYS)
+        return _open_items(kind).where(
+            Milestone.due_date.between((days[0] + shift).isoformat(), (days[-1] + shift).isoformat())
+        )
+    dues = sorted({(day - offset).isoformat() for day in days for offset in _invoice_reminder_offsets()})
+    return _open_items(kind).where(Invoice.due_date.in_(dues))
+
+
+def _is_open(kind: str, state) -> bool:
+    """``state`` is a milestone's completed_at or an invoice's status."""
+    return state is None if kind == MILESTONE_DUE else state in OPEN_INVOICE_STATUSES
+
+
+# Lookups by id filter on the state in Python: with it in the WHERE clause SQLite can pick the
+# state index over the primary key and walk every open item.
+def _open_due_dates(db: Session, kind: str, item_ids: list[int]) -> dict[int, str | None]:
+    model = _MODELS[kind]
+    rows = db.execute(select(model.id, model.due_date, _STATE[kind]).where(model.id.in_(item_ids)))
+    return {item_id: due_date for item_id, due_date, state in rows if _is_open(kind, state)}
+
+
+def _current(db: Session, kind: str, item_ids: list[int]) -> dict[int, dict]:
+    """Everything a message needs, for the items in ``item_ids`` still open."""
+    if kind == MILESTONE_DUE:
+        columns = [Milestone.id, Milestone.title, Milestone.due_date]
+    else:
+        columns = [Invoice.id, Invoice.invoice_number, Invoice.amount, Invoice.currency, Invoice.due_date]
+    model = _MODELS[kind]
+    stmt = (
+        select(*columns, _STATE[kind].label("state"), Project.title.label("project"), User.id.label("user_id"), User.email)
+        .join(Project, Project.id == model.project_id)
+        .join(User, User.id == Project.user_id)
+        .where(model.id.in_(item_ids))
+    )
+    return {row.id: row._asdict() for row in db.execute(stmt) if _is_open(kind, row.state)}
+
+
+def _message(kind: str, period: str, row: dict) -> Message:
+    if kind == MILESTONE_DUE:
+        subject = f"Milestone due {row['due_date']}: {row['title']}"
+        body = f'Milestone "{row["title"]}" on project "{row["project"]}" is due on {row["due_date"]}.'
+    else:
+        number = row["invoice_number"] or f"INV-{row['id']}"
+        subject = f"Invoice {number} is overdue"
+        body = (
+            f'Invoice {number} ({row["currency"] or "USD"} {row["amount"] or 0:,.2f}) for project '
+            f'"{row["project"]}" was due on {row["due_date"]} and is still unpaid.'
+        )
+    return Message(kind, row["id"], period, row["user_id"], row["email"], subject, body)
+
+
+class FileChannel:
+    """Local stand-in for SMTP: appends each message to a JSON-lines file."""
+
+    name = "file"
+
+    def __init__(self, path: str = NOTIFICATION_OUTBOX):
+        self.path = path
+
+    def send(self, message: Message) -> None:
+        with open(self.path, "a", encoding="utf-8") as outbox:
+            outbox.write(json.dumps(asdict(message)) + "\n")
+
+
+class SmtpChannel:
+    """Plain-text mail through the SMTP server invoices are sent with."""
+
+    name = "smtp"
+
+    def send(self, message: Message) -> None:
+        # Deferred: the SMTP settings live with the invoice delivery code.
+        from nexaflow_crm.routers import invoice_workflow as mail
+
+        if not mail.SMTP_USER or not mail.SMTP_PASSWORD:
+            raise NotificationError("SMTP not configured. Set SMTP_USER and SMTP_PASSWORD environment variables.")
+        msg = MIMEText(message.body)
+        msg["Subject"] = message.subject
+        msg["From"] = mail.SMTP_FROM or mail.SMTP_USER
+        msg["To"] = message.to
+        started = time.perf_counter()
+        try:
+            with smtplib.SMTP(mail.SMTP_HOST, mail.SMTP_PORT) as server:
+                server.starttls()
+                server.login(mail.SMTP_USER, mail.SMTP_PASSWORD)
+                server.send_message(msg)
+        except Exception as e:
+            SMTP_SEND_SECONDS.observe(time.perf_counter() - started, "error")
+            raise NotificationError(f"Failed to send email: {e}")
+        SMTP_SEND_SECONDS.observe(time.perf_counter() - started, "ok")
+
+
+CHANNELS = {"file": FileChannel, "smtp": SmtpChannel}
+
+
+def make_channel(name: str = NOTIFICATION_CHANNEL):
+    if name not in CHANNELS:
+        raise ValueError(f"Unknown notification channel {name!r}; expected one of {', '.join(CHANNELS)}")
+    return CHANNELS[name]()
+
+
+class NotificationEngine:
+    """Keeps upcoming reminders on a timer wheel and sends them as they fall due.
+
+    ``tick`` must not run in two threads at once (periodic.py runs it in one);
+    ``items_changed`` may be called from any thread.
+    """
+
+    def __init__(self, channel, now: float | None = None):
+        now = time.time() if now is None else now
+        self.channel = channel
+        self.horizon = NOTIFICATION_HORIZON_HOURS * 3600
+        self.wheel = TimerWheel(max(NOTIFICATION_TICK_SECONDS, 1), self.horizon, now)
+        self._loaded_until = now - NOTIFICATION_GRACE_HOURS * 3600  # reminders due before this are loaded
+        self._periods: dict[tuple[str, int], set[str]] = defaultdict(set)  # scheduled periods per item
+        self._lock = threading.Lock()
+        self._changed: dict[str, set[int]] = defaultdict(set)
+        self._rescan: set[str] = set()
+        self._next_rescan = now + NOTIFICATION_RESCAN_SECONDS
+        self._fired: dict[tuple[str, int, str], float] = {}  # key -> when it fell due, kept for the grace period
+
+    def items_changed(self, changes: set[tuple[str, int | None]]) -> None:
+        """Queue ``(kind, item_id)`` pairs to re-read on the next tick; an item_id of None re-reads the window."""
+        with self._lock:
+            for kind, item_id in changes:
+                if item_id is None:
+                    self._rescan.add(kind)
+                else:
+                    self._changed[kind].add(item_id)
+
+    def _schedule(self, kind: str, item_id: int, due_date: str | None, start: float, end: float) -> int:
+        scheduled = 0
+        for period, fire_at in reminders(kind, due_date).items():
+            key = (kind, item_id, period)
+            if key in self._fired:
+                continue
+            if start <= fire_at < end and self.wheel.schedule(key, fire_at, key):
+                self._periods[(kind, item_id)].add(period)
+                scheduled += 1
+        return scheduled
+
+    def _unschedule(self, kind: str, item_id: int) -> None:
+        for period in self._periods.pop((kind, item_id), ()):
+            self.wheel.cancel((kind, item_id, period))
+
+    def _load(self, kinds, start: float, end: float) -> int:
+        """Put every reminder due in ``[start, end)`` on the wheel."""
+        days = _reminder_days(start, end)
+        if not days:
+            return 0
+        loaded = 0
+        with SessionLocal() as db:
+            for kind in kinds:
+                for item_id, due_date in db.execute(_due_in(kind, days)):
+                    loaded += self._schedule(kind, item_id, due_date, start, end)
+        return loaded
+
+    def _reload(self, kind: str, item_ids: set[int], start: float) -> int:
+        loaded = 0
+        ids = sorted(item_ids)
+        with SessionLocal() as db:
+            for i in range(0, len(ids), NOTIFICATION_BATCH_SIZE):
+                chunk = ids[i:i + NOTIFICATION_BATCH_SIZE]
+                due_dates = _open_due_dates(db, kind, chunk)
+                for item_id in chunk:
+                    self._unschedule(kind, item_id)
+                    loaded += self._schedule(kind, item_id, due_dates.get(item_id), start, self._loaded_until)
+        return loaded
+
+    def tick(self, now: float | None = None) -> TickStats:
+        """Apply queued changes, keep the window loaded, and send every reminder due by ``now``."""
+        now = time.time() if now is None else now
+        stats = TickStats()
+        with self._lock:
+            changed, self._changed = self._changed, defaultdict(set)
+            rescan, self._rescan = self._rescan, set()
+
+        # Changes first, so reminders they cancel or move never fire; both stay within the loaded window.
+        earliest = now - NOTIFICATION_GRACE_HOURS * 3600
+        if NOTIFICATION_RESCAN_SECONDS > 0 and now >= self._next_rescan:
+            rescan = set(KINDS)
+            self._next_rescan = now + NOTIFICATION_RESCAN_SECONDS
+            self._fired = {key: at for key, at in self._fired.items() if at >= earliest}
+        if rescan:
+            stats.loaded += self._load(sorted(rescan), earliest, self._loaded_until)
+        for kind, item_ids in changed.items():
+            if kind not in rescan:
+                stats.loaded += self._reload(kind, item_ids, earliest)
+        # Expiring moves the wheel on, so it reaches a full horizon past now for the top-up.
+        due = self.wheel.advance(now)
+        # Top up once half the window has gone by; only the new slice is read.
+        if self._loaded_until < now + self.horizon / 2:
+            end = min(now + self.horizon, self.wheel.horizon_end)
+            stats.loaded += self._load(KINDS, max(self._loaded_until, earliest), end)
+            self._loaded_until = end
+        # Plus whatever was just loaded already due (startup catch-up, changed items)
+        due = list(dict.fromkeys(due + self.wheel.advance(now)))
+
+        stats.due = len(due)
+        for kind, item_id, period in due:
+            self._fired[(kind, item_id, period)] = now
+            periods = self._periods.get((kind, item_id))
+            if periods is not None:
+                periods.discard(period)
+                if not periods:
+                    del self._periods[(kind, item_id)]
+        retry = []
+        for i in range(0, len(due), NOTIFICATION_BATCH_SIZE):
+            retry.extend(self._send(due[i:i + NOTIFICATION_BATCH_SIZE], stats))
+        for key in retry:
+            if self.wheel.schedule(key, now + NOTIFICATION_RETRY_SECONDS, key):
+                self._periods[key[:2]].add(key[2])
+        if stats.due:
+            logger.info("Notifications: %s", stats.as_dict())
+        return stats
+
+    def _send(self, due: list[tuple[str, int, str]], stats: TickStats) -> list[tuple[str, int, str]]:
+        """Claim and send ``due``. Returns the failed ones with attempts left."""
+        with SessionLocal() as db:
+            messages = []
+            for kind in KINDS:
+                keys = [(item_id, period) for key_kind, item_id, period in due if key_kind == kind]
+                if not keys:
+                    continue
+                rows = _current(db, kind, sorted({item_id for item_id, _ in keys}))
+                for item_id, period in keys:
+                    row = rows.get(item_id)
+                    # Completed, paid, deleted or rescheduled since it was loaded
+                    if row is None or period not in reminders(kind, row["due_date"]):
+                        stats.skipped += 1
+                        continue
+                    messages.append(_message(kind, period, row))
+            if not messages:
+                return []
+
+            # Core statements on the table: no ORM bookkeeping for rows nothing here loads.
+            table = Notification.__table__
+            claim = insert(table)
+            claim = (
+                claim.on_conflict_do_update(
+                    index_elements=["kind", "item_id", "period"],
+                    set_={
+                        "status": "pending",
+                        "attempts": table.c.attempts + 1,
+                        "channel": claim.excluded.channel,
+                        "recipient": claim.excluded.recipient,
+                        "subject": claim.excluded.subject,
+                    },
+                    # Only a failed send with attempts left is taken over; pending and sent rows stay claimed.
+                    where=(table.c.status == "failed") & (table.c.attempts < NOTIFICATION_MAX_ATTEMPTS),
+                )
+                .returning(table.c.id, table.c.kind, table.c.item_id, table.c.period, table.c.attempts)
+            )
+            claimed = {
+                (kind, item_id, period): (notification_id, attempts)
+                for notification_id, kind, item_id, period, attempts in db.execute(claim, [
+                    {
+                        "user_id": m.user_id, "kind": m.kind, "item_id": m.item_id, "period": m.period,
+                        "channel": self.channel.name, "recipient": m.to, "subject": m.subject, "status": "pending",
+                    }
+                    for m in messages
+                ])
+            }
+            db.commit()
+
+            results = []
+            retry = []
+            for message in messages:
+                key = (message.kind, message.item_id, message.period)
+                if key not in claimed:
+                    stats.skipped += 1  # sent by an earlier run or another worker, or out of attempts
+                    continue
+                notification_id, attempts = claimed[key]
+                try:
+                    self.channel.send(message)
+                except Exception as exc:
+                    stats.failed += 1
+                    logger.warning("Notification %s:%s:%s not sent (attempt %d): %s", *key, attempts, exc)
+                    if attempts < NOTIFICATION_MAX_ATTEMPTS:
+                        retry.append(key)
+                    results.append({"notification_id": notification_id, "status": "failed", "error": str(exc), "sent_at": None})
+                else:
+                    stats.sent += 1
+                    results.append({"notification_id": notification_id, "status": "sent", "error": None, "sent_at": datetime.now(timezone.utc)})
+            if results:
+                db.execute(update(table).where(table.c.id == bindparam("notification_id")), results)
+                db.commit()
+            return retry
+
+
+_engine: NotificationEngine | None = None
+
+
+def _collect_flushed(session: Session, flush_context) -> None:
+    # Still the pre-flush collections here, but new rows already have their ids.
+    changes = session.info.setdefault(_CHANGES, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        kind = _KIND_OF.get(type(obj))
+        if kind is not None and obj.id is not None:
+            changes.add((kind, obj.id))
+
+
+def _collect_bulk(state) -> None:
+    # Set-based INSERTs (batch creates, recurring generation) name no single items. Set-based UPDATEs
+    # here (overdue sweep, invoice numbering) never change whether or when a reminder is due.
+    if state.is_insert and state.bind_mapper is not None:
+        kind = _KIND_OF.get(state.bind_mapper.class_)
+        if kind is not None:
+            state.session.info.setdefault(_CHANGES, set()).add((kind, None))
+
+
+def _apply_committed(session: Session) -> None:
+    changes = session.info.pop(_CHANGES, None)
+    if changes and _engine is not None:
+        _engine.items_changed(changes)
+
+
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_CHANGES, None)
+
+
+def start_engine() -> NotificationEngine | None:
+    """The app's scheduler, hooked to milestone and invoice changes; None unless NOTIFICATIONS_ENABLED."""
+    global _engine
+    if not NOTIFICATIONS_ENABLED:
+        return None
+    if _engine is None:
+        _engine = NotificationEngine(make_channel())
+        event.listen(SessionLocal, "after_flush", _collect_flushed)
+        event.listen(SessionLocal, "do_orm_execute", _collect_bulk)
+        event.listen(SessionLocal, "after_commit", _apply_committed)
+        event.listen(SessionLocal, "after_rollback", _discard_rolled_back)
+    return _engine
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Send milestone and overdue-invoice reminders that are due.")
+    parser.add_argument("--channel", choices=sorted(CHANNELS), default=NOTIFICATION_CHANNEL)
+    args = parser.parse_args(argv)
+
+    from nexaflow_crm.database import engine
+    from nexaflow_crm.schema import ensure_schema
+
+    ensure_schema(engine)
+    print(json.dumps(NotificationEngine(make_channel(args.channel)).tick().as_dict()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+"""Overdue sweep: unpaid invoices past their due date become ``overdue``.
+
+Readers (the dashboard, ``?status=overdue`` lists) filter on the stored
+status instead of comparing due dates on every request. The sweep never
+loads invoices: each batch is one ``UPDATE … RETURNING id`` over up to
+``OVERDUE_SWEEP_BATCH_SIZE`` invoices found through ``ix_invoices_status_due``
+(``status = 'unpaid' AND due_date < today``), then one ``INSERT … SELECT``
+that writes an ``invoice_overdue`` entry per transitioned invoice to the
+communication log, committed together. Only invoices still unpaid match, so
+each transition is logged once however often — or in however many workers
+at once — the sweep runs.
+
+Moving an overdue invoice's due date to today or later puts it back to
+``unpaid`` (``reopen_if_not_due``, called by the invoice update routes), so
+the sweep can mark it overdue again once the new date passes.
+
+The app sweeps at startup and every ``OVERDUE_SWEEP_INTERVAL_SECONDS``;
+``python -m nexaflow_crm.overdue`` sweeps once, e.g. from cron.
+"""
+
+import argparse
+import logging
+import os
+from datetime import date, datetime, timezone
+
+from sqlalchemy import String, cast, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from nexaflow_crm.database import SessionLocal
+from nexaflow_crm.models import CommunicationLog, Invoice, Project
+
+logger = logging.getLogger(__name__)
+
+OVERDUE_SWEEP_INTERVAL_SECONDS = int(os.getenv("OVERDUE_SWEEP_INTERVAL_SECONDS", "3600"))  # 0: cron only
+OVERDUE_SWEEP_BATCH_SIZE = int(os.getenv("OVERDUE_SWEEP_BATCH_SIZE", "5000"))  # invoices per transaction
+
+
+def _due(today: date):
+    # due_date > '' keeps both bounds on the indexed column; invoices without a due date never go overdue.
+    return Invoice.status == "unpaid", Invoice.due_date > "", Invoice.due_date < today.isoformat()
+
+
+def reopen_if_not_due(invoice: Invoice, fields: dict, today: date | None = None) -> None:
+    """After an edit that set ``fields``: an overdue invoice whose new due date has not passed is unpaid again.
+
+    An explicit ``status`` in the same edit wins.
+    """
+    if "due_date" not in fields or "status" in fields or invoice.status != "overdue":
+        return
+    today = today or datetime.now(timezone.utc).date()
+    if not invoice.due_date or invoice.due_date >= today.isoformat():
+        invoice.status = "unpaid"
+
+
+def _log_transitions(db: Session, invoice_ids: list[int]) -> None:
+    number = func.coalesce(Invoice.invoice_number, literal("INV-") + cast(Invoice.id, String))
+    entries = (
+        select(
+            Project.user_id,
+            Project.contact_id,
+            Invoice.project_id,
+            Invoice.id,
+            literal("invoice_overdue"),
+            literal("Invoice ") + number + " is overdue (due " + Invoice.due_date + ")",
+            func.now(),
+        )
+        .join(Project, Project.id == Invoice.project_id)
+        .where(Invoice.id.in_(invoice_ids))
+    )
+    db.execute(
+        insert(CommunicationLog).from_select(
+            ["user_id", "contact_id", "project_id", "invoice_id", "type", "summary", "created_at"], entries
+        )
+    )
+
+
+def sweep_overdue(today: date | None = None) -> int:
+    """Mark unpaid invoices due before ``today`` (default: today, UTC) overdue. Returns how many changed."""
+    today = today or datetime.now(timezone.utc).date()
+    batch = select(Invoice.id).where(*_due(today)).limit(OVERDUE_SWEEP_BATCH_SIZE)
+    stmt = (
+        update(Invoice)
+        .where(Invoice.id.in_(batch.scalar_subquery()))
+        .values(status="overdue")
+        .returning(Invoice.id)
+        .execution_options(synchronize_session=False)
+    )
+    total = 0
+    db = SessionLocal()
+    try:
+        while invoice_ids := db.scalars(stmt).all():
+            _log_transitions(db, invoice_ids)
+            db.commit()
+            total += len(invoice_ids)
+    finally:
+        db.close()
+    if total:
+        logger.info("Marked %d invoice(s) overdue", total)
+    return total
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Mark unpaid invoices past their due date overdue.")
+    parser.add_argument("--date", type=date.fromisoformat, help="Sweep as of this day (default: today, UTC)")
+    args = parser.parse_args(argv)
+
+    from nexaflow_crm.database import engine
+    from nexaflow_crm.schema import ensure_schema
+
+    ensure_schema(engine)
+    print(sweep_overdue(args.date))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+"""Keyset (cursor) pagination shared by the list endpoints.
+
+Lists are ordered by ``(created_at DESC, id DESC)``. Passing the opaque
+``cursor`` from the previous page's ``X-Next-Cursor`` header seeks straight to
+the next rows through the ``(…, created_at, id)`` indexes, so every page costs
+the same. ``page`` still works (OFFSET) for older clients.
+"""
+
+import base64
+import json
+
+from fastapi import HTTPException, Response
+from sqlalchemy import String, tuple_, type_coerce
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    """``created_at`` is the column's stored text, compared as-is on the next page."""
+    raw = json.dumps([created_at, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(q, created_col, id_col, *, cursor: str | None, page: int, page_size: int, response: Response):
+    """Return one page of ``q`` and set ``X-Next-Cursor`` when more rows follow."""
+    stored = type_coerce(created_col, String)
+    q = q.order_by(created_col.desc(), id_col.desc())
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        # Row-value comparison lets SQLite seek the index instead of filtering row by row.
+        q = q.filter(tuple_(stored, id_col) < tuple_(created_at, last_id))
+    else:
+        q = q.offset((page - 1) * page_size)
+
+    # The cursor carries the stored text itself: re-formatting the datetime can differ from it
+    # (e.g. a missing ".000000"), which would skip rows tied on the boundary timestamp.
+    result = q.session.execute(q.add_columns(stored.label("cursor_created_at")).limit(page_size + 1).statement)
+    width = len(result.keys()) - 1
+    fetched = result.freeze()
+    rows = fetched().columns(*range(width)).all()
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(fetched.data[page_size - 1][-1], rows[-1].id)
+    return rows
@@ -0,0 +1,19 @@
+"""Shared query-parameter parsing for batch endpoints."""
+
+from fastapi import HTTPException, Query
+
+MAX_BATCH_IDS = 100
+MAX_BATCH_OPERATIONS = 500
+
+
+def batch_ids(ids: str = Query(..., description="Comma-separated ids")) -> list[int]:
+    """Parse ``?ids=1,2,3`` into unique ints, capped at MAX_BATCH_IDS."""
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not parsed:
+        raise HTTPException(status_code=400, detail="ids is required")
+    if len(parsed) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return parsed
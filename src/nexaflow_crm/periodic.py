@@ -0,0 +1,116 @@
+"""Background jobs the app runs on a timer, for deployments without cron.
+
+Only one worker process on the host runs them: the first to take an
+exclusive ``flock`` on ``SCHEDULER_LOCK_PATH`` becomes the leader, and the
+others retry every ``SCHEDULER_LOCK_RETRY_SECONDS`` so one of them takes over
+if the leader exits. The kernel drops the lock with the process, so a crashed
+leader never leaves it stuck. The jobs (the recurring invoice run, the overdue
+sweep, the notification scheduler) are safe to run concurrently anyway — a
+cron run or a second host may overlap — but one runner per host keeps every
+worker from contending for the same write locks.
+
+Each job runs on the threadpool right after the worker becomes leader and
+then every ``interval`` seconds. On shutdown a job that is running is allowed
+to finish (up to ``timeout`` seconds) instead of being abandoned mid-batch.
+``SCHEDULER_ENABLED=false`` turns the in-app jobs off, e.g. when cron runs
+them.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+def _default_lock_path() -> str:
+    shm = Path("/dev/shm")
+    return str((shm if shm.is_dir() else Path(tempfile.gettempdir())) / "nexaflow-scheduler.lock")
+
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+SCHEDULER_LOCK_PATH = os.getenv("SCHEDULER_LOCK_PATH", _default_lock_path())
+SCHEDULER_LOCK_RETRY_SECONDS = int(os.getenv("SCHEDULER_LOCK_RETRY_SECONDS", "60"))
+
+Job = tuple[float, Callable[[], object]]
+
+
+async def run_every(interval: float, job: Callable[[], object], stopping: asyncio.Event) -> None:
+    while not stopping.is_set():
+        try:
+            await run_in_threadpool(job)
+        except Exception:
+            logger.exception("Periodic job %s failed", job.__qualname__)
+        try:
+            await asyncio.wait_for(stopping.wait(), interval)
+        except TimeoutError:
+            pass
+
+
+class Scheduler:
+    """Runs the jobs from ``make_jobs`` in whichever worker holds the scheduler lock.
+
+    ``make_jobs`` is called once leadership is taken, so per-process state the
+    jobs need (e.g. the notification engine's session hooks) exists only in
+    the leader.
+    """
+
+    def __init__(self, make_jobs: Callable[[], list[Job]], lock_path: str = SCHEDULER_LOCK_PATH):
+        self.make_jobs = make_jobs
+        self.lock_path = lock_path
+        self._lock_file = None
+        self._stopping = asyncio.Event()
+        self._leader_task: asyncio.Task | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_file is not None
+
+    def _try_lock(self) -> bool:
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file  # held, and the lock with it, for the life of the process
+        return True
+
+    def start(self) -> None:
+        """Begin competing for the lock. Call from an async startup handler."""
+        if SCHEDULER_ENABLED:
+            self._leader_task = asyncio.create_task(self._lead())
+
+    async def _lead(self) -> None:
+        while not self._try_lock():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), SCHEDULER_LOCK_RETRY_SECONDS)
+                return
+            except TimeoutError:
+                pass
+        logger.info("Worker %d runs the periodic jobs", os.getpid())
+        self._tasks = [
+            asyncio.create_task(run_every(interval, job, self._stopping))
+            for interval, job in self.make_jobs()
+            if interval > 0
+        ]
+
+    async def stop(self, timeout: float) -> None:
+        """Let running jobs finish (cancelling any still going after ``timeout`` seconds), then release the lock."""
+        self._stopping.set()
+        tasks = [task for task in (self._leader_task, *self._tasks) if task is not None]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                logger.warning("Periodic job still running after %ss, cancelling", timeout)
+                task.cancel()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
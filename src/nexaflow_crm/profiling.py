@@ -0,0 +1,184 @@
+"""Opt-in statistical profiler for single API requests.
+
+While a profiled request is in flight a background thread samples every
+thread's stack (``sys._current_frames``) each ``PROFILER_INTERVAL_MS`` and
+keeps the stacks that are running that route's endpoint or one of its
+dependencies — sync routes execute on threadpool workers, so the request can't
+be pinned to one thread. Samples are written in the collapsed ("folded")
+format read by ``flamegraph.pl``, speedscope and inferno, one file per request
+named after the route and user.
+
+A request is profiled when ``PROFILER_ENABLED`` is set and either it carries
+``X-Profile`` (``1`` in development; ``$PROFILER_TOKEN`` otherwise) or it is
+picked by ``PROFILER_SAMPLE_RATE``. One request is profiled at a time.
+"""
+
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from nexaflow_crm.auth import token_user_id
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN", "")
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "2"))
+PROFILER_OUTPUT_DIR = Path(os.getenv("PROFILER_OUTPUT_DIR", "profiles"))
+IS_DEVELOPMENT = os.getenv("ENV", "development") == "development"
+
+PROFILE_HEADER = "x-profile"
+PROFILE_FILE_HEADER = "X-Profile-File"
+
+_busy = threading.Lock()
+
+
+def _dependant_codes(route) -> set:
+    """Code objects of the route's endpoint and every (sub)dependency."""
+    codes = set()
+    pending = [getattr(route, "dependant", None)]
+    while pending:
+        dependant = pending.pop()
+        if dependant is None:
+            continue
+        code = getattr(dependant.call, "__code__", None)
+        if code is not None:
+            codes.add(code)
+        pending.extend(dependant.dependencies)
+    endpoint = getattr(getattr(route, "endpoint", None), "__code__", None)
+    if endpoint is not None:
+        codes.add(endpoint)
+    return codes
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    for marker in ("site-packages/", "nexaflow_crm/"):
+        if marker in path:
+            path = path.split(marker, 1)[1]
+            break
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_") or "root"
+
+
+class ProfileSession:
+    def __init__(self, scope: Scope, user_id: int | None, interval: float = PROFILER_INTERVAL_MS / 1000):
+        self.scope = scope
+        self.user_id = user_id
+        self.interval = interval
+        self.stacks: Counter[tuple] = Counter()
+        self.codes: set | None = None
+        self.path: Path | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def output_path(self) -> Path:
+        if self.path is None:
+            route = getattr(self.scope.get("route"), "path", None) or self.scope["path"]
+            user = f"user{self.user_id}" if self.user_id is not None else "anonymous"
+            stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+            name = f"{stamp}-{self.scope['method']}-{_slug(route)}-{user}-{uuid.uuid4().hex[:6]}.folded"
+            self.path = PROFILER_OUTPUT_DIR / name
+        return self.path
+
+    def _sample(self, own: int) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack.reverse()
+            # Keep from the outermost frame belonging to this route; drop server/threadpool plumbing.
+            for depth, code in enumerate(stack):
+                if code in self.codes:
+                    self.stacks[tuple(stack[depth:])] += 1
+                    break
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        try:
+            while not self._stop.wait(self.interval):
+                if self.codes is None:
+                    route = self.scope.get("route")
+                    if route is None:
+                        continue  # not routed yet
+                    self.codes = _dependant_codes(route)
+                self._sample(own)
+            self._write()
+        finally:
+            _busy.release()
+
+    def _write(self) -> None:
+        route = getattr(self.scope.get("route"), "path", None) or self.scope["path"]
+        root = f"{self.scope['method']} {route}".replace(";", ",")
+        labels: dict = {}
+        lines = []
+        for stack, count in self.stacks.most_common():
+            frames = [labels.get(code) or labels.setdefault(code, _frame_label(code)) for code in stack]
+            lines.append(";".join([root, *frames]) + f" {count}")
+        path = self.output_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n" if lines else "")
+
+
+def _requested(headers: Headers) -> bool:
+    value = headers.get(PROFILE_HEADER)
+    if value is None:
+        return False
+    if PROFILER_TOKEN and hmac.compare_digest(value.encode(), PROFILER_TOKEN.encode()):
+        return True
+    return IS_DEVELOPMENT and value.lower() in ("1", "true", "yes")
+
+
+class ProfilerMiddleware:
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not (_requested(headers) or (PROFILER_SAMPLE_RATE and random.random() < PROFILER_SAMPLE_RATE)):
+            await self.app(scope, receive, send)
+            return
+        if not _busy.acquire(blocking=False):
+            await self.app(scope, receive, send)  # another request is being profiled
+            return
+
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        session = ProfileSession(scope, token_user_id(token) if scheme.lower() == "bearer" and token else None)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[PROFILE_FILE_HEADER] = session.output_path().name
+            await send(message)
+
+        session.start()  # releases _busy once the file is written
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session.stop()
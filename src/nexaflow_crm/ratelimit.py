@@ -0,0 +1,222 @@
+"""Token-bucket rate limiting shared by every worker process on the host.
+
+Buckets live in a small SQLite database (on ``/dev/shm`` when available, so
+it is effectively shared memory) opened in WAL mode without fsync. Taking a
+token is a single atomic ``INSERT … ON CONFLICT DO UPDATE … RETURNING``: the
+bucket is refilled for the time elapsed since its last update and debited only
+if a whole token is available, so all workers see one consistent budget per
+client and rule. A take costs tens of microseconds but may wait on another
+worker's write lock, so the middleware runs it on the threadpool rather than
+the event loop; if the store is busy or broken the request is let through
+rather than failed.
+
+Rules are matched on method and path before routing, first match wins:
+
+    POST /api/auth/login      RATE_LIMIT_LOGIN     (default 5/minute)
+    POST /api/auth/register   RATE_LIMIT_REGISTER  (default 10/hour)
+    /api/track/*              not limited (mail clients share proxy IPs)
+    GET/HEAD /api/*           RATE_LIMIT_READ      (default 600/minute)
+    other /api/*              RATE_LIMIT_WRITE     (default 120/minute)
+"""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+def _default_storage() -> str:
+    shm = Path("/dev/shm")
+    return str((shm if shm.is_dir() else Path(tempfile.gettempdir())) / "nexaflow-ratelimit.db")
+
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "") or _default_storage()
+RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "5/minute")
+RATE_LIMIT_REGISTER = os.getenv("RATE_LIMIT_REGISTER", "10/hour")
+RATE_LIMIT_READ = os.getenv("RATE_LIMIT_READ", "600/minute")
+RATE_LIMIT_WRITE = os.getenv("RATE_LIMIT_WRITE", "120/minute")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_PURGE_EVERY = 10_000  # takes between sweeps of idle (full) buckets
+
+
+@dataclass(frozen=True)
+class Limit:
+    """``capacity`` requests per ``period`` seconds, refilled continuously."""
+
+    capacity: int
+    period: float
+
+    @classmethod
+    def parse(cls, text: str) -> "Limit":
+        """Parse ``"5/minute"``, ``"100/hour"`` and the like (slowapi-style)."""
+        try:
+            count, unit = text.strip().split("/")
+            return cls(int(count), _PERIODS[unit.strip().lower().rstrip("s")])
+        except (ValueError, KeyError):
+            raise ValueError(f"Invalid rate limit {text!r}; expected e.g. '5/minute'")
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def __str__(self) -> str:
+        unit = next((name for name, seconds in _PERIODS.items() if seconds == self.period), f"{self.period:g}s")
+        return f"{self.capacity} per {unit}"
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    limit: Limit | None  # None: exempt
+    path: str
+    methods: frozenset[str] | None = None  # None: any method
+    prefix: bool = False
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.methods is not None and method not in self.methods:
+            return False
+        return path.startswith(self.path) if self.prefix else path == self.path
+
+
+def default_rules() -> list[Rule]:
+    return [
+        Rule("login", Limit.parse(RATE_LIMIT_LOGIN), "/api/auth/login", frozenset({"POST"})),
+        Rule("register", Limit.parse(RATE_LIMIT_REGISTER), "/api/auth/register", frozenset({"POST"})),
+        Rule("tracking", None, "/api/track/", prefix=True),
+        Rule("read", Limit.parse(RATE_LIMIT_READ), "/api/", frozenset({"GET", "HEAD", "OPTIONS"}), prefix=True),
+        Rule("write", Limit.parse(RATE_LIMIT_WRITE), "/api/", prefix=True),
+    ]
+
+
+class SqliteBucketStore:
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS buckets ("
+        "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, allowed INTEGER NOT NULL"
+        ") WITHOUT ROWID"
+    )
+    # Refill for the elapsed time (capped at capacity), then debit only if a whole token is there.
+    _TAKE = """
+        INSERT INTO buckets (key, tokens, updated, allowed) VALUES (:key, :capacity - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = min(:capacity, tokens + max(0, :now - updated) * :rate)
+                     - (min(:capacity, tokens + max(0, :now - updated) * :rate) >= 1),
+            allowed = min(:capacity, tokens + max(0, :now - updated) * :rate) >= 1,
+            updated = max(updated, :now)
+        RETURNING allowed, tokens
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_STORAGE, busy_timeout: float = 0.25):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._takes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(self._SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, limit: Limit, now: float | None = None) -> tuple[bool, float]:
+        """Take one token from ``key``'s bucket. Returns (allowed, tokens left)."""
+        now = time.time() if now is None else now
+        conn = self._conn()
+        allowed, tokens = conn.execute(
+            self._TAKE, {"key": key, "capacity": limit.capacity, "rate": limit.rate, "now": now}
+        ).fetchone()
+        self._takes += 1
+        if self._takes % _PURGE_EVERY == 0:
+            self.purge(now)
+        return bool(allowed), tokens
+
+    def purge(self, now: float | None = None, idle_seconds: float = 86400) -> None:
+        """Drop buckets untouched for a day — they would be full again anyway."""
+        now = time.time() if now is None else now
+        self._conn().execute("DELETE FROM buckets WHERE updated < ?", (now - idle_seconds,))
+
+    def reset(self) -> None:
+        self._conn().execute("DELETE FROM buckets")
+
+
+@dataclass(frozen=True)
+class Decision:
+    rule: Rule
+    allowed: bool
+    retry_after: float
+
+
+class RateLimiter:
+    def __init__(self, rules: list[Rule] | None = None, store: SqliteBucketStore | None = None, enabled: bool = RATE_LIMIT_ENABLED):
+        self.rules = default_rules() if rules is None else rules
+        self.store = store or SqliteBucketStore()
+        self.enabled = enabled
+
+    def rule_for(self, method: str, path: str) -> Rule | None:
+        for rule in self.rules:
+            if rule.matches(method, path):
+                return rule
+        return None
+
+    def check(self, method: str, path: str, client: str) -> Decision | None:
+        """None when no limit applies (or the store is unavailable)."""
+        rule = self.rule_for(method, path)
+        if rule is None or rule.limit is None:
+            return None
+        try:
+            allowed, tokens = self.store.take(f"{rule.name}:{client}", rule.limit)
+        except sqlite3.Error:
+            logger.warning("Rate limit store unavailable, allowing request", exc_info=True)
+            return None
+        retry_after = 0.0 if allowed else (1 - tokens) / rule.limit.rate
+        return Decision(rule, allowed, retry_after)
+
+
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+        rule = self.limiter.rule_for(scope["method"], scope["path"])
+        if rule is None or rule.limit is None:
+            await self.app(scope, receive, send)
+            return
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        # The take can block on SQLite's busy timeout while another worker holds the write lock.
+        decision = await run_in_threadpool(self.limiter.check, scope["method"], scope["path"], client)
+        if decision is None or decision.allowed:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": f"Rate limit exceeded: {decision.rule.limit}"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(decision.retry_after))).encode()),
+                (b"x-ratelimit-limit", str(decision.rule.limit).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
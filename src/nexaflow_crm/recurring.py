@@ -0,0 +1,241 @@
+"""Recurring invoice generation.
+
+A template (``recurring_invoices``) bills a project every month or quarter
+from its ``start_date``; ``next_run_date`` is the start of the next period
+still to invoice. ``run_due`` finds due templates with one indexed query
+(``status = 'active' AND next_run_date <= today`` on
+``ix_recurring_invoices_due``) and works through them ``RECURRING_BATCH_SIZE``
+at a time. Each batch is one transaction: the invoices for every due period go
+in as one multi-row ``INSERT … ON CONFLICT DO NOTHING RETURNING``, invoice
+numbers for the new rows are reserved as one block, line items go in with one
+executemany and the templates move on to their next period. Templates that
+send (``send_to_email``) are emailed after the batch commits.
+
+Periods missed while nothing ran are generated on the next run, oldest first
+(``RECURRING_MAX_CATCHUP`` per template per batch; later batches pick up the
+rest). The unique ``(recurring_id, period)`` index makes this idempotent: a
+period that already has an invoice — from an overlapping run in another
+worker, or a run that stopped before moving its template on — is skipped,
+never duplicated.
+
+Run it from cron (``python -m nexaflow_crm.recurring``) or set
+``RECURRING_INTERVAL_SECONDS`` to run it inside the app (see periodic.py).
+"""
+
+import argparse
+import calendar
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, selectinload
+
+from nexaflow_crm.database import SessionLocal
+from nexaflow_crm.invoice_numbers import allocate_invoice_numbers
+from nexaflow_crm.models import Invoice, InvoiceLineItem, RecurringInvoice, User
+
+logger = logging.getLogger(__name__)
+
+RECURRING_BATCH_SIZE = int(os.getenv("RECURRING_BATCH_SIZE", "200"))  # templates per transaction
+RECURRING_MAX_CATCHUP = int(os.getenv("RECURRING_MAX_CATCHUP", "12"))  # periods per template per transaction
+RECURRING_INTERVAL_SECONDS = int(os.getenv("RECURRING_INTERVAL_SECONDS", "0"))  # 0: run from cron instead
+
+FREQUENCY_MONTHS = {"monthly": 1, "quarterly": 3}
+
+
+@dataclass
+class RunStats:
+    templates: int = 0  # templates that had periods due
+    generated: int = 0  # invoices created
+    skipped: int = 0  # periods that already had an invoice
+    sent: int = 0
+    send_failed: int = 0
+    _template_ids: set[int] = field(default_factory=set, repr=False)
+
+    def as_dict(self) -> dict[str, int]:
+        return {name: value for name, value in asdict(self).items() if not name.startswith("_")}
+
+
+def add_months(day: date, months: int) -> date:
+    """``day`` moved by whole months, clamped to the end of shorter months."""
+    index = day.month - 1 + months
+    year, month = day.year + index // 12, index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _period(start: date, frequency: str, k: int) -> date:
+    # Always counted from the start date, so a 31st keeps coming back after a short month.
+    return add_months(start, k * FREQUENCY_MONTHS[frequency])
+
+
+def _period_index(start: date, frequency: str, day: date) -> int:
+    """Index of the first period starting on or after ``day``."""
+    months = (day.year - start.year) * 12 + day.month - start.month
+    k = max(0, months // FREQUENCY_MONTHS[frequency] - 1)
+    while _period(start, frequency, k) < day:
+        k += 1
+    return k
+
+
+def first_period_on_or_after(template: RecurringInvoice, day: date) -> date:
+    start = date.fromisoformat(template.start_date)
+    return _period(start, template.frequency, _period_index(start, template.frequency, day))
+
+
+def due_periods(template: RecurringInvoice, today: date, limit: int) -> tuple[list[date], date | None]:
+    """Periods to invoice now (oldest first, at most ``limit``) and the next one after them (None once past end_date)."""
+    start = date.fromisoformat(template.start_date)
+    end = date.fromisoformat(template.end_date) if template.end_date else None
+    k = _period_index(start, template.frequency, date.fromisoformat(template.next_run_date))
+    periods: list[date] = []
+    while True:
+        period = _period(start, template.frequency, k)
+        if end is not None and period > end:
+            return periods, None
+        if period > today or len(periods) >= limit:
+            return periods, period
+        periods.append(period)
+        k += 1
+
+
+def period_label(period: date, frequency: str) -> str:
+    if frequency == "monthly":
+        return f"{period:%B %Y}"
+    last = add_months(period, FREQUENCY_MONTHS[frequency]) - timedelta(days=1)
+    return f"{period:%b %Y} – {last:%b %Y}"
+
+
+def _invoice_row(template: RecurringInvoice, period: date) -> dict:
+    if template.items:
+        amount = round(sum(round(item.quantity * item.unit_price, 2) for item in template.items), 2)
+    else:
+        amount = template.amount
+    label = period_label(period, template.frequency)
+    return {
+        "project_id": template.project_id,
+        "amount": amount,
+        "status": "unpaid",
+        "due_date": (period + timedelta(days=template.due_days or 0)).isoformat(),
+        "currency": template.currency,
+        "title": f"{template.title} — {label}" if template.title else label,
+        "notes": template.notes,
+        "recurring_id": template.id,
+        "period": period.isoformat(),
+    }
+
+
+def _generate_batch(db: Session, templates: list[RecurringInvoice], today: date, stats: RunStats) -> list[int]:
+    """Invoice the due periods of ``templates`` in the current transaction. Returns the new invoices to email."""
+    rows = []
+    now = datetime.now(timezone.utc)
+    for template in templates:
+        periods, next_run = due_periods(template, today, RECURRING_MAX_CATCHUP)
+        rows.extend(_invoice_row(template, period) for period in periods)
+        template.next_run_date = next_run.isoformat() if next_run else None
+        if next_run is None:
+            template.status = "ended"
+        if periods:
+            template.last_generated_at = now
+            stats._template_ids.add(template.id)
+            stats.templates = len(stats._template_ids)
+    if not rows:
+        return []
+
+    stmt = (
+        insert(Invoice)
+        .on_conflict_do_nothing(index_elements=["recurring_id", "period"])
+        .returning(Invoice.id, Invoice.recurring_id)
+    )
+    created = sorted(db.execute(stmt, rows).all())  # by id: numbers follow insertion order
+    stats.generated += len(created)
+    stats.skipped += len(rows) - len(created)
+    if not created:
+        return []
+
+    numbers = allocate_invoice_numbers(db, len(created))
+    db.execute(update(Invoice), [{"id": invoice_id, "invoice_number": number} for (invoice_id, _), number in zip(created, numbers)])
+    by_id = {template.id: template for template in templates}
+    items = [
+        {
+            "invoice_id": invoice_id,
+            "description": item.description,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "total": round(item.quantity * item.unit_price, 2),
+        }
+        for invoice_id, recurring_id in created
+        for item in by_id[recurring_id].items
+    ]
+    if items:
+        db.execute(insert(InvoiceLineItem), items)
+    return [invoice_id for invoice_id, recurring_id in created if by_id[recurring_id].send_to_email]
+
+
+def _send(db: Session, invoice_ids: list[int], stats: RunStats) -> None:
+    # Deferred: pulls in the SMTP and PDF code, which only sending templates need.
+    from nexaflow_crm.routers.invoice_workflow import InvoiceDeliveryError, email_invoice
+
+    for invoice_id in invoice_ids:
+        invoice = db.get(Invoice, invoice_id)
+        template = db.get(RecurringInvoice, invoice.recurring_id)
+        user = db.get(User, template.user_id)
+        try:
+            email_invoice(db, invoice, user, template.send_to_email, template.send_mode)
+            stats.sent += 1
+        except InvoiceDeliveryError as exc:
+            db.rollback()
+            stats.send_failed += 1
+            logger.warning("Recurring invoice %s not sent: %s", invoice.invoice_number, exc)
+
+
+def run_due(today: date | None = None, user_id: int | None = None) -> RunStats:
+    """Invoice every period due up to ``today`` (default: today, UTC), optionally for one user's templates only.
+
+    Blocking, with its own session; safe to run from several processes at once.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    stats = RunStats()
+    to_send: list[int] = []
+    db = SessionLocal()
+    try:
+        stmt = (
+            select(RecurringInvoice)
+            .where(RecurringInvoice.status == "active", RecurringInvoice.next_run_date <= today.isoformat())
+            .order_by(RecurringInvoice.next_run_date, RecurringInvoice.id)
+            .limit(RECURRING_BATCH_SIZE)
+            .options(selectinload(RecurringInvoice.items))
+        )
+        if user_id is not None:
+            stmt = stmt.where(RecurringInvoice.user_id == user_id)
+        # Every batch moves each of its templates past at least one period, so this ends.
+        while templates := db.scalars(stmt).all():
+            to_send.extend(_generate_batch(db, templates, today, stats))
+            db.commit()
+        if to_send:
+            _send(db, to_send, stats)
+    finally:
+        db.close()
+    if stats.templates:
+        logger.info("Recurring invoices: %s", stats.as_dict())
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate due recurring invoices.")
+    parser.add_argument("--date", type=date.fromisoformat, help="Generate as of this day (default: today, UTC)")
+    args = parser.parse_args(argv)
+
+    from nexaflow_crm.database import engine
+    from nexaflow_crm.schema import ensure_schema
+
+    ensure_schema(engine)
+    print(json.dumps(run_due(args.date).as_dict()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
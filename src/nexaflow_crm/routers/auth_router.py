@@ -1,7 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from nexaflow_crm.auth import create_access_token, get_current_user, hash_password, verify_password
+from nexaflow_crm.auth import (
+    create_access_token,
+    get_current_user_record,
+    hash_password_async,
+    invalidate_principal,
+    password_needs_rehash,
+    verify_password_async,
+)
 from nexaflow_crm.database import get_db
 from nexaflow_crm.models import User
 from nexaflow_crm.schemas import LoginRequest, Token, UserCreate, UserOut, UserUpdate
@@ -9,32 +17,48 @@ from nexaflow_crm.schemas import LoginRequest, Token, UserCreate, UserOut, UserU
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
 
 
-@router.post("/register", response_model=Token)
-def register(data: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == data.email).first():
-        raise HTTPException(status_code=400, detail="Email already registered")
-    user = User(email=data.email, name=data.name, hashed_password=hash_password(data.password))
+def _find_user(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _save_user(db: Session, user: User) -> tuple[int, str]:
     db.add(user)
     db.commit()
     db.refresh(user)
-    return Token(access_token=create_access_token(user.id))
+    return user.id, user.preferred_currency
+
+
+# register/login are async so bcrypt waits on its own executor instead of holding a
+# request thread; the short DB calls are pushed to the threadpool explicitly.
+@router.post("/register", response_model=Token)
+async def register(data: UserCreate, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_find_user, db, data.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    hashed = await hash_password_async(data.password)
+    user = User(email=data.email, name=data.name, hashed_password=hashed)
+    user_id, currency = await run_in_threadpool(_save_user, db, user)
+    return Token(access_token=create_access_token(user_id, currency))
 
 
 @router.post("/login", response_model=Token)
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not verify_password(data.password, user.hashed_password):
+async def login(data: LoginRequest, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, data.email)
+    if not user or not await verify_password_async(data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    return Token(access_token=create_access_token(user.id))
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(data.password)
+        user_id, currency = await run_in_threadpool(_save_user, db, user)
+    else:
+        user_id, currency = user.id, user.preferred_currency
+    return Token(access_token=create_access_token(user_id, currency))
 
 
 @router.get("/me", response_model=UserOut)
-def me(user: User = Depends(get_current_user)):
+def me(user: User = Depends(get_current_user_record)):
     return user
 
 
-@router.put("/me", response_model=UserOut)
-def update_me(data: UserUpdate, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def _update_profile(db: Session, user: User, data: UserUpdate, hashed_password: str | None) -> User:
     if data.name is not None:
         user.name = data.name
     if data.email is not None:
@@ -42,10 +66,18 @@ def update_me(data: UserUpdate, user: User = Depends(get_current_user), db: Sess
         if existing:
             raise HTTPException(status_code=400, detail="Email already in use")
         user.email = data.email
-    if data.password is not None:
-        user.hashed_password = hash_password(data.password)
+    if hashed_password is not None:
+        user.hashed_password = hashed_password
     if data.preferred_currency is not None:
         user.preferred_currency = data.preferred_currency
     db.commit()
     db.refresh(user)
+    invalidate_principal(user.id)
     return user
+
+
+# Async like register/login, so a password change hashes on the bounded bcrypt executor.
+@router.put("/me", response_model=UserOut)
+async def update_me(data: UserUpdate, user: User = Depends(get_current_user_record), db: Session = Depends(get_db)):
+    hashed = await hash_password_async(data.password) if data.password is not None else None
+    return await run_in_threadpool(_update_profile, db, user, data, hashed)
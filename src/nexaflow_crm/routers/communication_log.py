@@ -1,46 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from nexaflow_crm.auth import get_current_user
 from nexaflow_crm.database import get_db
+from nexaflow_crm.export import export_response
 from nexaflow_crm.models import CommunicationLog, Contact, Project, User
+from nexaflow_crm.pagination import keyset_page
 from nexaflow_crm.schemas import CommunicationLogCreate, CommunicationLogOut
+from nexaflow_crm.serialization import rows_response, schema_columns
 
 router = APIRouter(tags=["Communication Log"])
 
+_LOG_COLUMNS = schema_columns(CommunicationLogOut, CommunicationLog)
+
+
+def _get_user_contact(contact_id: int, db: Session, user: User) -> Contact:
+    contact = db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user.id).first()
+    if not contact:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return contact
+
+
+def _get_user_project(project_id: int, db: Session, user: User) -> Project:
+    project = db.query(Project).filter(Project.id == project_id, Project.user_id == user.id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+
+def _history_export(scope_column, scope_id: int, user_id: int, name: str):
+    """The full timeline, newest first, streamed as NDJSON."""
+    stmt = (
+        select(*_LOG_COLUMNS)
+        .where(scope_column == scope_id, CommunicationLog.user_id == user_id)
+        .order_by(CommunicationLog.created_at.desc(), CommunicationLog.id.desc())
+    )
+    return export_response(stmt, "ndjson", name)
+
 
 @router.get("/api/contacts/{contact_id}/history", response_model=list[CommunicationLogOut])
 def contact_history(
     contact_id: int,
+    response: Response,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    contact = db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user.id).first()
-    if not contact:
-        raise HTTPException(status_code=404, detail="Contact not found")
-    return (
-        db.query(CommunicationLog)
-        .filter(CommunicationLog.contact_id == contact_id, CommunicationLog.user_id == user.id)
-        .order_by(CommunicationLog.created_at.desc())
-        .all()
+    _get_user_contact(contact_id, db, user)
+    q = db.query(*_LOG_COLUMNS).filter(CommunicationLog.contact_id == contact_id, CommunicationLog.user_id == user.id)
+    rows = keyset_page(
+        q, CommunicationLog.created_at, CommunicationLog.id,
+        cursor=cursor, page=page, page_size=page_size, response=response,
     )
+    return rows_response(rows, response)
+
+
+@router.get("/api/contacts/{contact_id}/history/export")
+def export_contact_history(
+    contact_id: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    _get_user_contact(contact_id, db, user)
+    return _history_export(CommunicationLog.contact_id, contact_id, user.id, f"contact-{contact_id}-history")
 
 
 @router.get("/api/projects/{project_id}/history", response_model=list[CommunicationLogOut])
 def project_history(
     project_id: int,
+    response: Response,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    project = db.query(Project).filter(Project.id == project_id, Project.user_id == user.id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return (
-        db.query(CommunicationLog)
-        .filter(CommunicationLog.project_id == project_id, CommunicationLog.user_id == user.id)
-        .order_by(CommunicationLog.created_at.desc())
-        .all()
+    _get_user_project(project_id, db, user)
+    q = db.query(*_LOG_COLUMNS).filter(CommunicationLog.project_id == project_id, CommunicationLog.user_id == user.id)
+    rows = keyset_page(
+        q, CommunicationLog.created_at, CommunicationLog.id,
+        cursor=cursor, page=page, page_size=page_size, response=response,
     )
+    return rows_response(rows, response)
+
+
+@router.get("/api/projects/{project_id}/history/export")
+def export_project_history(
+    project_id: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    _get_user_project(project_id, db, user)
+    return _history_export(CommunicationLog.project_id, project_id, user.id, f"project-{project_id}-history")
 
 
 @router.post("/api/communication-log", response_model=CommunicationLogOut, status_code=201)
@@ -0,0 +1,104 @@
+import contextlib
+import os
+import tempfile
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from nexaflow_crm import contact_import
+from nexaflow_crm.auth import get_current_user
+from nexaflow_crm.database import get_db
+from nexaflow_crm.export import export_response
+from nexaflow_crm.models import ContactImport, ContactImportError, User
+from nexaflow_crm.schemas import ContactImportOut
+
+router = APIRouter(prefix="/api/contacts/import", tags=["Contacts"])
+
+
+def _get_user_job(job_id: int, db: Session, user: User) -> ContactImport:
+    job = db.query(ContactImport).filter(ContactImport.id == job_id, ContactImport.user_id == user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
+
+
+async def _spool(request: Request, max_bytes: int) -> tuple[str, int]:
+    """Write the request body to a temporary file as it arrives. Returns (path, size)."""
+    fd, path = tempfile.mkstemp(prefix="nexaflow-import-", suffix=".csv")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"CSV larger than {contact_import.CONTACT_IMPORT_MAX_MB:g} MB")
+                fh.write(chunk)
+        if not size:
+            raise HTTPException(status_code=400, detail="Empty upload")
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+        raise
+    return path, size
+
+
+# Async so the upload streams to disk on the event loop; DB work and the import itself
+# go to the threadpool (see auth_router for the same split).
+@router.post("", response_model=ContactImportOut, status_code=202)
+async def import_contacts(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    filename: str = "",
+    background: bool = True,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Import contacts from a CSV sent as the raw request body (``Content-Type: text/csv``).
+
+    Recognized columns: name (or first/last name), email, phone, company, tags,
+    notes. Rows whose email matches an existing contact are skipped as
+    duplicates. With ``background=true`` (default) this returns the queued job
+    at once; poll ``GET /api/contacts/import/{id}`` for progress.
+    """
+    if request.headers.get("content-type", "").startswith("multipart/"):
+        raise HTTPException(status_code=415, detail="Send the CSV file as the raw request body")
+    path, size = await _spool(request, int(contact_import.CONTACT_IMPORT_MAX_MB * 1024 * 1024))
+    job = await run_in_threadpool(contact_import.create_job, db, user.id, filename, size)
+    if background:
+        background_tasks.add_task(contact_import.run_import, job.id, path)
+        return job
+    await run_in_threadpool(contact_import.run_import, job.id, path)
+    await run_in_threadpool(db.refresh, job)
+    response.status_code = 200
+    return job
+
+
+@router.get("", response_model=list[ContactImportOut])
+def list_imports(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    return (
+        db.query(ContactImport)
+        .filter(ContactImport.user_id == user.id)
+        .order_by(ContactImport.created_at.desc(), ContactImport.id.desc())
+        .limit(20)
+        .all()
+    )
+
+
+@router.get("/{job_id}", response_model=ContactImportOut)
+def get_import(job_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    return _get_user_job(job_id, db, user)
+
+
+@router.get("/{job_id}/errors")
+def import_errors(job_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Rejected and duplicate rows as CSV, in file order."""
+    _get_user_job(job_id, db, user)
+    stmt = (
+        select(ContactImportError.row, ContactImportError.email, ContactImportError.message.label("error"))
+        .where(ContactImportError.import_id == job_id)
+        .order_by(ContactImportError.row)
+    )
+    return export_response(stmt, "csv", f"contact-import-{job_id}-errors")
@@ -1,38 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session
 
+from nexaflow_crm import fulltext
 from nexaflow_crm.auth import get_current_user
+from nexaflow_crm.batch import BatchTarget, run_batch
 from nexaflow_crm.database import get_db
-from nexaflow_crm.models import Contact, User
-from nexaflow_crm.schemas import ContactCreate, ContactOut, ContactUpdate
+from nexaflow_crm.export import ExportFormat, export_response
+from nexaflow_crm.models import Contact, ContactTag, Project, ProjectContact, User
+from nexaflow_crm.pagination import keyset_page
+from nexaflow_crm.schemas import BatchRequest, BatchResponse, ContactCreate, ContactOut, ContactUpdate, TagCount
+from nexaflow_crm.serialization import rows_response, schema_columns
+from nexaflow_crm.tag_service import filter_by_tags, parse_tags, sync_contact_tags, sync_many_contact_tags, tag_counts
 
 router = APIRouter(prefix="/api/contacts", tags=["Contacts"])
 
+_LIST_COLUMNS = schema_columns(ContactOut, Contact)
+
+
+def _filter_contacts(q, user: User, search: str | None, tags: str | None, tag_match: str):
+    """Filters shared by the list and export endpoints.
+
+    Returns (query, ranked); a ranked query is already ordered by search relevance.
+    """
+    tag_names = parse_tags(tags)
+    if tag_names:
+        q = filter_by_tags(q, Contact, user.id, tag_names, tag_match)
+    if search:
+        ranked = fulltext.filter_contacts(q, Contact, search) if fulltext.fts_enabled else None
+        if ranked is not None:
+            return ranked, True
+        safe_search = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        q = q.filter(Contact.name.ilike(f"%{safe_search}%"))
+    return q, False
+
+
+def _delete_contacts(db: Session, contact_ids: list[int]) -> None:
+    """Delete contacts with their tag and team rows; projects keep going without a client."""
+    db.execute(delete(ContactTag).where(ContactTag.contact_id.in_(contact_ids)))
+    db.execute(delete(ProjectContact).where(ProjectContact.contact_id.in_(contact_ids)))
+    db.execute(update(Project).where(Project.contact_id.in_(contact_ids)).values(contact_id=None))
+    db.execute(delete(Contact).where(Contact.id.in_(contact_ids)))
+
+
+def _owned_contacts(db: Session, user_id: int, contact_ids: list[int]) -> dict[int, Contact]:
+    if not contact_ids:
+        return {}
+    return {c.id: c for c in db.query(Contact).filter(Contact.user_id == user_id, Contact.id.in_(contact_ids))}
+
+
+def _reindex_tags(db: Session, user_id: int, written: list[tuple[Contact, dict]]) -> None:
+    sync_many_contact_tags(db, user_id, [contact for contact, fields in written if "tags" in fields])
+
+
+_BATCH = BatchTarget(
+    model=Contact,
+    label="Contact",
+    create_schema=ContactCreate,
+    update_schema=ContactUpdate,
+    out_schema=ContactOut,
+    load_owned=_owned_contacts,
+    values=lambda user_id, fields: {"user_id": user_id, **fields},
+    delete=_delete_contacts,
+    after_flush=_reindex_tags,
+)
+
 
 @router.get("", response_model=list[ContactOut])
 def list_contacts(
+    response: Response,
     search: str | None = None,
+    tags: str | None = None,
+    tag_match: Literal["any", "all"] = "any",
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    q = db.query(Contact).filter(Contact.user_id == user.id)
-    if search:
-        safe_search = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
-        q = q.filter(Contact.name.ilike(f"%{safe_search}%"))
-    return q.order_by(Contact.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
+    q, ranked = _filter_contacts(db.query(*_LIST_COLUMNS).filter(Contact.user_id == user.id), user, search, tags, tag_match)
+    if ranked:
+        # Relevance-ranked results page by offset; cursors only follow the default ordering.
+        return rows_response(q.offset((page - 1) * page_size).limit(page_size).all())
+    rows = keyset_page(q, Contact.created_at, Contact.id, cursor=cursor, page=page, page_size=page_size, response=response)
+    return rows_response(rows, response)
+
+
+@router.get("/export")
+def export_contacts(
+    fmt: ExportFormat = Query("csv", alias="format"),
+    search: str | None = None,
+    tags: str | None = None,
+    tag_match: Literal["any", "all"] = "any",
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Every contact matching the list filters, streamed as CSV or NDJSON."""
+    q, ranked = _filter_contacts(db.query(*_LIST_COLUMNS).filter(Contact.user_id == user.id), user, search, tags, tag_match)
+    if not ranked:
+        q = q.order_by(Contact.created_at.desc(), Contact.id.desc())
+    return export_response(q.statement, fmt, "contacts")
+
+
+@router.get("/tags", response_model=list[TagCount])
+def list_tag_counts(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    return tag_counts(db, user.id)
 
 
 @router.post("", response_model=ContactOut, status_code=201)
 def create_contact(data: ContactCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     contact = Contact(user_id=user.id, **data.model_dump())
     db.add(contact)
+    sync_contact_tags(db, contact)
     db.commit()
     db.refresh(contact)
     return contact
 
 
+@router.post("/batch", response_model=BatchResponse)
+def batch_contacts(data: BatchRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Create, update and delete many contacts in one transaction, with a result per operation."""
+    return run_batch(db, user.id, data, _BATCH)
+
+
 @router.get("/{contact_id}", response_model=ContactOut)
 def get_contact(contact_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     contact = db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user.id).first()
@@ -46,8 +138,11 @@ def update_contact(contact_id: int, data: ContactUpdate, db: Session = Depends(g
     contact = db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user.id).first()
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
-    for field, value in data.model_dump(exclude_unset=True).items():
+    updates = data.model_dump(exclude_unset=True)
+    for field, value in updates.items():
         setattr(contact, field, value)
+    if "tags" in updates:
+        sync_contact_tags(db, contact)
     db.commit()
     db.refresh(contact)
     return contact
@@ -58,5 +153,5 @@ def delete_contact(contact_id: int, db: Session = Depends(get_db), user: User =
     contact = db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user.id).first()
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
-    db.delete(contact)
+    _delete_contacts(db, [contact.id])
     db.commit()
@@ -53,9 +53,10 @@ def get_dashboard(db: Session = Depends(get_db), user: User = Depends(get_curren
     for inv in user_invoices:
         inv_currency = inv.currency or "USD"
         converted = convert_amount(inv.amount or 0, inv_currency, target_currency, db)
-        if inv.status == "unpaid":
+        # The overdue sweep (overdue.py) moves unpaid invoices past due to "overdue"; both are outstanding.
+        if inv.status in ("unpaid", "overdue"):
             unpaid += converted
-            if inv.due_date and inv.due_date < today_str:
+            if inv.status == "overdue":
                 overdue_invoices += 1
         elif inv.status == "paid":
             paid += converted
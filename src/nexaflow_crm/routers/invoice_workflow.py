@@ -1,6 +1,7 @@
 import io
 import os
 import smtplib
+import time
 import uuid
 from datetime import datetime, timezone
 from email.mime.application import MIMEApplication
@@ -10,10 +11,11 @@ from email.mime.text import MIMEText
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import HTMLResponse, Response
 from sqlalchemy.orm import Session
-from xhtml2pdf import pisa
 
-from nexaflow_crm.auth import get_current_user
+from nexaflow_crm.auth import get_current_user, get_current_user_record
 from nexaflow_crm.database import get_db
+from nexaflow_crm.invoice_numbers import allocate_invoice_numbers
+from nexaflow_crm.metrics import PDF_RENDER_SECONDS, SMTP_SEND_SECONDS
 from nexaflow_crm.models import (
     CommunicationLog,
     Invoice,
@@ -44,10 +46,9 @@ def _get_user_invoice(invoice_id: int, db: Session, user: User) -> Invoice:
     return invoice
 
 
-def _ensure_invoice_number(invoice: Invoice, db: Session, user: User) -> str:
+def _ensure_invoice_number(invoice: Invoice, db: Session) -> str:
     if not invoice.invoice_number:
-        count = db.query(Invoice).join(Project).filter(Project.user_id == user.id).count()
-        invoice.invoice_number = f"INV-{count:04d}"
+        invoice.invoice_number = allocate_invoice_numbers(db, 1)[0]
         db.commit()
     return invoice.invoice_number
 
@@ -254,21 +255,93 @@ def _generate_invoice_html(invoice: Invoice, user: User, base_url: str = "", for
 
 
 def _html_to_pdf(html: str) -> bytes:
+    from xhtml2pdf import pisa  # ~1s to import (reportlab, pyhanko); only PDF routes need it
+
     buffer = io.BytesIO()
-    pisa.CreatePDF(io.StringIO(html), dest=buffer)
+    with PDF_RENDER_SECONDS.time():
+        pisa.CreatePDF(io.StringIO(html), dest=buffer)
     return buffer.getvalue()
 
 
+class InvoiceDeliveryError(Exception):
+    """SMTP is not configured, or the server refused the message."""
+
+
+def email_invoice(
+    db: Session,
+    invoice: Invoice,
+    user: User,
+    to_email: str,
+    mode: str = "email_only",
+    html: str | None = None,
+    pdf_bytes: bytes | None = None,
+) -> None:
+    """Email a numbered invoice, then record the send on it and in the communication log (commits).
+
+    Used by the send endpoint and by the recurring invoice scheduler. ``html`` and
+    ``pdf_bytes`` are rendered here unless the caller already has them.
+    """
+    if not SMTP_USER or not SMTP_PASSWORD:
+        raise InvoiceDeliveryError("SMTP not configured. Set SMTP_USER and SMTP_PASSWORD environment variables.")
+
+    if not invoice.tracking_token:
+        invoice.tracking_token = str(uuid.uuid4())
+    if html is None:
+        html = _generate_invoice_html(invoice, user, os.getenv("BASE_URL", "https://crm.zuhdi.id"))
+
+    msg = MIMEMultipart("mixed")
+    msg["Subject"] = f"Invoice {invoice.invoice_number}" + (f" — {invoice.title}" if invoice.title else "")
+    msg["From"] = SMTP_FROM or SMTP_USER
+    msg["To"] = to_email
+
+    # HTML body
+    msg.attach(MIMEText(html, "html"))
+
+    # Attach PDF if mode is email_and_pdf
+    if mode == "email_and_pdf":
+        if pdf_bytes is None:
+            pdf_bytes = _html_to_pdf(_generate_invoice_html(invoice, user, for_pdf=True))
+        pdf_attachment = MIMEApplication(pdf_bytes, _subtype="pdf")
+        pdf_attachment.add_header("Content-Disposition", "attachment", filename=f"{invoice.invoice_number}.pdf")
+        msg.attach(pdf_attachment)
+
+    started = time.perf_counter()
+    try:
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
+            server.starttls()
+            server.login(SMTP_USER, SMTP_PASSWORD)
+            server.send_message(msg)
+    except Exception as e:
+        SMTP_SEND_SECONDS.observe(time.perf_counter() - started, "error")
+        raise InvoiceDeliveryError(f"Failed to send email: {str(e)}")
+
+    SMTP_SEND_SECONDS.observe(time.perf_counter() - started, "ok")
+
+    invoice.sent_at = datetime.now(timezone.utc)
+    invoice.sent_to_email = to_email
+
+    log = CommunicationLog(
+        user_id=user.id,
+        contact_id=None,
+        project_id=invoice.project_id,
+        invoice_id=invoice.id,
+        type="invoice_sent",
+        summary=f"Invoice {invoice.invoice_number} sent to {to_email}" + (" with PDF attached" if mode == "email_and_pdf" else ""),
+    )
+    db.add(log)
+    db.commit()
+
+
 # --- Endpoints ---
 
 @router.get("/api/invoices/{invoice_id}/preview", response_class=HTMLResponse)
 def preview_invoice(
     invoice_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: User = Depends(get_current_user_record),
 ):
     invoice = _get_user_invoice(invoice_id, db, user)
-    _ensure_invoice_number(invoice, db, user)
+    _ensure_invoice_number(invoice, db)
     return _generate_invoice_html(invoice, user)
 
 
@@ -276,10 +349,10 @@ def preview_invoice(
 def download_pdf(
     invoice_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: User = Depends(get_current_user_record),
 ):
     invoice = _get_user_invoice(invoice_id, db, user)
-    _ensure_invoice_number(invoice, db, user)
+    _ensure_invoice_number(invoice, db)
     html = _generate_invoice_html(invoice, user, for_pdf=True)
     pdf_bytes = _html_to_pdf(html)
     filename = f"{invoice.invoice_number or f'INV-{invoice.id}'}.pdf"
@@ -296,10 +369,10 @@ def send_invoice(
     to_email: str = Query(...),
     mode: str = Query("email_only", pattern="^(email_only|pdf_only|email_and_pdf)$"),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: User = Depends(get_current_user_record),
 ):
     invoice = _get_user_invoice(invoice_id, db, user)
-    _ensure_invoice_number(invoice, db, user)
+    _ensure_invoice_number(invoice, db)
 
     # Generate tracking token
     if not invoice.tracking_token:
@@ -320,45 +393,10 @@ def send_invoice(
             headers={"Content-Disposition": f'inline; filename="{filename}"'},
         )
 
-    # Email modes
-    if not SMTP_USER or not SMTP_PASSWORD:
-        raise HTTPException(status_code=500, detail="SMTP not configured. Set SMTP_USER and SMTP_PASSWORD environment variables.")
-
-    msg = MIMEMultipart("mixed")
-    msg["Subject"] = f"Invoice {invoice.invoice_number}" + (f" — {invoice.title}" if invoice.title else "")
-    msg["From"] = SMTP_FROM or SMTP_USER
-    msg["To"] = to_email
-
-    # HTML body
-    msg.attach(MIMEText(html, "html"))
-
-    # Attach PDF if mode is email_and_pdf
-    if mode == "email_and_pdf":
-        pdf_attachment = MIMEApplication(pdf_bytes, _subtype="pdf")
-        pdf_attachment.add_header("Content-Disposition", "attachment", filename=f"{invoice.invoice_number}.pdf")
-        msg.attach(pdf_attachment)
-
     try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.send_message(msg)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
-
-    invoice.sent_at = datetime.now(timezone.utc)
-    invoice.sent_to_email = to_email
-
-    log = CommunicationLog(
-        user_id=user.id,
-        contact_id=None,
-        project_id=invoice.project_id,
-        invoice_id=invoice.id,
-        type="invoice_sent",
-        summary=f"Invoice {invoice.invoice_number} sent to {to_email}" + (" with PDF attached" if mode == "email_and_pdf" else ""),
-    )
-    db.add(log)
-    db.commit()
+        email_invoice(db, invoice, user, to_email, mode, html=html, pdf_bytes=pdf_bytes)
+    except InvoiceDeliveryError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
     result["message"] = "Invoice sent" + (" with PDF" if mode == "email_and_pdf" else "")
     return result
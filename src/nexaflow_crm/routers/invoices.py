@@ -1,30 +1,102 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 
+from nexaflow_crm import overdue
 from nexaflow_crm.auth import get_current_user
+from nexaflow_crm.batch import BatchTarget, Reference, run_batch
 from nexaflow_crm.database import get_db
-from nexaflow_crm.models import Invoice, Project, User
-from nexaflow_crm.schemas import InvoiceCreate, InvoiceOut, InvoiceUpdate
+from nexaflow_crm.export import ExportFormat, export_response
+from nexaflow_crm.models import Contact, Invoice, InvoiceLineItem, Project, User
+from nexaflow_crm.pagination import keyset_page
+from nexaflow_crm.schemas import BatchRequest, BatchResponse, InvoiceCreate, InvoiceOut, InvoiceUpdate
+from nexaflow_crm.serialization import rows_response, schema_columns
 
 router = APIRouter(prefix="/api/invoices", tags=["Invoices"])
 
+_LIST_COLUMNS = schema_columns(InvoiceOut, Invoice)
+_EXPORT_COLUMNS = (
+    *_LIST_COLUMNS,
+    Project.title.label("project_title"),
+    Contact.name.label("contact_name"),
+    Contact.email.label("contact_email"),
+)
+
+
+def _filter_invoices(q, status: str | None):
+    """Filters shared by the list and export endpoints."""
+    if status:
+        q = q.filter(Invoice.status == status)
+    return q
+
+
+def _owned_invoices(db: Session, user_id: int, invoice_ids: list[int]) -> dict[int, Invoice]:
+    if not invoice_ids:
+        return {}
+    rows = db.query(Invoice).join(Project).filter(Project.user_id == user_id, Invoice.id.in_(invoice_ids))
+    return {invoice.id: invoice for invoice in rows}
+
+
+def _delete_invoices(db: Session, invoice_ids: list[int]) -> None:
+    db.execute(delete(InvoiceLineItem).where(InvoiceLineItem.invoice_id.in_(invoice_ids)))
+    db.execute(delete(Invoice).where(Invoice.id.in_(invoice_ids)))
+
+
+def _reopen_rescheduled(db: Session, user_id: int, written: list[tuple[Invoice, dict]]) -> None:
+    for invoice, fields in written:
+        overdue.reopen_if_not_due(invoice, fields)
+
+
+_BATCH = BatchTarget(
+    model=Invoice,
+    label="Invoice",
+    create_schema=InvoiceCreate,
+    update_schema=InvoiceUpdate,
+    out_schema=InvoiceOut,
+    load_owned=_owned_invoices,
+    values=lambda user_id, fields: fields,
+    delete=_delete_invoices,
+    references=(Reference("project_id", Project, "Project"),),
+    after_flush=_reopen_rescheduled,
+)
+
 
 @router.get("", response_model=list[InvoiceOut])
 def list_invoices(
+    response: Response,
     status: str | None = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     q = (
-        db.query(Invoice)
-        .join(Project)
+        db.query(*_LIST_COLUMNS)
+        .join(Project, Project.id == Invoice.project_id)
         .filter(Project.user_id == user.id)
     )
-    if status:
-        q = q.filter(Invoice.status == status)
-    return q.order_by(Invoice.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
+    q = _filter_invoices(q, status)
+    rows = keyset_page(q, Invoice.created_at, Invoice.id, cursor=cursor, page=page, page_size=page_size, response=response)
+    return rows_response(rows, response)
+
+
+@router.get("/export")
+def export_invoices(
+    fmt: ExportFormat = Query("csv", alias="format"),
+    status: str | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Every invoice matching the list filters with project and client, streamed as CSV or NDJSON."""
+    q = (
+        db.query(*_EXPORT_COLUMNS)
+        .join(Project, Project.id == Invoice.project_id)
+        .outerjoin(Contact, Contact.id == Project.contact_id)
+        .filter(Project.user_id == user.id)
+    )
+    q = _filter_invoices(q, status).order_by(Invoice.created_at.desc(), Invoice.id.desc())
+    return export_response(q.statement, fmt, "invoices")
 
 
 @router.post("", response_model=InvoiceOut, status_code=201)
@@ -39,6 +111,15 @@ def create_invoice(data: InvoiceCreate, db: Session = Depends(get_db), user: Use
     return invoice
 
 
+@router.post("/batch", response_model=BatchResponse)
+def batch_invoices(data: BatchRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Create, update and delete many invoices in one transaction, with a result per operation.
+
+    E.g. mark reconciled invoices paid: ``{"operations": [{"op": "update", "id": 7, "data": {"status": "paid"}}, ...]}``.
+    """
+    return run_batch(db, user.id, data, _BATCH)
+
+
 @router.get("/{invoice_id}", response_model=InvoiceOut)
 def get_invoice(invoice_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     invoice = (
@@ -62,8 +143,10 @@ def update_invoice(invoice_id: int, data: InvoiceUpdate, db: Session = Depends(g
     )
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
-    for field, value in data.model_dump(exclude_unset=True).items():
+    fields = data.model_dump(exclude_unset=True)
+    for field, value in fields.items():
         setattr(invoice, field, value)
+    overdue.reopen_if_not_due(invoice, fields)
     db.commit()
     db.refresh(invoice)
     return invoice
@@ -0,0 +1,47 @@
+import hmac
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from nexaflow_crm import metrics, slow_queries
+
+router = APIRouter(tags=["Metrics"])
+
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+FORWARDING_HEADERS = ("x-forwarded-for", "forwarded")
+
+
+def _authorize(request: Request) -> None:
+    if metrics.METRICS_TOKEN:
+        scheme, _, supplied = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(supplied.encode(), metrics.METRICS_TOKEN.encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    elif (
+        request.client is None
+        or request.client.host not in LOOPBACK_HOSTS
+        # Proxied: the loopback address may be the proxy's (or spoofed via a trusted one).
+        or any(name in request.headers for name in FORWARDING_HEADERS)
+    ):
+        raise HTTPException(status_code=403, detail="Metrics are only served to direct localhost clients without METRICS_TOKEN")
+
+
+# async so threadpool gauges are read on the event loop without taking a worker thread
+@router.get("/metrics", include_in_schema=False)
+async def scrape(request: Request):
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    _authorize(request)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/metrics/slow-queries", include_in_schema=False)
+async def slow_query_summary(
+    request: Request,
+    sort: str = Query("total", pattern="^(total|max|count)$"),
+    limit: int = Query(20, ge=1, le=200),
+):
+    """Worst statements seen by this worker since start (see ``python -m nexaflow_crm.slow_queries``)."""
+    if not slow_queries.SLOW_QUERY_MS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    _authorize(request)
+    return {"threshold_ms": slow_queries.SLOW_QUERY_MS, "statements": slow_queries.stats.top(limit, sort)}
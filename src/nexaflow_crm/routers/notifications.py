@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+
+from nexaflow_crm.auth import get_current_user
+from nexaflow_crm.database import get_db
+from nexaflow_crm.models import Notification, User
+from nexaflow_crm.pagination import keyset_page
+from nexaflow_crm.schemas import NotificationOut
+from nexaflow_crm.serialization import rows_response, schema_columns
+
+router = APIRouter(prefix="/api/notifications", tags=["Notifications"])
+
+_NOTIFICATION_COLUMNS = schema_columns(NotificationOut, Notification)
+
+
+@router.get("", response_model=list[NotificationOut])
+def list_notifications(
+    response: Response,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    q = db.query(*_NOTIFICATION_COLUMNS).filter(Notification.user_id == user.id)
+    rows = keyset_page(
+        q, Notification.created_at, Notification.id,
+        cursor=cursor, page=page, page_size=page_size, response=response,
+    )
+    return rows_response(rows, response)
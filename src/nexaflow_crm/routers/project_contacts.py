@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from nexaflow_crm.auth import get_current_user
 from nexaflow_crm.database import get_db
 from nexaflow_crm.models import Contact, Project, ProjectContact, User
+from nexaflow_crm.params import batch_ids
 from nexaflow_crm.schemas import ProjectContactCreate, ProjectContactOut, ProjectContactUpdate
 
 router = APIRouter(tags=["Project Contacts"])
@@ -16,6 +18,46 @@ def _get_user_project(project_id: int, db: Session, user: User) -> Project:
     return project
 
 
+def _team_rows(db: Session, *criteria) -> list[dict]:
+    """ProjectContactOut-shaped rows with contact name/email joined in one query."""
+    stmt = (
+        select(
+            ProjectContact.id,
+            ProjectContact.project_id,
+            ProjectContact.contact_id,
+            ProjectContact.role,
+            Contact.name.label("contact_name"),
+            Contact.email.label("contact_email"),
+            ProjectContact.created_at,
+        )
+        .outerjoin(Contact, Contact.id == ProjectContact.contact_id)
+        .where(*criteria)
+        .order_by(ProjectContact.id)
+    )
+    rows = []
+    for row in db.execute(stmt):
+        entry = row._asdict()
+        entry["contact_name"] = entry["contact_name"] or ""
+        entry["contact_email"] = entry["contact_email"] or ""
+        rows.append(entry)
+    return rows
+
+
+@router.get("/api/projects/teams", response_model=dict[int, list[ProjectContactOut]])
+def list_project_teams(
+    ids: list[int] = Depends(batch_ids),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Team rosters for many projects at once, keyed by project id. Unknown ids are omitted."""
+    owned = db.scalars(select(Project.id).where(Project.id.in_(ids), Project.user_id == user.id)).all()
+    teams: dict[int, list[dict]] = {project_id: [] for project_id in owned}
+    if teams:
+        for row in _team_rows(db, ProjectContact.project_id.in_(teams)):
+            teams[row["project_id"]].append(row)
+    return teams
+
+
 @router.post("/api/projects/{project_id}/contacts", response_model=ProjectContactOut, status_code=201)
 def assign_contact(
     project_id: int,
@@ -49,8 +91,7 @@ def list_project_contacts(
     user: User = Depends(get_current_user),
 ):
     _get_user_project(project_id, db, user)
-    pcs = db.query(ProjectContact).filter(ProjectContact.project_id == project_id).all()
-    return [_enrich_pc(pc) for pc in pcs]
+    return _team_rows(db, ProjectContact.project_id == project_id)
 
 
 @router.put("/api/projects/{project_id}/contacts/{contact_id}", response_model=ProjectContactOut)
@@ -101,8 +142,7 @@ def list_contact_projects(
     contact = db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user.id).first()
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
-    pcs = db.query(ProjectContact).filter(ProjectContact.contact_id == contact_id).all()
-    return [_enrich_pc(pc) for pc in pcs]
+    return _team_rows(db, ProjectContact.contact_id == contact_id)
 
 
 def _enrich_pc(pc: ProjectContact) -> dict:
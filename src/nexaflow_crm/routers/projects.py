@@ -1,29 +1,109 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, case, delete, func, select
+from sqlalchemy.orm import Session, joinedload
 
 from nexaflow_crm.auth import get_current_user
+from nexaflow_crm.batch import BatchTarget, Reference, run_batch
 from nexaflow_crm.database import get_db
-from nexaflow_crm.models import Invoice, Milestone, Project, ProjectContact, User
-from nexaflow_crm.schemas import ProjectCreate, ProjectOut, ProjectSummary, ProjectUpdate
+from nexaflow_crm.export import ExportFormat, export_response
+from nexaflow_crm.models import (
+    Contact,
+    Invoice,
+    InvoiceLineItem,
+    Milestone,
+    Project,
+    ProjectContact,
+    RecurringInvoice,
+    RecurringInvoiceItem,
+    User,
+)
+from nexaflow_crm.pagination import keyset_page
+from nexaflow_crm.params import batch_ids
+from nexaflow_crm.schemas import BatchRequest, BatchResponse, ProjectCreate, ProjectOut, ProjectSummary, ProjectUpdate
+from nexaflow_crm.serialization import rows_response, schema_columns
 
 router = APIRouter(prefix="/api/projects", tags=["Projects"])
 
+_LIST_COLUMNS = schema_columns(ProjectOut, Project)
+_EXPORT_COLUMNS = (
+    *_LIST_COLUMNS,
+    Contact.name.label("contact_name"),
+    Contact.email.label("contact_email"),
+    Contact.company.label("contact_company"),
+)
+
+
+def _filter_projects(q, status: str | None):
+    """Filters shared by the list and export endpoints."""
+    if status:
+        q = q.filter(Project.status == status)
+    return q
+
+
+def _owned_projects(db: Session, user_id: int, project_ids: list[int]) -> dict[int, Project]:
+    if not project_ids:
+        return {}
+    return {p.id: p for p in db.query(Project).filter(Project.user_id == user_id, Project.id.in_(project_ids))}
+
+
+def _delete_projects(db: Session, project_ids: list[int]) -> None:
+    """Set-based version of the ORM cascade: invoices (with line items), team rows, milestones and recurring invoices go too."""
+    invoice_ids = select(Invoice.id).where(Invoice.project_id.in_(project_ids))
+    db.execute(delete(InvoiceLineItem).where(InvoiceLineItem.invoice_id.in_(invoice_ids)))
+    db.execute(delete(Invoice).where(Invoice.project_id.in_(project_ids)))
+    db.execute(delete(ProjectContact).where(ProjectContact.project_id.in_(project_ids)))
+    db.execute(delete(Milestone).where(Milestone.project_id.in_(project_ids)))
+    template_ids = select(RecurringInvoice.id).where(RecurringInvoice.project_id.in_(project_ids))
+    db.execute(delete(RecurringInvoiceItem).where(RecurringInvoiceItem.recurring_id.in_(template_ids)))
+    db.execute(delete(RecurringInvoice).where(RecurringInvoice.project_id.in_(project_ids)))
+    db.execute(delete(Project).where(Project.id.in_(project_ids)))
+
+
+_BATCH = BatchTarget(
+    model=Project,
+    label="Project",
+    create_schema=ProjectCreate,
+    update_schema=ProjectUpdate,
+    out_schema=ProjectOut,
+    load_owned=_owned_projects,
+    values=lambda user_id, fields: {"user_id": user_id, **fields},
+    delete=_delete_projects,
+    references=(Reference("contact_id", Contact, "Contact"),),
+)
+
 
 @router.get("", response_model=list[ProjectOut])
 def list_projects(
+    response: Response,
     status: str | None = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    q = db.query(Project).filter(Project.user_id == user.id)
-    if status:
-        q = q.filter(Project.status == status)
-    return q.order_by(Project.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
+    q = _filter_projects(db.query(*_LIST_COLUMNS).filter(Project.user_id == user.id), status)
+    rows = keyset_page(q, Project.created_at, Project.id, cursor=cursor, page=page, page_size=page_size, response=response)
+    return rows_response(rows, response)
+
+
+@router.get("/export")
+def export_projects(
+    fmt: ExportFormat = Query("csv", alias="format"),
+    status: str | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Every project matching the list filters with its client contact, streamed as CSV or NDJSON."""
+    q = (
+        db.query(*_EXPORT_COLUMNS)
+        .outerjoin(Contact, Contact.id == Project.contact_id)
+        .filter(Project.user_id == user.id)
+    )
+    q = _filter_projects(q, status).order_by(Project.created_at.desc(), Project.id.desc())
+    return export_response(q.statement, fmt, "projects")
 
 
 @router.post("", response_model=ProjectOut, status_code=201)
@@ -35,6 +115,146 @@ def create_project(data: ProjectCreate, db: Session = Depends(get_db), user: Use
     return project
 
 
+def _invoice_totals(db: Session, project_ids) -> dict[int, tuple[float, float]]:
+    """(invoiced, received) per project from one grouped conditional aggregate."""
+    rows = db.execute(
+        select(
+            Invoice.project_id,
+            func.sum(case((Invoice.status != "cancelled", Invoice.amount), else_=0.0)),
+            func.sum(case((Invoice.status == "paid", Invoice.amount), else_=0.0)),
+        )
+        .where(Invoice.project_id.in_(project_ids))
+        .group_by(Invoice.project_id)
+    )
+    return {project_id: (invoiced or 0.0, received or 0.0) for project_id, invoiced, received in rows}
+
+
+def _milestone_counts(db: Session, project_ids, today_str: str) -> dict[int, tuple[int, int, int]]:
+    """(total, completed, overdue) milestones per project in one grouped query."""
+    overdue = and_(
+        Milestone.completed_at.is_(None),
+        Milestone.due_date.isnot(None),
+        Milestone.due_date != "",
+        Milestone.due_date < today_str,
+    )
+    rows = db.execute(
+        select(
+            Milestone.project_id,
+            func.count(Milestone.id),
+            func.count(Milestone.completed_at),
+            func.sum(case((overdue, 1), else_=0)),
+        )
+        .where(Milestone.project_id.in_(project_ids))
+        .group_by(Milestone.project_id)
+    )
+    return {project_id: (total, completed, overdue or 0) for project_id, total, completed, overdue in rows}
+
+
+def _team_stats(db: Session, project_ids) -> dict[int, tuple[int, str]]:
+    """(team_count, pm_name) per project; the PM is the earliest-assigned ``pm`` role."""
+    counts = dict(
+        db.execute(
+            select(ProjectContact.project_id, func.count(ProjectContact.id))
+            .where(ProjectContact.project_id.in_(project_ids))
+            .group_by(ProjectContact.project_id)
+        ).all()
+    )
+    pm_names: dict[int, str] = {}
+    pm_rows = db.execute(
+        select(ProjectContact.project_id, Contact.name)
+        .outerjoin(Contact, Contact.id == ProjectContact.contact_id)
+        .where(ProjectContact.project_id.in_(project_ids), ProjectContact.role == "pm")
+        .order_by(ProjectContact.id)
+    )
+    for project_id, name in pm_rows:
+        pm_names.setdefault(project_id, name or "Unknown")
+    return {project_id: (counts.get(project_id, 0), pm_names.get(project_id, "")) for project_id in project_ids}
+
+
+def _build_summary(
+    project: Project,
+    invoiced_amount: float,
+    received_payment: float,
+    ms_total: int,
+    ms_completed: int,
+    ms_overdue: int,
+    pm_name: str,
+    team_count: int,
+    team_members: list[dict] | None = None,
+    milestones: list[dict] | None = None,
+) -> ProjectSummary:
+    val = project.value or 0.0
+    cost = project.actual_cost or 0.0
+    bgt = project.budget or 0.0
+    net_margin = val - cost
+    margin_pct = round((net_margin / val) * 100, 1) if val > 0 else 0.0
+    progress_pct = round((ms_completed / ms_total) * 100, 1) if ms_total > 0 else 0.0
+
+    return ProjectSummary(
+        id=project.id,
+        title=project.title,
+        status=project.status,
+        currency=project.currency or "USD",
+        progress_pct=progress_pct,
+        project_value=round(val, 2),
+        budget=round(bgt, 2),
+        actual_cost=round(cost, 2),
+        net_margin=round(net_margin, 2),
+        margin_pct=margin_pct,
+        variance=round(bgt - cost, 2),
+        invoiced_amount=round(invoiced_amount, 2),
+        received_payment=round(received_payment, 2),
+        outstanding_invoice=round(invoiced_amount - received_payment, 2),
+        cashflow_position=round(received_payment - cost, 2),
+        start_date=project.start_date or "",
+        end_date=project.end_date or "",
+        pm_name=pm_name,
+        team_count=team_count,
+        milestones_completed=ms_completed,
+        milestones_total=ms_total,
+        overdue_milestones=ms_overdue,
+        team_members=team_members or [],
+        milestones=milestones or [],
+    )
+
+
+@router.post("/batch", response_model=BatchResponse)
+def batch_projects(data: BatchRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Create, update and delete many projects in one transaction, with a result per operation."""
+    return run_batch(db, user.id, data, _BATCH)
+
+
+@router.get("/summaries", response_model=list[ProjectSummary])
+def get_project_summaries(
+    ids: list[int] = Depends(batch_ids),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Summaries for many projects (the projects board) in a fixed number of grouped queries.
+
+    Nested ``team_members``/``milestones`` are left empty; fetch a single summary for those.
+    Unknown ids are omitted; results follow the order of ``ids``.
+    """
+    projects = {p.id: p for p in db.query(Project).filter(Project.id.in_(ids), Project.user_id == user.id)}
+    if not projects:
+        return []
+    owned = list(projects)
+    invoices = _invoice_totals(db, owned)
+    milestones = _milestone_counts(db, owned, date.today().isoformat())
+    teams = _team_stats(db, owned)
+
+    summaries = []
+    for project_id in ids:
+        project = projects.get(project_id)
+        if project is None:
+            continue
+        invoiced, received = invoices.get(project_id, (0.0, 0.0))
+        ms_total, ms_completed, ms_overdue = milestones.get(project_id, (0, 0, 0))
+        team_count, pm_name = teams[project_id]
+        summaries.append(_build_summary(project, invoiced, received, ms_total, ms_completed, ms_overdue, pm_name, team_count))
+    return summaries
+
+
 @router.get("/{project_id}", response_model=ProjectOut)
 def get_project(project_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     project = db.query(Project).filter(Project.id == project_id, Project.user_id == user.id).first()
@@ -50,22 +270,7 @@ def get_project_summary(project_id: int, db: Session = Depends(get_db), user: Us
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Financial computations from invoices
-    invoiced_amount = (
-        db.query(func.sum(Invoice.amount))
-        .filter(Invoice.project_id == project_id, Invoice.status != "cancelled")
-        .scalar() or 0.0
-    )
-    received_payment = (
-        db.query(func.sum(Invoice.amount))
-        .filter(Invoice.project_id == project_id, Invoice.status == "paid")
-        .scalar() or 0.0
-    )
-
-    val = project.value or 0.0
-    cost = project.actual_cost or 0.0
-    bgt = project.budget or 0.0
-    net_margin = val - cost
-    margin_pct = round((net_margin / val) * 100, 1) if val > 0 else 0.0
+    invoiced_amount, received_payment = _invoice_totals(db, [project_id]).get(project_id, (0.0, 0.0))
 
     # Milestones
     all_milestones = db.query(Milestone).filter(Milestone.project_id == project_id).all()
@@ -73,10 +278,14 @@ def get_project_summary(project_id: int, db: Session = Depends(get_db), user: Us
     ms_completed = sum(1 for m in all_milestones if m.completed_at)
     today_str = date.today().isoformat()
     ms_overdue = sum(1 for m in all_milestones if not m.completed_at and m.due_date and m.due_date < today_str)
-    progress_pct = round((ms_completed / ms_total) * 100, 1) if ms_total > 0 else 0.0
 
     # Team
-    pcs = db.query(ProjectContact).filter(ProjectContact.project_id == project_id).all()
+    pcs = (
+        db.query(ProjectContact)
+        .options(joinedload(ProjectContact.contact))
+        .filter(ProjectContact.project_id == project_id)
+        .all()
+    )
     pm_name = ""
     team_members = []
     for pc in pcs:
@@ -97,31 +306,9 @@ def get_project_summary(project_id: int, db: Session = Depends(get_db), user: Us
         for m in all_milestones
     ]
 
-    return ProjectSummary(
-        id=project.id,
-        title=project.title,
-        status=project.status,
-        currency=project.currency or "USD",
-        progress_pct=progress_pct,
-        project_value=round(val, 2),
-        budget=round(bgt, 2),
-        actual_cost=round(cost, 2),
-        net_margin=round(net_margin, 2),
-        margin_pct=margin_pct,
-        variance=round(bgt - cost, 2),
-        invoiced_amount=round(invoiced_amount, 2),
-        received_payment=round(received_payment, 2),
-        outstanding_invoice=round(invoiced_amount - received_payment, 2),
-        cashflow_position=round(received_payment - cost, 2),
-        start_date=project.start_date or "",
-        end_date=project.end_date or "",
-        pm_name=pm_name,
-        team_count=len(pcs),
-        milestones_completed=ms_completed,
-        milestones_total=ms_total,
-        overdue_milestones=ms_overdue,
-        team_members=team_members,
-        milestones=milestones_list,
+    return _build_summary(
+        project, invoiced_amount, received_payment, ms_total, ms_completed, ms_overdue, pm_name, len(pcs),
+        team_members=team_members, milestones=milestones_list,
     )
 
 
@@ -0,0 +1,131 @@
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session, selectinload
+
+from nexaflow_crm import recurring
+from nexaflow_crm.auth import get_current_user
+from nexaflow_crm.database import get_db
+from nexaflow_crm.models import Invoice, Project, RecurringInvoice, RecurringInvoiceItem, User
+from nexaflow_crm.schemas import (
+    RecurringInvoiceCreate,
+    RecurringInvoiceOut,
+    RecurringInvoiceUpdate,
+    RecurringItemIn,
+    RecurringRunOut,
+)
+
+router = APIRouter(prefix="/api/recurring-invoices", tags=["Recurring Invoices"])
+
+
+def _get_user_template(template_id: int, db: Session, user: User) -> RecurringInvoice:
+    template = (
+        db.query(RecurringInvoice)
+        .filter(RecurringInvoice.id == template_id, RecurringInvoice.user_id == user.id)
+        .first()
+    )
+    if not template:
+        raise HTTPException(status_code=404, detail="Recurring invoice not found")
+    return template
+
+
+def _items(items: list[RecurringItemIn]) -> list[RecurringInvoiceItem]:
+    return [RecurringInvoiceItem(**item.model_dump()) for item in items]
+
+
+@router.get("", response_model=list[RecurringInvoiceOut])
+def list_recurring_invoices(
+    project_id: int | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    q = db.query(RecurringInvoice).options(selectinload(RecurringInvoice.items)).filter(RecurringInvoice.user_id == user.id)
+    if project_id is not None:
+        q = q.filter(RecurringInvoice.project_id == project_id)
+    return q.order_by(RecurringInvoice.created_at.desc(), RecurringInvoice.id.desc()).all()
+
+
+@router.post("", response_model=RecurringInvoiceOut, status_code=201)
+def create_recurring_invoice(data: RecurringInvoiceCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Bill a project every period from ``start_date``; a start date in the past is caught up on the next run."""
+    project = db.query(Project).filter(Project.id == data.project_id, Project.user_id == user.id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    fields = data.model_dump(exclude={"items", "start_date", "end_date"})
+    template = RecurringInvoice(
+        user_id=user.id,
+        **fields,
+        start_date=data.start_date.isoformat(),
+        end_date=data.end_date.isoformat() if data.end_date else None,
+        next_run_date=data.start_date.isoformat(),
+        items=_items(data.items),
+    )
+    db.add(template)
+    db.commit()
+    db.refresh(template)
+    return template
+
+
+@router.post("/run", response_model=RecurringRunOut)
+def run_recurring_invoices(user: User = Depends(get_current_user)):
+    """Generate the current user's due invoices now instead of waiting for the scheduler."""
+    return RecurringRunOut(**recurring.run_due(user_id=user.id).as_dict())
+
+
+@router.get("/{template_id}", response_model=RecurringInvoiceOut)
+def get_recurring_invoice(template_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    return _get_user_template(template_id, db, user)
+
+
+@router.put("/{template_id}", response_model=RecurringInvoiceOut)
+def update_recurring_invoice(
+    template_id: int,
+    data: RecurringInvoiceUpdate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Changes apply to periods not yet invoiced. Resuming a paused template skips the periods it was paused for.
+
+    Moving the ``end_date`` of an ended template past its next period reactivates it from that period.
+    """
+    template = _get_user_template(template_id, db, user)
+    fields = data.model_dump(exclude_unset=True)
+    if "status" in fields and template.status == "ended":
+        raise HTTPException(status_code=400, detail="Recurring invoice has ended")
+    if "items" in fields:
+        fields.pop("items")
+        template.items = _items(data.items or [])
+    if "end_date" in fields:
+        end_date: date | None = fields.pop("end_date")
+        if end_date and end_date.isoformat() < template.start_date:
+            raise HTTPException(status_code=400, detail="end_date is before start_date")
+        if template.status == "ended" and template.end_date:
+            # Ended means every period up to the old end_date was invoiced; carry on after it.
+            old_end = date.fromisoformat(template.end_date)
+            resume = recurring.first_period_on_or_after(template, old_end + timedelta(days=1))
+            if end_date is None or resume <= end_date:
+                template.status = "active"
+                template.next_run_date = resume.isoformat()
+        template.end_date = end_date.isoformat() if end_date else None
+    if fields.get("status") == "active" and template.status == "paused":
+        today = datetime.now(timezone.utc).date()
+        resume = recurring.first_period_on_or_after(template, today).isoformat()
+        template.next_run_date = max(template.next_run_date, resume)
+    for field, value in fields.items():
+        setattr(template, field, value)
+    # Same rule as RecurringInvoiceCreate, checked on the merged template.
+    if not template.items and template.amount <= 0:
+        raise HTTPException(status_code=400, detail="Give line items or an amount greater than 0")
+    db.commit()
+    db.refresh(template)
+    return template
+
+
+@router.delete("/{template_id}", status_code=204)
+def delete_recurring_invoice(template_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Stops future invoices; invoices already generated are kept."""
+    template = _get_user_template(template_id, db, user)
+    db.execute(update(Invoice).where(Invoice.recurring_id == template.id).values(recurring_id=None))
+    db.delete(template)
+    db.commit()
@@ -0,0 +1,55 @@
+"""Schema setup at startup, skipped when the database is already current.
+
+``create_all`` inspects every table and ``setup_contact_search`` checks the
+FTS index and triggers — a dozen round-trips on every worker start. On SQLite
+a fingerprint of the model metadata and the FTS DDL is stored in
+``PRAGMA user_version`` once setup succeeds; a worker that finds the same
+fingerprint goes straight to serving. Changing a model (or the FTS DDL)
+changes the fingerprint, so the next start runs the full setup again.
+"""
+
+import hashlib
+
+from sqlalchemy import UniqueConstraint
+
+from nexaflow_crm import fulltext
+from nexaflow_crm.models import Base  # importing models registers every table on Base.metadata
+
+
+def schema_version(metadata=Base.metadata) -> int:
+    """Stable 31-bit fingerprint of tables, columns, indexes (with their columns), unique constraints and the FTS DDL (never 0)."""
+    parts = [fulltext.CONTACTS_FTS_TABLE, *fulltext.CONTACTS_FTS_TRIGGERS]
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        parts.append(table.name)
+        parts.extend(f"{col.name} {col.type!r} {col.nullable} {col.primary_key}" for col in table.columns)
+        parts.extend(sorted(
+            f"{index.name} {index.unique} ({', '.join(str(expr) for expr in index.expressions)})"
+            for index in table.indexes
+        ))
+        parts.extend(sorted(
+            f"{constraint.name} unique ({', '.join(col.name for col in constraint.columns)})"
+            for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+        ))
+    digest = hashlib.sha256("\n".join(parts).encode()).digest()
+    return int.from_bytes(digest[:4], "big") & 0x7FFFFFFF or 1
+
+
+def ensure_schema(engine) -> bool:
+    """Create missing tables and the contacts FTS index. Returns False when skipped as current."""
+    if engine.dialect.name != "sqlite":
+        Base.metadata.create_all(bind=engine)
+        return True
+
+    version = schema_version()
+    with engine.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() == version:
+            fulltext.detect_contact_search(conn)
+            return False
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # Left unstamped when search is off, so the next start tries the index again.
+        if fulltext.setup_contact_search(conn):
+            conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+    return True
@@ -1,7 +1,7 @@
-from datetime import datetime
-from typing import Literal
+from datetime import date, datetime
+from typing import Any, Literal
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
 
 # Auth
@@ -67,6 +67,27 @@ class ContactOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+
+class ContactImportOut(BaseModel):
+    id: int
+    filename: str
+    status: str
+    size_bytes: int
+    bytes_processed: int
+    rows_processed: int
+    imported: int
+    duplicates: int
+    invalid: int
+    error: str = ""
+    created_at: datetime | None = None
+    finished_at: datetime | None = None
+    model_config = {"from_attributes": True}
+
+
 # Projects
 class ProjectCreate(BaseModel):
     title: str = Field(..., min_length=1, max_length=300)
@@ -200,6 +221,8 @@ class InvoiceOut(BaseModel):
     sent_at: datetime | None = None
     sent_to_email: str = ""
     opened_at: datetime | None = None
+    recurring_id: int | None = None
+    period: str | None = None
     created_at: datetime | None = None
     model_config = {"from_attributes": True}
 
@@ -266,6 +289,100 @@ class MilestoneOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+# Recurring invoices
+class RecurringItemIn(BaseModel):
+    description: str = Field(..., min_length=1)
+    quantity: float = Field(default=1.0, gt=0)
+    unit_price: float = Field(default=0.0, ge=0)
+
+
+class RecurringItemOut(RecurringItemIn):
+    id: int
+    model_config = {"from_attributes": True}
+
+
+class RecurringInvoiceCreate(BaseModel):
+    project_id: int
+    title: str = ""
+    amount: float = Field(default=0.0, ge=0)  # used when there are no items
+    currency: str = "USD"
+    notes: str = ""
+    frequency: Literal["monthly", "quarterly"] = "monthly"
+    start_date: date
+    end_date: date | None = None
+    due_days: int = Field(default=30, ge=0, le=365)
+    send_to_email: str = ""  # set to email each generated invoice
+    send_mode: Literal["email_only", "email_and_pdf"] = "email_only"
+    items: list[RecurringItemIn] = []
+
+    @model_validator(mode="after")
+    def _check(self):
+        if not self.items and self.amount <= 0:
+            raise ValueError("Give line items or an amount greater than 0")
+        if self.end_date and self.end_date < self.start_date:
+            raise ValueError("end_date is before start_date")
+        return self
+
+
+class RecurringInvoiceUpdate(BaseModel):
+    title: str | None = None
+    amount: float | None = Field(default=None, ge=0)
+    currency: str | None = None
+    notes: str | None = None
+    end_date: date | None = None
+    due_days: int | None = Field(default=None, ge=0, le=365)
+    status: Literal["active", "paused"] | None = None
+    send_to_email: str | None = None
+    send_mode: Literal["email_only", "email_and_pdf"] | None = None
+    items: list[RecurringItemIn] | None = None  # replaces the template's items
+
+
+class RecurringInvoiceOut(BaseModel):
+    id: int
+    project_id: int
+    title: str
+    amount: float
+    currency: str
+    notes: str
+    frequency: str
+    start_date: date
+    end_date: date | None
+    next_run_date: date | None
+    due_days: int
+    status: str
+    send_to_email: str
+    send_mode: str
+    last_generated_at: datetime | None
+    items: list[RecurringItemOut] = []
+    created_at: datetime | None = None
+    model_config = {"from_attributes": True}
+
+
+class RecurringRunOut(BaseModel):
+    templates: int  # templates that had periods due
+    generated: int  # invoices created
+    skipped: int  # periods already invoiced
+    sent: int = 0
+    send_failed: int = 0
+
+
+# Notifications (sent by the notification scheduler)
+class NotificationOut(BaseModel):
+    id: int
+    kind: str  # milestone_due, invoice_overdue
+    item_id: int
+    period: str
+    channel: str
+    recipient: str
+    subject: str
+    status: str  # pending, sent, failed
+    attempts: int = 1
+    error: str | None = None
+    created_at: datetime | None = None
+    sent_at: datetime | None = None
+    model_config = {"from_attributes": True}
+
+
 # Dashboard
 class DashboardStats(BaseModel):
     total_contacts: int
@@ -278,3 +395,28 @@ class DashboardStats(BaseModel):
     projects_over_budget: int = 0
     upcoming_milestones: list[MilestoneOut] = []
     monthly_revenue: list[dict] = []
+
+
+# Batch mutations (POST /api/{contacts,projects,invoices}/batch)
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: int | None = None  # required for update and delete
+    data: dict[str, Any] = {}  # validated per item against the resource's Create/Update schema
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(..., min_length=1)
+    atomic: bool = False  # all or nothing
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: int
+    id: int | None = None
+    data: dict | None = None
+    error: str | None = None
+
+
+class BatchResponse(BaseModel):
+    committed: bool
+    results: list[BatchItemResult]
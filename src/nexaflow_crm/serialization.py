@@ -0,0 +1,48 @@
+"""Fast path for list endpoints: column-only selects serialized straight to JSON.
+
+Instead of hydrating ORM objects and validating each through a
+``from_attributes`` model, list routes select exactly the columns their
+``*Out`` schema declares and encode the rows in one pass — with ``orjson``
+when installed, else the stdlib encoder. ``response_model`` stays on the
+routes for the OpenAPI schema.
+"""
+
+import json
+from datetime import date, datetime
+
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+_SKIPPED_HEADERS = ("content-length", "content-type")
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def schema_columns(schema: type[BaseModel], model) -> tuple:
+    """The model columns backing every field of ``schema``, in field order."""
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def rows_response(rows, response: Response | None = None) -> Response:
+    """Encode Core/ORM-column rows as a JSON array, carrying over headers set on ``response``."""
+    out = Response(dumps([row._asdict() for row in rows]), media_type="application/json")
+    if response is not None:
+        for key, value in response.headers.items():
+            if key not in _SKIPPED_HEADERS:
+                out.headers[key] = value
+    return out
@@ -0,0 +1,54 @@
+"""Production server settings used by ``main.start()``.
+
+Development keeps a single auto-reloading process. Anything else runs
+``WORKERS`` uvicorn processes (default: one per CPU) with uvloop and httptools
+when they are installed (``uv pip install uvloop httptools``), falling back to
+asyncio and h11. On SIGTERM each worker stops accepting connections and lets
+in-flight requests — PDF rendering, SMTP sends — finish for up to
+``GRACEFUL_TIMEOUT`` seconds before exiting.
+"""
+
+import importlib.util
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv("WORKERS", "0")) or (os.cpu_count() or 1)
+# Threads available to sync routes per worker (anyio's default is 40).
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+KEEP_ALIVE_SECONDS = int(os.getenv("KEEP_ALIVE_SECONDS", "15"))
+BACKLOG = int(os.getenv("BACKLOG", "2048"))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+LIMIT_CONCURRENCY = int(os.getenv("LIMIT_CONCURRENCY", "0")) or None  # per worker; beyond it, 503
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options() -> dict:
+    """Keyword arguments for ``uvicorn.run`` in production mode."""
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+    logger.info("Starting %d worker(s), loop=%s, http=%s", WORKERS, loop, http)
+    return {
+        "workers": WORKERS,
+        "loop": loop,
+        "http": http,
+        "backlog": BACKLOG,
+        "timeout_keep_alive": KEEP_ALIVE_SECONDS,
+        "timeout_graceful_shutdown": GRACEFUL_TIMEOUT,
+        "limit_concurrency": LIMIT_CONCURRENCY,
+        "proxy_headers": True,
+        "forwarded_allow_ips": FORWARDED_ALLOW_IPS,
+        "access_log": False,
+    }
+
+
+def configure_threadpool() -> None:
+    """Size the threadpool sync routes run on. Call from a startup handler (needs the event loop)."""
+    from anyio import to_thread
+
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
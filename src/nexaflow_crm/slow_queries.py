@@ -0,0 +1,224 @@
+"""Slow query log built on SQLAlchemy cursor events.
+
+Statements slower than ``SLOW_QUERY_MS`` are recorded with their normalized
+SQL, parameter shapes (types, never values), duration, calling route and, on
+SQLite, the ``EXPLAIN QUERY PLAN`` output (captured once per statement shape).
+Records are aggregated in memory for ``/metrics/slow-queries`` and appended to
+``SLOW_QUERY_LOG`` as JSON lines, which every worker shares and the CLI reads:
+
+    python -m nexaflow_crm.slow_queries --log slow_queries.jsonl --sort total
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))  # 0 disables
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.jsonl")  # empty: memory only
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+MAX_TRACKED_STATEMENTS = 1000
+
+_EXPLAINABLE = ("select", "update", "delete", "with")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_current_scope: ContextVar[Scope | None] = ContextVar("slow_query_scope", default=None)
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse literals, IN-lists and whitespace so equivalent statements group together."""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("(?, ...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def parameter_shape(parameters, executemany: bool = False) -> str:
+    if executemany:
+        return f"executemany x{len(parameters)}"
+    if isinstance(parameters, dict):
+        return ", ".join(f"{key}:{type(value).__name__}" for key, value in parameters.items())
+    return ", ".join(type(value).__name__ for value in parameters or ())
+
+
+class SlowQueryStats:
+    """Per-statement aggregates: count, total/max duration, routes and the last plan."""
+
+    def __init__(self, max_statements: int = MAX_TRACKED_STATEMENTS):
+        self.max_statements = max_statements
+        self.statements: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            entry = self.statements.get(record["sql"])
+            if entry is None:
+                if len(self.statements) >= self.max_statements:
+                    return
+                entry = self.statements[record["sql"]] = {
+                    "sql": record["sql"], "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "routes": {}, "params": record["params"], "plan": None,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += record["duration_ms"]
+            entry["max_ms"] = max(entry["max_ms"], record["duration_ms"])
+            route = record.get("route") or "-"
+            entry["routes"][route] = entry["routes"].get(route, 0) + 1
+            if record.get("plan"):
+                entry["plan"] = record["plan"]
+
+    def has_plan(self, sql: str) -> bool:
+        entry = self.statements.get(sql)
+        return entry is not None and entry["plan"] is not None
+
+    def top(self, limit: int = 20, sort: str = "total") -> list[dict]:
+        key = {"total": "total_ms", "max": "max_ms", "count": "count"}[sort]
+        with self._lock:
+            entries = [dict(entry, routes=dict(entry["routes"])) for entry in self.statements.values()]
+        entries.sort(key=lambda entry: entry[key], reverse=True)
+        for entry in entries:
+            entry["mean_ms"] = round(entry["total_ms"] / entry["count"], 3)
+            entry["total_ms"] = round(entry["total_ms"], 3)
+            entry["max_ms"] = round(entry["max_ms"], 3)
+        return entries[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.statements.clear()
+
+
+stats = SlowQueryStats()
+_log_lock = threading.Lock()
+
+
+def _current_route() -> tuple[str | None, str | None]:
+    scope = _current_scope.get()
+    if scope is None:
+        return None, None
+    route = getattr(scope.get("route"), "path", None) or scope.get("path")
+    return scope.get("method"), route
+
+
+def _explain(conn, statement: str, parameters) -> list[str] | None:
+    if conn.dialect.name != "sqlite" or not statement.lstrip()[:6].lower().startswith(_EXPLAINABLE):
+        return None
+    try:
+        rows = conn.connection.driver_connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    except Exception:
+        return None
+    # (id, parent, notused, detail) — indent children under their parent like the sqlite3 shell.
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def _write(record: dict) -> None:
+    line = json.dumps(record, separators=(",", ":")) + "\n"
+    with _log_lock, open(SLOW_QUERY_LOG, "a", encoding="utf-8") as fh:
+        fh.write(line)
+
+
+def instrument_engine(engine, threshold_ms: float = SLOW_QUERY_MS) -> None:
+    """Record statements on ``engine`` that take longer than ``threshold_ms``."""
+    from sqlalchemy import event
+
+    threshold = threshold_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["slow_query_started"].pop()
+        if elapsed < threshold:
+            return
+        sql = normalize_sql(statement)
+        method, route = _current_route()
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "duration_ms": round(elapsed * 1000, 3),
+            "method": method,
+            "route": f"{method} {route}" if route else None,
+            "sql": sql,
+            "params": parameter_shape(parameters, executemany),
+            "plan": None,
+        }
+        if SLOW_QUERY_EXPLAIN and not executemany and not stats.has_plan(sql):
+            record["plan"] = _explain(conn, statement, parameters)
+        stats.add(record)
+        if SLOW_QUERY_LOG:
+            _write(record)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        started = context.connection.info.get("slow_query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+class SlowQueryMiddleware:
+    """Makes the current request's route visible to the cursor listeners."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
+
+
+def load_log(path: str) -> SlowQueryStats:
+    aggregated = SlowQueryStats(max_statements=10**9)
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                aggregated.add(json.loads(line))
+    return aggregated
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize the slow query log.")
+    parser.add_argument("--log", default=SLOW_QUERY_LOG or "slow_queries.jsonl")
+    parser.add_argument("--sort", choices=("total", "max", "count"), default="total")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    top = load_log(args.log).top(args.limit, args.sort)
+    if args.json:
+        print(json.dumps(top, indent=2))
+        return 0
+    for rank, entry in enumerate(top, 1):
+        routes = ", ".join(f"{route} ({n})" for route, n in sorted(entry["routes"].items(), key=lambda r: -r[1]))
+        print(f"#{rank}  total {entry['total_ms']:.1f} ms  count {entry['count']}  "
+              f"mean {entry['mean_ms']:.1f} ms  max {entry['max_ms']:.1f} ms")
+        print(f"    routes: {routes}")
+        print(f"    params: {entry['params'] or '-'}")
+        print(f"    {entry['sql']}")
+        for line in entry["plan"] or ():
+            print(f"      {line}")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
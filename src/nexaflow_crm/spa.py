@@ -0,0 +1,148 @@
+"""Serves the built Vue SPA (``frontend/dist``) from an in-memory index.
+
+The dist tree is scanned once at startup: every file gets its bytes, an ETag,
+and gzip/brotli variants (``.gz``/``.br`` siblings from the build, otherwise
+compressed once in memory; brotli only when the ``brotli`` package is
+installed). Requests never touch the filesystem, pick the best encoding from
+``Accept-Encoding``, and get 304s for matching ``If-None-Match``. Each
+encoding has its own ETag (``-br``/``-gz`` suffix) and every response carries
+``Vary: Accept-Encoding``, so caches never hand a compressed body to a client
+that did not ask for it.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+# Vite fingerprints everything under assets/, so those never change in place.
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+MAX_INDEXED_BYTES = 4 * 1024 * 1024
+MIN_COMPRESS_BYTES = 1024
+ETAG_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml")
+
+
+@dataclass
+class SpaFile:
+    path: Path
+    media_type: str
+    etag: str
+    last_modified: str
+    cache_control: str
+    body: bytes | None = None  # None: too large to index, streamed from disk
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+
+def _is_compressible(media_type: str) -> bool:
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if token:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+def _load_file(path: Path, rel: str) -> SpaFile:
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    stat = path.stat()
+    entry = SpaFile(
+        path=path,
+        media_type=media_type,
+        etag=f'"{stat.st_size:x}-{int(stat.st_mtime_ns):x}"',
+        last_modified=formatdate(stat.st_mtime, usegmt=True),
+        cache_control=IMMUTABLE_CACHE if rel.startswith("assets/") else REVALIDATE_CACHE,
+    )
+    if stat.st_size > MAX_INDEXED_BYTES:
+        return entry
+
+    entry.body = path.read_bytes()
+    entry.etag = '"' + hashlib.sha1(entry.body).hexdigest() + '"'
+    if not _is_compressible(media_type) or len(entry.body) < MIN_COMPRESS_BYTES:
+        return entry
+
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        sibling = path.with_name(path.name + suffix)
+        if sibling.is_file():
+            entry.encoded[encoding] = sibling.read_bytes()
+    if "gzip" not in entry.encoded:
+        entry.encoded["gzip"] = gzip.compress(entry.body, compresslevel=9, mtime=0)
+    if "br" not in entry.encoded and brotli is not None:
+        entry.encoded["br"] = brotli.compress(entry.body, quality=11)
+    # Drop variants that don't actually save bytes.
+    entry.encoded = {k: v for k, v in entry.encoded.items() if len(v) < len(entry.body)}
+    return entry
+
+
+class SpaIndex:
+    def __init__(self, root: Path):
+        self.root = root
+        self.files: dict[str, SpaFile] = {}
+        self.loaded = False
+
+    def load(self) -> None:
+        files = {}
+        for path in self.root.rglob("*"):
+            if not path.is_file() or path.suffix in (".gz", ".br"):
+                continue
+            rel = path.relative_to(self.root).as_posix()
+            files[rel] = _load_file(path, rel)
+        self.files = files
+        self.loaded = True
+
+    def response(self, full_path: str, request: Request) -> Response:
+        if not self.loaded:
+            self.load()
+        entry = self.files.get(full_path) if full_path else None
+        if entry is None:
+            if full_path.startswith("assets/"):
+                return Response(status_code=404)
+            entry = self.files.get("index.html")
+            if entry is None:
+                return Response(status_code=404)
+
+        encoding = None
+        if entry.body is not None:
+            accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+            encoding = next((e for e in ("br", "gzip") if e in entry.encoded and e in accepted), None)
+        etag = entry.etag if encoding is None else entry.etag[:-1] + ETAG_SUFFIXES[encoding] + '"'
+
+        headers = {
+            "ETag": etag,
+            "Last-Modified": entry.last_modified,
+            "Cache-Control": entry.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+                return Response(status_code=304, headers=headers)
+        elif request.headers.get("if-modified-since") == entry.last_modified:
+            return Response(status_code=304, headers=headers)
+
+        if entry.body is None:
+            return FileResponse(entry.path, media_type=entry.media_type, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            return Response(entry.encoded[encoding], media_type=entry.media_type, headers=headers)
+        return Response(entry.body, media_type=entry.media_type, headers=headers)
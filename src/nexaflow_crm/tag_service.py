@@ -0,0 +1,89 @@
+"""Normalized contact tag index backing tag filters and facet counts.
+
+``Contact.tags`` stays the comma-separated string the API reads and writes;
+``tags`` / ``contact_tags`` mirror it so filtering and counting never scan it.
+"""
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from nexaflow_crm.models import ContactTag, Tag
+
+
+def parse_tags(raw: str | None) -> list[str]:
+    """Split a comma-separated tag string into unique normalized names, keeping order."""
+    seen: dict[str, None] = {}
+    for part in (raw or "").split(","):
+        name = part.strip().lower()
+        if name:
+            seen.setdefault(name, None)
+    return list(seen)
+
+
+def _tag_ids(db: Session, user_id: int, names: list[str]) -> list[int]:
+    """Resolve tag names to ids, creating the missing ones in one insert."""
+    if not names:
+        return []
+    existing = dict(db.execute(select(Tag.name, Tag.id).where(Tag.user_id == user_id, Tag.name.in_(names))).all())
+    missing = [name for name in names if name not in existing]
+    if missing:
+        db.execute(insert(Tag), [{"user_id": user_id, "name": name} for name in missing])
+        existing.update(db.execute(select(Tag.name, Tag.id).where(Tag.user_id == user_id, Tag.name.in_(missing))).all())
+    return [existing[name] for name in names]
+
+
+def sync_contact_tags(db: Session, contact) -> None:
+    """Rewrite the index rows for ``contact`` from its ``tags`` string. Caller commits."""
+    db.flush()
+    tag_ids = _tag_ids(db, contact.user_id, parse_tags(contact.tags))
+    db.execute(delete(ContactTag).where(ContactTag.contact_id == contact.id))
+    if tag_ids:
+        db.execute(insert(ContactTag), [{"tag_id": tag_id, "contact_id": contact.id} for tag_id in tag_ids])
+    db.expire(contact, ["contact_tags"])
+
+
+def index_contact_tags(db: Session, user_id: int, contacts: list[tuple[int, str]]) -> None:
+    """Bulk ``sync_contact_tags`` for newly inserted contacts, given (id, tags) pairs. Caller commits."""
+    parsed = [(contact_id, parse_tags(raw)) for contact_id, raw in contacts]
+    names = list(dict.fromkeys(name for _, contact_tags in parsed for name in contact_tags))
+    if not names:
+        return
+    ids = dict(zip(names, _tag_ids(db, user_id, names)))
+    db.execute(
+        insert(ContactTag),
+        [{"tag_id": ids[name], "contact_id": contact_id} for contact_id, contact_tags in parsed for name in contact_tags],
+    )
+
+
+def sync_many_contact_tags(db: Session, user_id: int, contacts: list) -> None:
+    """Set-based ``sync_contact_tags`` for flushed contacts of one user. Caller commits."""
+    if not contacts:
+        return
+    db.execute(delete(ContactTag).where(ContactTag.contact_id.in_([contact.id for contact in contacts])))
+    index_contact_tags(db, user_id, [(contact.id, contact.tags) for contact in contacts])
+    for contact in contacts:
+        db.expire(contact, ["contact_tags"])
+
+
+def filter_by_tags(q, model, user_id: int, names: list[str], match: str = "any"):
+    """Restrict a Contact query to contacts carrying any (or all) of ``names``."""
+    tagged = (
+        select(ContactTag.contact_id)
+        .join(Tag, Tag.id == ContactTag.tag_id)
+        .where(Tag.user_id == user_id, Tag.name.in_(names))
+    )
+    if match == "all":
+        tagged = tagged.group_by(ContactTag.contact_id).having(func.count(ContactTag.tag_id) == len(names))
+    return q.filter(model.id.in_(tagged))
+
+
+def tag_counts(db: Session, user_id: int) -> list[dict]:
+    """Contact count per tag for the user, most used first."""
+    rows = db.execute(
+        select(Tag.name, func.count(ContactTag.contact_id).label("count"))
+        .join(ContactTag, ContactTag.tag_id == Tag.id)
+        .where(Tag.user_id == user_id)
+        .group_by(Tag.id)
+        .order_by(func.count(ContactTag.contact_id).desc(), Tag.name)
+    ).all()
+    return [{"tag": name, "count": count} for name, count in rows]
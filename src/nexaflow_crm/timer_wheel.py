@@ -0,0 +1,75 @@
+"""Hashed timing wheel for the notification scheduler.
+
+Time is cut into ticks of ``tick`` seconds and hashed onto a ring of slots,
+each a dict of ``key -> (when, payload)``. Scheduling and cancelling are O(1)
+whatever the number of timers, and ``advance`` only visits the slots between
+the last tick and now, so hundreds of thousands of pending timers cost
+nothing until they fall due. Timers must fall within one turn of the ring
+(``horizon`` seconds); the caller loads only that far ahead and refills as
+time moves on. Timers scheduled for a tick already expired wait in a separate
+bucket and come out of the next ``advance``. Not thread-safe: one thread owns
+the wheel.
+"""
+
+from typing import Any, Hashable
+
+
+class TimerWheel:
+    def __init__(self, tick: float, horizon: float, now: float):
+        self.tick = tick
+        self._slots: list[dict[Hashable, tuple[float, Any]]] = [{} for _ in range(int(horizon // tick) + 2)]
+        self._late: dict[Hashable, tuple[float, Any]] = {}  # scheduled for an expired tick
+        self._slot_of: dict[Hashable, int] = {}  # -1: in _late
+        self._current = int(now // tick)  # next tick to expire
+
+    @property
+    def horizon_end(self) -> float:
+        """Timers must be due before this time."""
+        return (self._current + len(self._slots) - 1) * self.tick
+
+    def schedule(self, key: Hashable, when: float, payload: Any) -> bool:
+        """Add or move the timer ``key``. Past times fire on the next advance; False when beyond the horizon."""
+        tick = int(when // self.tick)
+        if tick >= self._current + len(self._slots) - 1:
+            return False
+        self.cancel(key)
+        if tick < self._current:
+            self._late[key] = (when, payload)
+            self._slot_of[key] = -1
+        else:
+            slot = tick % len(self._slots)
+            self._slots[slot][key] = (when, payload)
+            self._slot_of[key] = slot
+        return True
+
+    def cancel(self, key: Hashable) -> bool:
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        del (self._late if slot == -1 else self._slots[slot])[key]
+        return True
+
+    def advance(self, now: float) -> list[Any]:
+        """Expire every timer due up to ``now``; returns their payloads in due order."""
+        target = int(now // self.tick)
+        steps = min(target - self._current + 1, len(self._slots))
+        due = list(self._late.values())
+        for key in self._late:
+            del self._slot_of[key]
+        self._late.clear()
+        for _ in range(max(steps, 0)):
+            slot = self._slots[self._current % len(self._slots)]
+            for key, entry in slot.items():
+                del self._slot_of[key]
+                due.append(entry)
+            slot.clear()
+            self._current += 1
+        self._current = max(self._current, target + 1)
+        due.sort(key=lambda entry: entry[0])
+        return [payload for _, payload in due]
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of